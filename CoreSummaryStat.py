@@ -5,13 +5,25 @@
 
 
 import os
+import multiprocessing
 import pandas as pd
-import numpy as np
-from scipy.stats import skew, kurtosis
 from tkinter import filedialog, messagebox, BOTH, RIGHT, LEFT, Y, W
 import ttkbootstrap as ttk
 from ttkbootstrap.constants import *
 from PIL import Image, ImageTk
+from coresummarystat import profiling
+from coresummarystat.client import default_client
+from coresummarystat.correlation import METHODS
+from coresummarystat.export import write_summary
+from coresummarystat.gridview import VirtualGrid
+from coresummarystat.pipeline import CORE_MEASURES, master_rows, summary_events, summary_tables, watch_events
+from coresummarystat.metadata import first_sheet_info
+from coresummarystat.mode import TIES
+from coresummarystat.quantiles import BACKEND_LABELS
+from coresummarystat.readers import FILE_TYPES
+from coresummarystat.resultgrid import ResultsModel, core_rows
+from coresummarystat.rolling import KINDS, parse_window
+from coresummarystat.worker import BackgroundTask
 
 
 class ExcelSummaryApp:
@@ -47,11 +59,7 @@ class ExcelSummaryApp:
         ttk.Button(sidebar, text="Select Excel Files", command=self.load_files, bootstyle=PRIMARY).pack(fill=X, pady=5)
 
         # Measure selection
-        self.measures = [
-            "Mean", "Median", "Mode", "Range", "Variance", "Standard Deviation",
-            "Skewness", "Kurtosis", "Max", "Min", "Coefficient of Variation",
-            "Q1", "Q2", "Q3", "Quartile Deviation", "Correlation"
-        ]
+        self.measures = list(CORE_MEASURES)
         self.measure_vars = {m: ttk.BooleanVar(value=True) for m in self.measures}
 
         ttk.Label(sidebar, text="Select Measures", font=("Segoe UI", 10, "bold")).pack(pady=5)
@@ -67,155 +75,275 @@ class ExcelSummaryApp:
         self.column_frame.pack(fill=Y, expand=True, pady=5)
         self.column_vars = {}
 
+        # Optional key column: measures per group, saved as a "Grouped" sheet
+        ttk.Label(sidebar, text="Group By", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.group_var = ttk.StringVar(value="")
+        self.group_combo = ttk.Combobox(sidebar, textvariable=self.group_var, values=[""], state="readonly")
+        self.group_combo.pack(fill=X, pady=5)
+
+        # Optional window of rows or of a timestamp column's duration, saved as a "Windowed" sheet
+        ttk.Label(sidebar, text="Window (rows or 1h, 7D...)", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.window_var = ttk.StringVar(value="")
+        ttk.Entry(sidebar, textvariable=self.window_var).pack(fill=X, pady=5)
+        self.window_on_var = ttk.StringVar(value="")
+        self.window_on_combo = ttk.Combobox(sidebar, textvariable=self.window_on_var, values=[""], state="readonly")
+        self.window_on_combo.pack(fill=X, pady=5)
+        self.window_kind_var = ttk.StringVar(value=KINDS[0])
+        ttk.Combobox(sidebar, textvariable=self.window_kind_var, values=KINDS, state="readonly").pack(fill=X, pady=5)
+
+        # Worker processes for multi-file / multi-sheet runs
+        ttk.Label(sidebar, text="Worker Processes", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.workers_var = ttk.IntVar(value=1)
+        ttk.Spinbox(sidebar, from_=1, to=os.cpu_count() or 1, textvariable=self.workers_var, width=5).pack(fill=X, pady=5)
+
+        # Quantile backend for Median/Q1-Q3/QD: exact, or a sketch for very long columns
+        ttk.Label(sidebar, text="Quantiles", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.quantiles_var = ttk.StringVar(value=BACKEND_LABELS["exact"])
+        ttk.Combobox(sidebar, textvariable=self.quantiles_var, values=list(BACKEND_LABELS.values()),
+                     state="readonly").pack(fill=X, pady=5)
+        ttk.Label(sidebar, text="Mode Ties", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.ties_var = ttk.StringVar(value="smallest")
+        ttk.Combobox(sidebar, textvariable=self.ties_var, values=TIES, state="readonly").pack(fill=X, pady=5)
+        ttk.Label(sidebar, text="Correlation", font=("Segoe UI", 10, "bold")).pack(pady=5)
+        self.corr_var = ttk.StringVar(value="pearson")
+        ttk.Combobox(sidebar, textvariable=self.corr_var, values=METHODS, state="readonly").pack(fill=X, pady=5)
+        # Reuse results of unchanged files from earlier runs (see coresummarystat.summarydb)
+        self.cache_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(sidebar, text="Disk cache", variable=self.cache_var).pack(anchor=W, pady=5)
+        # Keep summarizing the files as rows are appended, until Cancel (see coresummarystat.watch)
+        self.watch_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(sidebar, text="Watch files", variable=self.watch_var).pack(anchor=W)
+        # Time and memory of every stage, shown by "Diagnostics" and saved as a Run_Profile sheet
+        self.diagnostics_var = ttk.BooleanVar(value=False)
+        ttk.Checkbutton(sidebar, text="Record diagnostics", variable=self.diagnostics_var).pack(anchor=W)
+
         # Action buttons
         ttk.Button(sidebar, text="Generate Summary", command=self.generate_summary, bootstyle=SUCCESS).pack(fill=X, pady=5)
         ttk.Button(sidebar, text="Save Output", command=self.save_output, bootstyle=INFO).pack(fill=X, pady=5)
-
-        # Preview area (Treeview)
-        self.preview = ttk.Treeview(root, columns=("Column", "Measure", "Value"), show="headings", height=25)
-        self.preview.heading("Column", text="Column")
-        self.preview.heading("Measure", text="Measure")
-        self.preview.heading("Value", text="Value")
-        self.preview.column("Column", width=120, anchor=W)
-        self.preview.column("Measure", width=150, anchor=W)
-        self.preview.column("Value", width=150, anchor=W)
+        ttk.Button(sidebar, text="Diagnostics", command=self.show_diagnostics,
+                   bootstyle=SECONDARY).pack(fill=X, pady=5)
+
+        # Progress of the background summary run
+        self.progress = ttk.Progressbar(sidebar, mode="determinate", bootstyle=SUCCESS)
+        self.progress.pack(fill=X, pady=5)
+        self.status_label = ttk.Label(sidebar, text="")
+        self.status_label.pack(fill=X)
+        self.cancel_button = ttk.Button(sidebar, text="Cancel", command=self.cancel_summary,
+                                        bootstyle=DANGER, state=DISABLED)
+        self.cancel_button.pack(fill=X, pady=5)
+
+        # Preview area: a virtual grid that only draws the visible rows
+        self.preview = VirtualGrid(root, ResultsModel(), height=25,
+                                   widths={"Sheet": 180, "Column": 120, "Measure": 150, "Value": 150})
         self.preview.pack(side=RIGHT, fill=BOTH, expand=True, padx=10, pady=10)
 
         self.files = []
         self.summary = None
+        self.grouped = None
+        self.windowed = None
+        self.task = None
+        self.profiler = None
+        self.diagnostics = None
+        # Rewritten on every watch refresh once saved
+        self.output_file = None
+        # Shared summary service from CORESUMMARYSTAT_SERVICE, if any (see coresummarystat.service)
+        self.service = default_client()
 
     def load_files(self):
-        self.files = filedialog.askopenfilenames(filetypes=[("Excel Files", "*.xlsx;*.xls")])
+        self.files = filedialog.askopenfilenames(filetypes=FILE_TYPES)
         if not self.files:
             return
 
         # Preview first file’s columns for selection
-        df = pd.read_excel(self.files[0], sheet_name=None)
-        sample_sheet = list(df.values())[0]
+        # Header and a few rows only; sheets are read in full by Generate Summary
+        info = self.first_sheet_info(self.files[0])
 
         # Clear previous column checkboxes
         for widget in self.column_frame.winfo_children():
             widget.destroy()
 
         self.column_vars = {}
-        for col in sample_sheet.columns:
+        for col in info.columns:
             var = ttk.BooleanVar(value=True)
             self.column_vars[col] = var
             ttk.Checkbutton(self.column_frame, text=col, variable=var).pack(anchor=W)
+        self.group_combo.configure(values=[""] + list(info.columns))
+        self.group_var.set("")
+        self.window_on_combo.configure(values=[""] + list(info.columns))
+        self.window_on_var.set("")
+
+    def first_sheet_info(self, path):
+        # From the service when there is one; if it cannot be reached, this session works locally
+        if self.service is not None:
+            try:
+                return self.service.first_sheet_info(path)
+            except FileNotFoundError:
+                raise
+            except (OSError, ValueError) as exc:
+                messagebox.showwarning("Summary service", f"{exc}\n\nContinuing without the service.")
+                self.service = None
+        return first_sheet_info(path)
 
     def generate_summary(self):
         if not self.files:
             messagebox.showerror("Error", "No files selected")
             return
 
-        summary_data = {}
-        all_stats = []
-
-        for file in self.files:
-            sheets = pd.read_excel(file, sheet_name=None)
-            for sheet_name, df in sheets.items():
-                numeric_df = df.select_dtypes(include=[np.number])
-
-                # filter columns
-                selected_cols = [col for col, var in self.column_vars.items() if var.get()]
-                if selected_cols:
-                    numeric_df = numeric_df[selected_cols]
-
-                sheet_summary = {}
-                for col in numeric_df.columns:
-                    stats = {}
-                    data = numeric_df[col].dropna()
-
-                    if self.measure_vars["Mean"].get():
-                        stats["Mean"] = data.mean()
-                    if self.measure_vars["Median"].get():
-                        stats["Median"] = data.median()
-                    if self.measure_vars["Mode"].get():
-                        stats["Mode"] = data.mode().iloc[0] if not data.mode().empty else np.nan
-                    if self.measure_vars["Range"].get():
-                        stats["Range"] = data.max() - data.min()
-                    if self.measure_vars["Variance"].get():
-                        stats["Variance"] = data.var()
-                    if self.measure_vars["Standard Deviation"].get():
-                        stats["Standard Deviation"] = data.std()
-                    if self.measure_vars["Skewness"].get():
-                        stats["Skewness"] = skew(data)
-                    if self.measure_vars["Kurtosis"].get():
-                        stats["Kurtosis"] = kurtosis(data)
-                    if self.measure_vars["Max"].get():
-                        stats["Max"] = data.max()
-                    if self.measure_vars["Min"].get():
-                        stats["Min"] = data.min()
-                    if self.measure_vars["Coefficient of Variation"].get():
-                        stats["CV"] = data.std() / data.mean() if data.mean() != 0 else np.nan
-                    if self.measure_vars["Q1"].get():
-                        stats["Q1"] = data.quantile(0.25)
-                    if self.measure_vars["Q2"].get():
-                        stats["Q2"] = data.quantile(0.5)
-                    if self.measure_vars["Q3"].get():
-                        stats["Q3"] = data.quantile(0.75)
-                    if self.measure_vars["Quartile Deviation"].get():
-                        stats["QD"] = (data.quantile(0.75) - data.quantile(0.25)) / 2
-
-                    sheet_summary[col] = stats
-
-                    # Collect for master descriptive sheet
-                    stats_copy = stats.copy()
-                    stats_copy["File"] = os.path.basename(file)
-                    stats_copy["Sheet"] = sheet_name
-                    stats_copy["Column"] = col
-                    all_stats.append(stats_copy)
-
-                # correlation
-                if self.measure_vars["Correlation"].get() and not numeric_df.empty:
-                    sheet_summary["Correlation"] = numeric_df.corr()
-
-                summary_data[f"{os.path.basename(file)} - {sheet_name}"] = sheet_summary
-
-        self.summary = summary_data
-        self.master_descriptive = pd.DataFrame(all_stats)
-
-        # Update preview
-        for i in self.preview.get_children():
-            self.preview.delete(i)
-
-        for sheet, cols in summary_data.items():
-            for col, stats in cols.items():
-                if col == "Correlation":
-                    self.preview.insert("", "end", values=(f"{sheet} Correlation", "", "See Excel Output"))
-                else:
-                    for measure, value in stats.items():
-                        self.preview.insert("", "end", values=(col, measure, round(value, 4) if pd.notna(value) else "NA"))
+        if self.task is not None and not self.task.finished:
+            return
+
+        selected_cols = [col for col, var in self.column_vars.items() if var.get()]
+        selected_measures = [m for m in self.measures if self.measure_vars[m].get()]
+        window = None
+        if self.window_var.get().strip():
+            try:
+                window = parse_window(self.window_var.get(), self.window_kind_var.get(),
+                                      self.window_on_var.get() or None)
+            except ValueError as exc:
+                messagebox.showerror("Error", str(exc))
+                return
+
+        # Clear preview; results stream in sheet by sheet from the worker thread
+        self.preview.clear()
+        self.summary = None
+        self.grouped = None
+        self.windowed = None
+        self.summary_data = {}
+        self.all_stats = []
+        self.output_file = None
+        self.cancel_button.configure(state=NORMAL)
+        self.profiler = profiling.Profiler() if self.diagnostics_var.get() else None
+        if self.watch_var.get():
+            self.task = BackgroundTask(profiling.run_profiled, self.profiler, watch_events, self.files,
+                                       selected_measures, selected_cols, style="core",
+                                       mode_ties=self.ties_var.get(), save=self.save_watched).start()
+            self.task.attach(self.root, self.on_summary_event)
+            return
+        if self.service is not None and not self.cache_var.get() and not self.group_var.get() and window is None:
+            # Disk cache, Group By and windows run locally
+            self.task = BackgroundTask(profiling.run_profiled, self.profiler, self.service.summary_events,
+                                       self.files, selected_measures, selected_cols,
+                                       quantiles=self.quantile_backend(), mode_ties=self.ties_var.get(),
+                                       corr={"method": self.corr_var.get()}).start()
+            self.task.attach(self.root, self.on_summary_event)
+            return
+        self.task = BackgroundTask(profiling.run_profiled, self.profiler, summary_events, self.files,
+                                   selected_measures, selected_cols,
+                                   workers=self.workers_var.get(), quantiles=self.quantile_backend(),
+                                   mode_ties=self.ties_var.get(),
+                                   corr={"method": self.corr_var.get(), "workers": self.workers_var.get()},
+                                   cache={} if self.cache_var.get() else None,
+                                   group_by=[self.group_var.get()] if self.group_var.get() else None,
+                                   window=window).start()
+        self.task.attach(self.root, self.on_summary_event)
+
+    def quantile_backend(self):
+        label = self.quantiles_var.get()
+        return next(name for name, text in BACKEND_LABELS.items() if text == label)
+
+    def cancel_summary(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.status_label.configure(text="Cancelling...")
+
+    def on_summary_event(self, event):
+        kind = event[0]
+        if kind == "sheet":
+            _, file, sheet_name, sheet_summary = event
+            sheet = f"{os.path.basename(file)} - {sheet_name}"
+            self.summary_data[sheet] = sheet_summary
+            self.all_stats.extend(master_rows(file, sheet_name, sheet_summary))
+            with profiling.activate(self.profiler), profiling.stage("display", file=file, sheet=sheet_name):
+                self.show_sheet_summary(sheet, sheet_summary)
+        elif kind == "grouped":
+            self.grouped = event[1]
+        elif kind == "windowed":
+            self.windowed = event[1]
+        elif kind == "watching":
+            _, files, rows, new_rows = event
+            self.status_label.configure(text=f"Watching {files} files: {rows:,} rows (+{new_rows:,})")
+        elif kind == "refresh":
+            self.show_watched(event[1])
+        elif kind == "unsaved":
+            # Tried again on the next refresh
+            self.status_label.configure(text=f"Not saved: {event[1]}")
+        elif kind == "progress":
+            _, done, total, label = event
+            self.progress.configure(maximum=max(total, 1), value=done)
+            self.status_label.configure(text=f"{done}/{total} sheets {label}")
+        elif kind == "error":
+            messagebox.showerror("Error", str(event[1]))
+        elif kind == "done":
+            # Keep whatever finished, also when cancelled
+            self.summary = self.summary_data
+            self.master_descriptive = pd.DataFrame(self.all_stats)
+            self.cancel_button.configure(state=DISABLED)
+            if event[1]:
+                self.status_label.configure(text=f"Cancelled, {len(self.summary_data)} sheets kept")
+            self.refresh_diagnostics()
+
+    def show_sheet_summary(self, sheet, cols):
+        self.preview.append(core_rows(sheet, cols))
+
+    def show_watched(self, results):
+        self.summary_data, self.master_descriptive = summary_tables(results)
+        self.summary = self.summary_data
+        self.all_stats = self.master_descriptive.to_dict("records")
+        self.preview.clear()
+        with profiling.activate(self.profiler), profiling.stage("display", "watch refresh"):
+            for sheet, cols in self.summary_data.items():
+                self.show_sheet_summary(sheet, cols)
+
+    def save_watched(self, results):
+        # Called on the watch job's thread: the rewrite does not block the window
+        output_file = self.output_file
+        if output_file:
+            write_summary(*summary_tables(results), output_file)
 
     def save_output(self):
         if not self.summary:
             messagebox.showerror("Error", "No summary generated")
             return
 
+        # Excel gets every sheet; columnar formats get the Master_Descriptive table
         out_file = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                               filetypes=[("Excel files", "*.xlsx")])
+                                               filetypes=[("Excel files", "*.xlsx"), ("Parquet", "*.parquet"),
+                                                          ("Arrow IPC", "*.arrow"), ("CSV", "*.csv")])
         if not out_file:
             return
 
-        with pd.ExcelWriter(out_file) as writer:
-            for sheet, cols in self.summary.items():
-                dfs = []
-                for col, stats in cols.items():
-                    if col == "Correlation":
-                        stats.to_excel(writer, sheet_name=f"{sheet}_Correlation")
-                    else:
-                        df = pd.DataFrame(stats, index=[col])
-                        dfs.append(df)
-                if dfs:
-                    pd.concat(dfs).to_excel(writer, sheet_name=sheet)
-
-            # Add Master Descriptive Sheet
-            self.master_descriptive.to_excel(writer, sheet_name="Master_Descriptive", index=False)
-
+        try:
+            with profiling.activate(self.profiler):
+                write_summary(self.summary, self.master_descriptive, out_file, self.grouped, self.profiler,
+                              self.windowed)
+        except (ImportError, OSError, ValueError) as exc:
+            messagebox.showerror("Error", str(exc))
+            return
+        self.output_file = out_file
+        self.refresh_diagnostics()
         messagebox.showinfo("Success", f"Summary saved to {out_file}")
 
+    def show_diagnostics(self):
+        if self.profiler is None:
+            messagebox.showinfo("Diagnostics", "Tick \"Record diagnostics\" and generate a summary first.")
+            return
+        if self.diagnostics is None or not self.diagnostics.winfo_exists():
+            window = ttk.Toplevel(self.root)
+            window.title("Diagnostics")
+            window.geometry("1000x500")
+            model = ResultsModel(profiling.COLUMNS, formatters=profiling.FORMATTERS)
+            self.diagnostics = VirtualGrid(window, model, height=20, widths={"Detail": 300, "PID": 70})
+            self.diagnostics.pack(fill=BOTH, expand=True, padx=10, pady=10)
+        self.refresh_diagnostics()
+
+    def refresh_diagnostics(self):
+        if self.profiler is not None and self.diagnostics is not None and self.diagnostics.winfo_exists():
+            self.diagnostics.clear()
+            self.diagnostics.append(self.profiler.rows())
+
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # worker processes in frozen executables
     app = ttk.Window(themename="flatly")  # try "darkly", "cosmo" too
     ExcelSummaryApp(app)
     app.mainloop()
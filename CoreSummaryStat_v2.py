@@ -4,16 +4,23 @@
 # In[7]:
 
 
+import base64
+import functools
+import multiprocessing
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
-import pandas as pd
-import numpy as np
-from scipy import stats
-import matplotlib.pyplot as plt
-import seaborn as sns
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import os
 import ctypes
+from coresummarystat import metadata, pipeline, plots, profiling
+from coresummarystat.client import default_client
+from coresummarystat.export import profile_path, write_table
+from coresummarystat.gridview import VirtualGrid
+from coresummarystat.mode import TIES
+from coresummarystat.quantiles import BACKEND_LABELS
+from coresummarystat.readers import FILE_TYPES, is_table
+from coresummarystat.resultgrid import ResultsModel, grouped_rows, measures_rows, windowed_rows
+from coresummarystat.rolling import KINDS, parse_window
+from coresummarystat.store import LazySheets
+from coresummarystat.worker import BackgroundTask, call_job
 try:
     ctypes.windll.shcore.SetProcessDpiAwareness(1)  # Windows 8.1+ DPI awareness
 except:
@@ -27,17 +34,27 @@ class ExcelSummaryApp:
         self.filepath = None
         self.df_dict = None  # Store each sheet separately
         self.sheetnames = []
-
-        # Notebook with two tabs
+        self.task = None  # Background preview/save currently running
+        self.save_task = None  # Measures being computed for "Save Measures"
+        self.profiler = None  # Stage records of the last run, when diagnostics are on
+        self.measures_file = None  # Rewritten on every watch refresh once saved
+        # Shared summary service from CORESUMMARYSTAT_SERVICE, if any; it also answers the column pickers
+        self.service = default_client()
+        self.metadata = self.service or metadata
+
+        # Notebook with three tabs
         self.notebook = ttk.Notebook(root)
         self.measures_tab = ttk.Frame(self.notebook)
         self.plots_tab = ttk.Frame(self.notebook)
+        self.diagnostics_tab = ttk.Frame(self.notebook)
         self.notebook.add(self.measures_tab, text="Measures")
         self.notebook.add(self.plots_tab, text="Plots")
+        self.notebook.add(self.diagnostics_tab, text="Diagnostics")
         self.notebook.pack(fill="both", expand=True)
 
         self.setup_measures_tab()
         self.setup_plots_tab()
+        self.setup_diagnostics_tab()
 
     # ================== Measures Tab ===================
     def setup_measures_tab(self):
@@ -56,37 +73,48 @@ class ExcelSummaryApp:
         self.col_listbox_m.pack(fill="x")
 
         # Measures
-        self.measures = {
-            "Mean": np.mean,
-            "Median": np.median,
-            "Mode": lambda x: stats.mode(x, nan_policy="omit")[0][0] if len(x) > 0 else np.nan,
-            "Std Dev": np.std,
-            "Variance": np.var,
-            "Min": np.min,
-            "Max": np.max,
-            "Range": lambda x: np.max(x) - np.min(x),
-            "Q1": lambda x: np.percentile(x, 25),
-            "Q3": lambda x: np.percentile(x, 75),
-            "IQR": lambda x: np.percentile(x, 75) - np.percentile(x, 25),
-            "Quartile Deviation": lambda x: (np.percentile(x, 75) - np.percentile(x, 25)) / 2,
-            "Mean Absolute Deviation": lambda x: np.mean(np.abs(x - np.mean(x))),
-            "Coefficient of Variation": lambda x: (np.std(x) / np.mean(x)) * 100 if np.mean(x) != 0 else np.nan,
-        }
+        self.measures = list(pipeline.V2_MEASURES)
         self.measure_vars = {}
         for m in self.measures:
             var = tk.BooleanVar()
             ttk.Checkbutton(sidebar, text=m, variable=var).pack(anchor="w")
             self.measure_vars[m] = var
 
+        # Chunked reading for files larger than memory (quartiles and Mode approximate, no MAD)
+        self.stream_var = tk.BooleanVar()
+        ttk.Checkbutton(sidebar, text="Stream large files", variable=self.stream_var).pack(anchor="w", pady=5)
+        # Keep the preview (and the last saved file) up to date as rows are appended, until Cancel
+        self.watch_var = tk.BooleanVar()
+        ttk.Checkbutton(sidebar, text="Watch file", variable=self.watch_var).pack(anchor="w")
+
+        # Extra "All sheets" rows merged from per-sheet summary states
+        self.combine_var = tk.BooleanVar()
+        ttk.Checkbutton(sidebar, text="Combine sheets", variable=self.combine_var).pack(anchor="w")
+
+        # Optional key column: one row per group and column instead of per column
+        ttk.Label(sidebar, text="Group By").pack(pady=5)
+        self.group_combo = ttk.Combobox(sidebar, values=[""], state="readonly")
+        self.group_combo.pack(fill="x")
+        # Optional window: one row per window and column instead of per column
+        self.window_m = self.add_window_controls(sidebar)
+
+        ttk.Label(sidebar, text="Quantiles").pack(pady=5)
+        self.quantiles_combo = ttk.Combobox(sidebar, values=list(BACKEND_LABELS.values()), state="readonly")
+        self.quantiles_combo.set(BACKEND_LABELS["exact"])
+        self.quantiles_combo.pack(fill="x")
+
+        ttk.Label(sidebar, text="Mode Ties").pack(pady=5)
+        self.ties_combo = ttk.Combobox(sidebar, values=TIES, state="readonly")
+        self.ties_combo.set("smallest")
+        self.ties_combo.pack(fill="x")
+
         ttk.Button(sidebar, text="Preview Measures", command=self.preview_measures).pack(fill="x", pady=5)
         ttk.Button(sidebar, text="Save Measures (Excel)", command=self.save_measures).pack(fill="x", pady=5)
+        self.progress_m, self.cancel_m = self.add_progress(sidebar)
 
-        # Scrollable preview
-        self.measure_preview = tk.Text(self.measures_tab, wrap="word")
-        self.measure_preview.pack(side="right", fill="both", expand=True)
-        scroll_m = ttk.Scrollbar(self.measure_preview, command=self.measure_preview.yview)
-        self.measure_preview.config(yscrollcommand=scroll_m.set)
-        scroll_m.pack(side="right", fill="y")
+        # Virtual preview grid: only the visible rows are drawn
+        self.measure_preview = VirtualGrid(self.measures_tab, ResultsModel(), height=25)
+        self.measure_preview.pack(side="right", fill="both", expand=True, padx=5, pady=5)
 
     # ================== Plots Tab ===================
     def setup_plots_tab(self):
@@ -103,15 +131,18 @@ class ExcelSummaryApp:
         self.col_listbox_p.pack(fill="x")
 
         ttk.Label(sidebar, text="Select Plot Types").pack(pady=5)
-        self.plot_types = ["Histogram", "Boxplot", "Violinplot", "Density Plot", "Correlation Heatmap"]
+        self.plot_types = list(plots.PLOT_TYPES)
         self.plot_vars = {}
         for pt in self.plot_types:
             var = tk.BooleanVar()
             ttk.Checkbutton(sidebar, text=pt, variable=var).pack(anchor="w")
             self.plot_vars[pt] = var
+        # Windows of the "Window Lines" plots
+        self.window_p = self.add_window_controls(sidebar)
 
         ttk.Button(sidebar, text="Preview Plots", command=self.preview_plots).pack(fill="x", pady=5)
         ttk.Button(sidebar, text="Save Plots (PNG)", command=self.save_plots).pack(fill="x", pady=5)
+        self.progress_p, self.cancel_p = self.add_progress(sidebar)
 
         # Scrollable canvas for plot preview
         self.plot_canvas_frame = tk.Frame(self.plots_tab)
@@ -125,19 +156,101 @@ class ExcelSummaryApp:
         self.plot_canvas.create_window((0,0), window=self.plot_frame, anchor="nw")
         self.plot_frame.bind("<Configure>", lambda e: self.plot_canvas.configure(scrollregion=self.plot_canvas.bbox("all")))
 
+    # ================== Diagnostics Tab ===================
+    def setup_diagnostics_tab(self):
+        # Time and memory of every stage of the last preview or save
+        self.diagnostics_var = tk.BooleanVar()
+        ttk.Checkbutton(self.diagnostics_tab, text="Record diagnostics (saved measures get a _profile file)",
+                        variable=self.diagnostics_var).pack(anchor="w", padx=5, pady=5)
+        model = ResultsModel(profiling.COLUMNS, formatters=profiling.FORMATTERS)
+        self.diagnostics_grid = VirtualGrid(self.diagnostics_tab, model, height=25, widths={"Detail": 300, "PID": 70})
+        self.diagnostics_grid.pack(fill="both", expand=True, padx=5, pady=5)
+
+    def new_profiler(self):
+        self.profiler = profiling.Profiler() if self.diagnostics_var.get() else None
+        return self.profiler
+
+    def refresh_diagnostics(self):
+        self.diagnostics_grid.clear()
+        if self.profiler is not None:
+            self.diagnostics_grid.append(self.profiler.rows())
+
+    # ================== Background Tasks ===================
+    def add_progress(self, sidebar):
+        progress = ttk.Progressbar(sidebar, mode="determinate")
+        progress.pack(fill="x", pady=5)
+        cancel = ttk.Button(sidebar, text="Cancel", command=self.cancel_task, state="disabled")
+        cancel.pack(fill="x", pady=5)
+        return progress, cancel
+
+    def add_window_controls(self, sidebar):
+        # Size (rows, or a duration such as 1h with a timestamp column), timestamp column, kind, step
+        ttk.Label(sidebar, text="Window (rows or 1h, 7D...)").pack(pady=5)
+        size = ttk.Entry(sidebar)
+        size.pack(fill="x")
+        ttk.Label(sidebar, text="Window On").pack(pady=5)
+        on = ttk.Combobox(sidebar, values=[""], state="readonly")
+        on.pack(fill="x")
+        kind = ttk.Combobox(sidebar, values=KINDS, state="readonly")
+        kind.set(KINDS[0])
+        kind.pack(fill="x", pady=5)
+        ttk.Label(sidebar, text="Window Step").pack()
+        step = ttk.Spinbox(sidebar, from_=1, to=1_000_000)
+        step.set(1)
+        step.pack(fill="x")
+        return size, on, kind, step
+
+    def window_options(self, controls):
+        """``rolling.Window`` of a set of window controls, None when no size is given."""
+        size, on, kind, step = controls
+        if not size.get().strip():
+            return None
+        return parse_window(size.get(), kind.get(), on.get() or None, step.get() or 1)
+
+    def window_sheets(self, selected_cols, window):
+        # The selected columns of each sheet, and the timestamp column of a time window
+        if window is not None and window.on and window.on not in selected_cols:
+            return self.df_dict.select([window.on] + selected_cols)
+        return self.df_dict.select(selected_cols)
+
+    def cancel_task(self):
+        if self.task is not None:
+            self.task.cancel()
+
+    def run_task(self, job, args, handler, progress, cancel_button):
+        # Work runs on a thread; events come back through a queue polled by root.after
+        if self.task is not None and not self.task.finished:
+            messagebox.showinfo("Busy", "Please wait for the running task to finish or cancel it.")
+            return
+
+        def on_event(event):
+            if event[0] == "progress":
+                _, done, total, _ = event
+                progress.configure(maximum=max(total, 1), value=done)
+            elif event[0] == "error":
+                messagebox.showerror("Error", str(event[1]))
+            elif event[0] == "done":
+                cancel_button.configure(state="disabled")
+            handler(event)
+            if event[0] == "done":
+                self.refresh_diagnostics()
+
+        progress.configure(value=0)
+        cancel_button.configure(state="normal")
+        self.task = BackgroundTask(profiling.run_profiled, self.new_profiler(), job, *args).start()
+        self.task.attach(self.root, on_event)
+
     # ================== File Loading ===================
     def load_file(self):
-        self.filepath = filedialog.askopenfilename(filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv")])
+        self.filepath = filedialog.askopenfilename(filetypes=FILE_TYPES)
         if not self.filepath: return
 
-        if self.filepath.endswith(".csv"):
-            df = pd.read_csv(self.filepath)
-            self.df_dict = {"CSV": df}
-            self.sheetnames = ["CSV"]
+        if is_table(self.filepath):
+            self.sheetnames = self.ask_metadata("sheet_names", self.filepath)
+            self.df_dict = LazySheets(self.filepath, self.sheetnames)
         else:
-            xls = pd.ExcelFile(self.filepath)
-            self.sheetnames = ["Multiple Sheets"] + xls.sheet_names
-            self.df_dict = {}  # Will fill when sheets are selected
+            self.sheetnames = ["Multiple Sheets"] + self.ask_metadata("sheet_names", self.filepath)
+            self.df_dict = LazySheets(self.filepath)  # Will fill when sheets are selected
 
         # Update both sheet dropdowns
         self.sheet_combo_m["values"] = self.sheetnames
@@ -147,6 +260,19 @@ class ExcelSummaryApp:
         self.load_columns_measures()
         self.load_columns_plots()
 
+    def ask_metadata(self, name, *args):
+        # From the service when there is one; if it cannot be reached, this session works locally
+        if self.metadata is not metadata:
+            try:
+                return getattr(self.metadata, name)(*args)
+            except FileNotFoundError:
+                raise
+            except (OSError, ValueError) as exc:
+                messagebox.showwarning("Summary service", f"{exc}\n\nContinuing without the service.")
+                self.service = None
+                self.metadata = metadata
+        return getattr(metadata, name)(*args)
+
     # ============ Columns Loading ===================
     def load_columns_measures(self, event=None):
         self.col_listbox_m.delete(0, "end")
@@ -154,35 +280,35 @@ class ExcelSummaryApp:
         if sheet == "Multiple Sheets":
             self.ask_sheets_selection()
             # Show first selected sheet columns
-            first_sheet = self.df_dict[list(self.df_dict.keys())[0]]
-            for col in first_sheet.select_dtypes(include=[np.number]).columns:
-                self.col_listbox_m.insert("end", col)
+            sheet = list(self.df_dict)[0]
         else:
-            if sheet not in self.df_dict:
-                self.df_dict[sheet] = pd.read_excel(self.filepath, sheet_name=sheet)
-            df = self.df_dict[sheet]
-            for col in df.select_dtypes(include=[np.number]).columns:
-                self.col_listbox_m.insert("end", col)
+            self.df_dict.add(sheet)
+        # Header and a sample only; the sheet is parsed when measures are computed
+        info = self.ask_metadata("sheet_info", self.filepath, sheet)
+        for col in info.numeric_columns:
+            self.col_listbox_m.insert("end", col)
+        self.group_combo.configure(values=[""] + info.columns)
+        self.group_combo.set("")
+        self.window_m[1].configure(values=[""] + info.columns)
+        self.window_m[1].set("")
 
     def load_columns_plots(self, event=None):
         self.col_listbox_p.delete(0, "end")
         sheet = self.sheet_combo_p.get()
         if sheet == "Multiple Sheets":
             self.ask_sheets_selection()
-            first_sheet = self.df_dict[list(self.df_dict.keys())[0]]
-            for col in first_sheet.select_dtypes(include=[np.number]).columns:
-                self.col_listbox_p.insert("end", col)
+            sheet = list(self.df_dict)[0]
         else:
-            if sheet not in self.df_dict:
-                self.df_dict[sheet] = pd.read_excel(self.filepath, sheet_name=sheet)
-            df = self.df_dict[sheet]
-            for col in df.select_dtypes(include=[np.number]).columns:
-                self.col_listbox_p.insert("end", col)
+            self.df_dict.add(sheet)
+        info = self.ask_metadata("sheet_info", self.filepath, sheet)
+        for col in info.numeric_columns:
+            self.col_listbox_p.insert("end", col)
+        self.window_p[1].configure(values=[""] + info.columns)
+        self.window_p[1].set("")
 
     # ================== Multiple Sheets Selection ===================
     def ask_sheets_selection(self):
-        xls = pd.ExcelFile(self.filepath)
-        sheet_list = xls.sheet_names
+        sheet_list = self.ask_metadata("sheet_names", self.filepath)
 
         popup = tk.Toplevel(self.root)
         popup.title("Select Sheets")
@@ -216,7 +342,7 @@ class ExcelSummaryApp:
             if not selected_sheets:
                 messagebox.showerror("Error", "No sheets selected!")
                 return
-            self.df_dict = {s: pd.read_excel(self.filepath, sheet_name=s) for s in selected_sheets}
+            self.df_dict = LazySheets(self.filepath, selected_sheets)
             popup.destroy()
 
         ttk.Button(popup, text="OK", command=submit_selection).pack(pady=5)
@@ -225,30 +351,89 @@ class ExcelSummaryApp:
         self.root.wait_window(popup)
 
     # ================== Measures Preview/Save ===================
+    def quantile_backend(self):
+        label = self.quantiles_combo.get()
+        return next(name for name, text in BACKEND_LABELS.items() if text == label)
+
     def preview_measures(self):
         selected_cols = [self.col_listbox_m.get(i) for i in self.col_listbox_m.curselection()]
         selected_measures = [m for m, var in self.measure_vars.items() if var.get()]
-        self.measure_preview.delete(1.0, "end")
+        self.measure_preview.clear()
         if not selected_cols or not selected_measures:
-            self.measure_preview.insert("end", "No columns or measures selected.")
+            messagebox.showerror("Error", "No columns or measures selected.")
             return
 
-        for sheet, df in self.df_dict.items():
-            self.measure_preview.insert("end", f"\n--- Sheet: {sheet} ---\n")
-            for col in selected_cols:
-                if col not in df.columns:
-                    continue
-                data = df[col].dropna().values
-                if len(data) == 0:
-                    self.measure_preview.insert("end", f"Column: {col} - No numeric data.\n")
-                    continue
-                self.measure_preview.insert("end", f"\nColumn: {col}\n")
-                for m in selected_measures:
-                    try:
-                        val = self.measures[m](data)
-                        self.measure_preview.insert("end", f"  {m}: {val:.4f}\n")
-                    except:
-                        self.measure_preview.insert("end", f"  {m}: Error\n")
+        keys = [self.group_combo.get()] if self.group_combo.get() else []
+        try:
+            window = self.window_options(self.window_m)
+        except ValueError as exc:
+            messagebox.showerror("Error", str(exc))
+            return
+        if (keys or window) and (self.stream_var.get() or self.watch_var.get()):
+            messagebox.showerror("Error", "Group By and windows need whole sheets; turn off streaming and watching.")
+            return
+        if keys and window:
+            messagebox.showerror("Error", "Choose either Group By or a window.")
+            return
+        self.measures_file = None
+        if self.watch_var.get():
+            # The saved file is rewritten on the job's thread after every refresh
+            job = functools.partial(pipeline.watch_events,
+                                    save=lambda results: self.save_watched(selected_measures, results))
+            args = ([self.filepath], selected_measures, selected_cols, list(self.df_dict), "v2", self.ties_combo.get())
+        elif keys:
+            sheets = self.df_dict.select(keys + selected_cols)
+            job, args = pipeline.grouped_events, (sheets, keys, selected_cols, selected_measures,
+                                                  self.ties_combo.get())
+        elif window:
+            sheets = self.window_sheets(selected_cols, window)
+            job, args = pipeline.window_events, (sheets, window, selected_cols, selected_measures,
+                                                 self.ties_combo.get())
+        elif self.stream_var.get():
+            job, args = pipeline.stream_measures_events, (self.filepath, list(self.df_dict), selected_cols,
+                                                          selected_measures, self.ties_combo.get())
+        elif self.service is not None and not self.combine_var.get():
+            job, args = self.service.measures_events, (self.filepath, list(self.df_dict), selected_cols,
+                                                       selected_measures, self.quantile_backend(),
+                                                       self.ties_combo.get())
+        else:
+            # Only the selected columns are read from each sheet
+            sheets = self.df_dict.select(selected_cols)
+            job, args = pipeline.measures_events, (sheets, selected_cols, selected_measures,
+                                                   self.quantile_backend(), self.ties_combo.get(),
+                                                   self.combine_var.get())
+        self.run_task(job, args, lambda event: self.on_measures_event(selected_measures, keys, event),
+                      self.progress_m, self.cancel_m)
+
+    def on_measures_event(self, selected_measures, keys, event):
+        if event[0] == "sheet":
+            _, sheet, present, empty, results = event
+            with profiling.activate(self.profiler), profiling.stage("display", sheet=sheet):
+                self.measure_preview.append(measures_rows(sheet, present, empty, results, selected_measures))
+        elif event[0] == "grouped":
+            _, sheet, table = event
+            with profiling.activate(self.profiler), profiling.stage("display", sheet=sheet):
+                self.measure_preview.append(grouped_rows(sheet, table, keys, selected_measures))
+        elif event[0] == "windowed":
+            _, sheet, table = event
+            with profiling.activate(self.profiler), profiling.stage("display", sheet=sheet):
+                self.measure_preview.append(windowed_rows(sheet, table, selected_measures))
+        elif event[0] == "refresh":
+            self.show_watched(selected_measures, event[1])
+        elif event[0] == "done" and event[1] and not self.watch_var.get():
+            messagebox.showinfo("Cancelled", "Preview cancelled; sheets finished so far are shown.")
+
+    def show_watched(self, selected_measures, results):
+        self.measure_preview.clear()
+        with profiling.activate(self.profiler), profiling.stage("display", "watch refresh"):
+            for _, sheet, sheet_results in results:
+                self.measure_preview.append(measures_rows(sheet, list(sheet_results), set(), sheet_results,
+                                                          selected_measures))
+
+    def save_watched(self, selected_measures, results):
+        measures_file = self.measures_file
+        if measures_file:
+            write_table(pipeline.watched_measures_table(results, selected_measures), measures_file)
 
     def save_measures(self):
         selected_cols = [self.col_listbox_m.get(i) for i in self.col_listbox_m.curselection()]
@@ -257,26 +442,61 @@ class ExcelSummaryApp:
             messagebox.showerror("Error", "No columns or measures selected.")
             return
 
-        results = []
-        for sheet, df in self.df_dict.items():
-            for col in selected_cols:
-                if col not in df.columns:
-                    continue
-                data = df[col].dropna().values
-                row = {"Sheet": sheet, "Column": col}
-                for m in selected_measures:
-                    try:
-                        row[m] = self.measures[m](data)
-                    except:
-                        row[m] = np.nan
-                results.append(row)
-
-        out_df = pd.DataFrame(results)
-        save_path = filedialog.asksaveasfilename(defaultextension=".xlsx",
-                                                 filetypes=[("Excel files","*.xlsx")])
-        if save_path:
-            out_df.to_excel(save_path, index=False)
+        keys = [self.group_combo.get()] if self.group_combo.get() else []
+        try:
+            window = self.window_options(self.window_m)
+        except ValueError as exc:
+            messagebox.showerror("Error", str(exc))
+            return
+        if self.save_task is not None and not self.save_task.finished:
+            messagebox.showinfo("Busy", "Please wait for the measures being saved.")
+            return
+        # Computed off the Tk thread (alongside a running watch, if any); the path is asked once done
+        compute = self.measures_output(selected_cols, selected_measures, keys, window)
+        watching = self.task is not None and not self.task.finished and self.watch_var.get()
+        profiler = self.new_profiler()
+        self.save_task = BackgroundTask(profiling.run_profiled, profiler, call_job, compute).start()
+        self.save_task.attach(self.root, lambda event: self.on_save_measures_event(profiler, watching, event))
+
+    def on_save_measures_event(self, profiler, watching, event):
+        if event[0] == "result":
+            save_path = filedialog.asksaveasfilename(defaultextension=".xlsx",
+                                                     filetypes=[("Excel files","*.xlsx"), ("Parquet", "*.parquet"),
+                                                                ("Arrow IPC", "*.arrow"), ("CSV", "*.csv")])
+            if not save_path:
+                return
+            try:
+                with profiling.activate(profiler):
+                    write_table(event[1], save_path)
+                if profiler is not None:
+                    write_table(profiler.table(), profile_path(save_path))
+            except (ImportError, OSError, ValueError) as exc:
+                messagebox.showerror("Error", str(exc))
+                return
+            self.measures_file = save_path if watching else None
             messagebox.showinfo("Saved", f"Measures saved to {save_path}")
+        elif event[0] == "error":
+            messagebox.showerror("Error", str(event[1]))
+        elif event[0] == "done":
+            self.refresh_diagnostics()
+
+    def measures_output(self, selected_cols, selected_measures, keys, window=None):
+        """Function computing the measures table to save, with the options set now."""
+        ties = self.ties_combo.get()
+        if keys:
+            return functools.partial(pipeline.grouped_measures_table, self.df_dict.select(keys + selected_cols), keys,
+                                     selected_cols, selected_measures, ties)
+        if window:
+            return functools.partial(pipeline.windowed_measures_table, self.window_sheets(selected_cols, window),
+                                     window, selected_cols, selected_measures, ties)
+        if self.stream_var.get() or self.watch_var.get():
+            return functools.partial(pipeline.measures_for_files, [self.filepath], selected_measures, selected_cols,
+                                     sheets=list(self.df_dict), stream={}, mode_ties=ties)
+        if self.service is not None and not self.combine_var.get():
+            return functools.partial(self.service.measures_table, self.filepath, list(self.df_dict), selected_cols,
+                                     selected_measures, self.quantile_backend(), ties)
+        return functools.partial(pipeline.measures_table, self.df_dict.select(selected_cols), selected_cols,
+                                 selected_measures, self.quantile_backend(), ties, self.combine_var.get())
 
     # ================== Plots Preview/Save ===================
     def preview_plots(self):
@@ -287,60 +507,40 @@ class ExcelSummaryApp:
         if len(selected_cols) == 0 or len(selected_plots) == 0:
             messagebox.showerror("Error", "No columns or plots selected.")
             return
+        window = self.plot_window(selected_plots)
+        if window is False:
+            return
 
-        pastel_colors = sns.color_palette("pastel")
-
-        for sheet, df in self.df_dict.items():
-            for pt in selected_plots:
-                if pt in ["Boxplot", "Violinplot"]:
-                    for i, col in enumerate(selected_cols):
-                        if col not in df.columns:
-                            continue
-                        data = df[col].dropna()
-                        if len(data) == 0:
-                            continue
-                        fig, ax = plt.subplots(figsize=(6,4))
-                        color = pastel_colors[i % len(pastel_colors)]
-                        if pt == "Boxplot":
-                            sns.boxplot(y=data, color=color, ax=ax)
-                        else:
-                            sns.violinplot(y=data, color=color, ax=ax)
-                        ax.set_title(f"{pt} – {col} (Sheet: {sheet})")
-                        canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-                        canvas.draw()
-                        canvas.get_tk_widget().pack(fill="both", expand=True, pady=10)
-                        plt.close(fig)
-                elif pt in ["Histogram", "Density Plot"]:
-                    fig, ax = plt.subplots(figsize=(6, max(4, len(selected_cols)*0.6)))
-                    for i, col in enumerate(selected_cols):
-                        if col not in df.columns:
-                            continue
-                        data = df[col].dropna()
-                        if len(data) == 0:
-                            continue
-                        color = pastel_colors[i % len(pastel_colors)]
-                        if pt == "Histogram":
-                            sns.histplot(data, bins=20, alpha=0.7, color=color, label=col, ax=ax)
-                        else:
-                            sns.kdeplot(data, fill=True, alpha=0.5, color=color, label=col, ax=ax)
-                    ax.set_title(f"{pt} – Sheet: {sheet}")
-                    ax.legend()
-                    canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-                    canvas.draw()
-                    canvas.get_tk_widget().pack(fill="both", expand=True, pady=10)
-                    plt.close(fig)
-                elif pt == "Correlation Heatmap":
-                    if len(selected_cols) < 2:
-                        continue
-                    fig, ax = plt.subplots(figsize=(6, max(4, len(selected_cols)*0.6)))
-                    corr = df[selected_cols].corr()
-                    mask = np.triu(np.ones_like(corr, dtype=bool))
-                    sns.heatmap(corr, mask=mask, cmap="RdYlGn", annot=True, fmt=".2f", ax=ax)
-                    ax.set_title(f"Correlation Heatmap – Sheet: {sheet}")
-                    canvas = FigureCanvasTkAgg(fig, master=self.plot_frame)
-                    canvas.draw()
-                    canvas.get_tk_widget().pack(fill="both", expand=True, pady=10)
-                    plt.close(fig)
+        # Rendered in worker processes; images are cached for the next preview and for Save
+        if self.service is not None and window is None:
+            # Window Lines are drawn locally
+            job, args = self.service.image_events, (self.filepath, list(self.df_dict), selected_cols, selected_plots)
+        else:
+            job, args = plots.image_events, (self.window_sheets(selected_cols, window), selected_cols, selected_plots,
+                                             0, None, window)
+        self.run_task(job, args, self.on_plot_event, self.progress_p, self.cancel_p)
+
+    def plot_window(self, selected_plots):
+        """Window of the "Window Lines" plots: None when not selected, False after an error."""
+        if "Window Lines" not in selected_plots:
+            return None
+        try:
+            window = self.window_options(self.window_p)
+        except ValueError as exc:
+            messagebox.showerror("Error", str(exc))
+            return False
+        if window is None:
+            messagebox.showerror("Error", "Window Lines need a window size.")
+            return False
+        return window
+
+    def on_plot_event(self, event):
+        if event[0] == "image":
+            with profiling.activate(self.profiler), profiling.stage("display", sheet=event[1]):
+                image = tk.PhotoImage(data=base64.b64encode(event[-1]))
+                label = tk.Label(self.plot_frame, image=image)
+                label.image = image  # keep a reference, Tk does not
+                label.pack(fill="both", expand=True, pady=10)
 
     def save_plots(self):
         selected_cols = [self.col_listbox_p.get(i) for i in self.col_listbox_p.curselection()]
@@ -348,67 +548,34 @@ class ExcelSummaryApp:
         if len(selected_cols) == 0 or len(selected_plots) == 0:
             messagebox.showerror("Error", "No columns or plots selected.")
             return
+        window = self.plot_window(selected_plots)
+        if window is False:
+            return
 
         folder_path = filedialog.askdirectory()
         if not folder_path:
             return
 
-        pastel_colors = sns.color_palette("pastel")
-
-        for sheet, df in self.df_dict.items():
-            for pt in selected_plots:
-                if pt in ["Boxplot", "Violinplot"]:
-                    for i, col in enumerate(selected_cols):
-                        if col not in df.columns:
-                            continue
-                        data = df[col].dropna()
-                        if len(data) == 0:
-                            continue
-                        fig, ax = plt.subplots(figsize=(6,4))
-                        color = pastel_colors[i % len(pastel_colors)]
-                        if pt == "Boxplot":
-                            sns.boxplot(y=data, color=color, ax=ax)
-                        else:
-                            sns.violinplot(y=data, color=color, ax=ax)
-                        ax.set_title(f"{pt} – {col} (Sheet: {sheet})")
-                        filename = f"{pt}_{col}_{sheet}.png"
-                        fig.savefig(os.path.join(folder_path, filename))
-                        plt.close(fig)
-                elif pt in ["Histogram", "Density Plot"]:
-                    fig, ax = plt.subplots(figsize=(6, max(4, len(selected_cols)*0.6)))
-                    for i, col in enumerate(selected_cols):
-                        if col not in df.columns:
-                            continue
-                        data = df[col].dropna()
-                        if len(data) == 0:
-                            continue
-                        color = pastel_colors[i % len(pastel_colors)]
-                        if pt == "Histogram":
-                            sns.histplot(data, bins=20, alpha=0.7, color=color, label=col, ax=ax)
-                        else:
-                            sns.kdeplot(data, fill=True, alpha=0.5, color=color, label=col, ax=ax)
-                    ax.set_title(f"{pt} – Sheet: {sheet}")
-                    ax.legend()
-                    filename = f"{pt}_{sheet}.png"
-                    fig.savefig(os.path.join(folder_path, filename))
-                    plt.close(fig)
-                elif pt == "Correlation Heatmap":
-                    if len(selected_cols) < 2:
-                        continue
-                    fig, ax = plt.subplots(figsize=(6, max(4, len(selected_cols)*0.6)))
-                    corr = df[selected_cols].corr()
-                    mask = np.triu(np.ones_like(corr, dtype=bool))
-                    sns.heatmap(corr, mask=mask, cmap="RdYlGn", annot=True, fmt=".2f", ax=ax)
-                    ax.set_title(f"Correlation Heatmap – Sheet: {sheet}")
-                    filename = f"Correlation_Heatmap_{sheet}.png"
-                    fig.savefig(os.path.join(folder_path, filename))
-                    plt.close(fig)
-
-        messagebox.showinfo("Saved", f"All plots saved as PNGs in {folder_path}")
+        if self.service is not None and window is None:
+            job, args = self.service.save_events, (self.filepath, list(self.df_dict), selected_cols, selected_plots,
+                                                   folder_path)
+        else:
+            job, args = plots.save_events, (self.window_sheets(selected_cols, window), selected_cols, selected_plots,
+                                            folder_path, 0, None, window)
+        self.run_task(job, args, lambda event: self.on_save_plots_event(folder_path, event),
+                      self.progress_p, self.cancel_p)
+
+    def on_save_plots_event(self, folder_path, event):
+        if event[0] == "done":
+            if event[1]:
+                messagebox.showinfo("Cancelled", f"Saving cancelled; plots written so far are in {folder_path}")
+            else:
+                messagebox.showinfo("Saved", f"All plots saved as PNGs in {folder_path}")
 
 
 # Run the app
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # worker processes in frozen executables
     root = tk.Tk()
     app = ExcelSummaryApp(root)
     root.mainloop()
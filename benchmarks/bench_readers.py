@@ -0,0 +1,121 @@
+"""Compare the input readers on data/sample_data.csv scaled up.
+
+The sample is tiled to ``--rows`` rows and widened to ``--copies`` times
+its columns (with a little noise so the values are not all repeats),
+written once per format into a temporary folder, then read back with
+every engine available here, both in full and projected to one column::
+
+    python benchmarks/bench_readers.py --rows 1000000
+    python benchmarks/bench_readers.py --rows 200000 --excel-rows 50000 --repeat 5
+
+Engines that are not installed (python-calamine, pyarrow) are listed as
+skipped.  Excel files are smaller by default because writing them is slow.
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from coresummarystat import readers  # noqa: E402
+from coresummarystat.export import XlsxStreamWriter  # noqa: E402
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "sample_data.csv")
+
+
+def scaled_sample(rows, copies, seed=0):
+    """``data/sample_data.csv`` tiled to ``rows`` rows and ``copies`` times as many columns."""
+    base = pd.read_csv(SAMPLE)
+    rng = np.random.default_rng(seed)
+    reps = -(-rows // len(base))
+    columns = {}
+    for copy in range(copies):
+        for col in base.columns:
+            values = np.tile(base[col].to_numpy(dtype=np.float64), reps)[:rows]
+            columns[f"{col.strip()}_{copy}"] = values + rng.normal(0, 1, rows).round(2)
+    return pd.DataFrame(columns)
+
+
+def write_inputs(df, excel_df, folder):
+    """Write the sample in every format that can be written here; returns ``{format: path}``."""
+    paths = {"csv": os.path.join(folder, "sample.csv")}
+    df.to_csv(paths["csv"], index=False)
+    paths["xlsx"] = os.path.join(folder, "sample.xlsx")
+    with XlsxStreamWriter(paths["xlsx"]) as writer:
+        writer.add_frame("Data", excel_df)
+    if readers.has_module("pyarrow"):
+        paths["parquet"] = os.path.join(folder, "sample.parquet")
+        df.to_parquet(paths["parquet"], index=False)
+        paths["arrow"] = os.path.join(folder, "sample.arrow")
+        df.to_feather(paths["arrow"])
+    return paths
+
+
+def cases(paths):
+    """``(format, engine, reader)`` where ``reader(columns)`` reads the file once."""
+    yield "csv", "c", lambda cols: readers.read_csv(paths["csv"], cols, engine="c")
+    yield "csv", "python", lambda cols: readers.read_csv(paths["csv"], cols, engine="python")
+    if readers.has_module("pyarrow"):
+        yield "csv", "pyarrow", lambda cols: readers.read_csv(paths["csv"], cols, engine="pyarrow")
+    else:
+        yield "csv", "pyarrow", None
+
+    def excel(engine):
+        def read(cols):
+            with readers.open_workbook(paths["xlsx"], engine) as book:
+                return readers.read_excel_sheet(book, "Data", cols)
+        return read
+
+    yield "xlsx", "openpyxl", excel("openpyxl")
+    yield "xlsx", "calamine", excel("calamine") if readers.has_module("python_calamine") else None
+
+    for fmt in ["parquet", "arrow"]:
+        if fmt in paths:
+            yield fmt, "pyarrow", lambda cols, path=paths[fmt]: readers.read_arrow(path, cols)
+        else:
+            yield fmt, "pyarrow", None
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=500_000, help="Rows of the CSV/Parquet/Arrow files")
+    parser.add_argument("--excel-rows", type=int, default=50_000, help="Rows of the .xlsx file")
+    parser.add_argument("--copies", type=int, default=4, help="Copies of the sample's columns")
+    parser.add_argument("--repeat", type=int, default=3, help="Reads per case; the best time is shown")
+    args = parser.parse_args(argv)
+
+    df = scaled_sample(args.rows, args.copies)
+    projected = [df.columns[0]]
+    print(f"{args.rows:,} rows ({args.excel_rows:,} for xlsx) x {df.shape[1]} columns; "
+          f"projection: {projected[0]!r}")
+    print(f"auto-selected engines: {readers.engines()}")
+    print(f"{'format':<8} {'engine':<10} {'all columns':>12} {'one column':>12}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        paths = write_inputs(df, df.head(args.excel_rows), folder)
+        for fmt, engine, read in cases(paths):
+            if read is None:
+                print(f"{fmt:<8} {engine:<10} {'skipped (not installed)':>25}")
+                continue
+            full = best_time(lambda: read(None), args.repeat)
+            one = best_time(lambda: read(projected), args.repeat)
+            print(f"{fmt:<8} {engine:<10} {full:>11.3f}s {one:>11.3f}s")
+
+
+if __name__ == "__main__":
+    main()
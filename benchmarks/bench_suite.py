@@ -0,0 +1,207 @@
+"""Time every stage of a summary on synthetic data, against a saved baseline.
+
+Files from ``generate.py`` are written once into a temporary folder, then
+each case is run ``--repeat`` times and its best time kept:
+
+- ``ingest/<format>``: reading every file with an empty ``SheetStore``;
+- ``summary/<format>``: ``summarize_files`` with every measure, end to end;
+- ``summary-workers/<format>``: the same with ``--workers`` worker
+  processes and an empty sheet store (workbooks are still opened here,
+  to list their sheets, before the workers are forked);
+- ``measure/<name>``: ``engine.summarize_block`` for one measure on one
+  sheet (``measure/all`` for all of them in one pass);
+- ``groupby``: ``groupby.group_summary`` with every measure, grouped by
+  a "ties" column;
+- ``rolling/<kind>``: ``rolling.window_summary`` of one sheet over
+  windows of ``--window-rows`` rows with every measure sliding windows
+  compute (every measure for tumbling ones);
+- ``correlation/<method>``: ``corr_frame`` of one sheet (Kendall on its
+  first ``--kendall-rows`` rows);
+- ``export/<format>``: ``export.write_summary`` of the summary;
+- ``plot/<type>``: rendering every plot of one type for ``--plot-columns``
+  columns of one sheet, without the plot cache.
+
+``--save`` writes the timings and settings to a JSON file; ``--baseline``
+compares against such a file and lists the cases that got slower than
+``--threshold`` (exit status 1 if any did)::
+
+    python benchmarks/bench_suite.py --save baseline.json
+    python benchmarks/bench_suite.py --baseline baseline.json
+    python benchmarks/bench_suite.py --only measure/ plot/ --rows 1000000
+
+Timings depend on the machine: compare runs made on the same one.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from coresummarystat import plots  # noqa: E402
+from coresummarystat.correlation import METHODS, corr_frame  # noqa: E402
+from coresummarystat.engine import MEASURES, summarize_block  # noqa: E402
+from coresummarystat.export import write_summary  # noqa: E402
+from coresummarystat.groupby import group_summary  # noqa: E402
+from coresummarystat.pipeline import summarize_files  # noqa: E402
+from coresummarystat.prepare import numeric_block  # noqa: E402
+from coresummarystat.rolling import KINDS, SLIDING_MEASURES, parse_window, window_summary  # noqa: E402
+from coresummarystat.store import SHEET_STORE, SheetStore  # noqa: E402
+from generate import FORMATS, sheet_name, synthetic_frame, write_files  # noqa: E402
+
+# Slowdowns shorter than this are noise, whatever the ratio
+MIN_SECONDS = 0.005
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _read_all(paths):
+    store = SheetStore()
+    for path in paths:
+        store.get_sheets(path)
+
+
+def _summarize_in_workers(paths, workers):
+    # Forked workers would inherit the sheets parsed by earlier cases
+    SHEET_STORE.clear()
+    summarize_files(paths, MEASURES, workers=workers)
+
+
+def _render_all(df, columns, plot_type, window=None):
+    for spec in plots.sheet_specs(sheet_name(0), df, columns, [plot_type], window):
+        plots.render_png(spec, plots.spec_data(spec, df))
+
+
+def cases(args, folder):
+    """``(name, func)`` of every case; data is prepared as the generator is consumed."""
+    paths = write_files(folder, args.rows, args.columns, args.sheets, args.files, FORMATS,
+                        args.nan, args.seed, args.excel_rows)
+    for fmt in FORMATS:
+        yield f"ingest/{fmt}", lambda fmt=fmt: _read_all(paths[fmt])
+    for fmt in FORMATS:
+        yield f"summary/{fmt}", lambda fmt=fmt: summarize_files(paths[fmt], MEASURES)
+    for fmt in FORMATS:
+        yield f"summary-workers/{fmt}", lambda fmt=fmt: _summarize_in_workers(paths[fmt], args.workers)
+
+    df = synthetic_frame(args.rows, args.columns, args.nan, args.seed)
+    _, _, block = numeric_block(df)
+    for measure in MEASURES:
+        yield f"measure/{measure}", lambda m=measure: summarize_block(block, [m])
+    yield "measure/all", lambda: summarize_block(block, MEASURES)
+
+    # Column 6 is the first "ties" column: a few dozen groups
+    key = df.columns[min(6, args.columns - 1)]
+    yield "groupby", lambda: group_summary(df, [key], MEASURES)
+
+    for kind in KINDS:
+        window = parse_window(args.window_rows, kind)
+        measures = [m for m in MEASURES if kind == "tumbling" or m in SLIDING_MEASURES]
+        yield f"rolling/{kind}", lambda w=window, ms=measures: window_summary(df, ms, w)
+
+    for method in METHODS:
+        data = df.head(args.kendall_rows) if method == "kendall" else df
+        yield f"correlation/{method}", lambda m=method, data=data: corr_frame(data, m)
+
+    summary, master = summarize_files(paths["csv"], MEASURES)
+    for fmt in FORMATS:
+        path = os.path.join(folder, f"summary.{fmt}")
+        yield f"export/{fmt}", lambda path=path: write_summary(summary, master, path)
+
+    plot_columns = list(df.columns[:args.plot_columns])
+    window = parse_window(args.window_rows)
+    for plot_type in plots.PLOT_TYPES:
+        yield f"plot/{plot_type}", lambda pt=plot_type: _render_all(df, plot_columns, pt, window)
+
+
+def settings(args):
+    """What a baseline was measured on."""
+    return {
+        "rows": args.rows, "columns": args.columns, "sheets": args.sheets, "files": args.files,
+        "excel_rows": args.excel_rows, "nan": args.nan, "seed": args.seed,
+        "kendall_rows": args.kendall_rows, "plot_columns": args.plot_columns, "window_rows": args.window_rows,
+        "workers": args.workers,
+        "python": platform.python_version(), "machine": platform.node(),
+    }
+
+
+def compare(seconds, before, threshold):
+    """``(ratio, slower)`` of a time against its baseline (``before``, None if there is none)."""
+    if not before:
+        return None, False
+    ratio = seconds / before
+    return ratio, ratio > 1 + threshold and seconds - before > MIN_SECONDS
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows per sheet")
+    parser.add_argument("--columns", type=int, default=12, help="Columns per sheet")
+    parser.add_argument("--sheets", type=int, default=2, help="Sheets per file")
+    parser.add_argument("--files", type=int, default=2, help="Number of files")
+    parser.add_argument("--excel-rows", type=int, default=20_000, help="Rows of the .xlsx sheets")
+    parser.add_argument("--nan", type=float, default=0.02, help="Fraction of missing values")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--kendall-rows", type=int, default=20_000, help="Rows used for Kendall correlation")
+    parser.add_argument("--plot-columns", type=int, default=3, help="Columns plotted")
+    parser.add_argument("--window-rows", type=int, default=1_000, help="Rows per window of the rolling cases")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes of the summary-workers cases")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best time is kept")
+    parser.add_argument("--only", nargs="+", metavar="PREFIX", help="Run only cases starting with these")
+    parser.add_argument("--save", metavar="JSON", help="Write the timings to this file")
+    parser.add_argument("--baseline", metavar="JSON", help="Compare with timings saved by --save")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Relative slowdown reported as a regression (default 0.25)")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as fh:
+            saved = json.load(fh)
+        baseline = saved["results"]
+        current = settings(args)
+        changed = [f"{k} {v} -> {current.get(k)}" for k, v in saved["settings"].items() if current.get(k) != v]
+        if changed:
+            print("baseline settings differ: " + ", ".join(changed))
+
+    print(f"{args.rows:,} rows ({args.excel_rows:,} for xlsx) x {args.columns} columns x "
+          f"{args.sheets} sheets x {args.files} files")
+    print(f"{'case':<36} {'time':>9} {'baseline':>9} {'ratio':>7}")
+    results = {}
+    regressions = []
+    with tempfile.TemporaryDirectory() as folder:
+        for case, func in cases(args, folder):
+            if args.only and not case.startswith(tuple(args.only)):
+                continue
+            seconds = results[case] = best_time(func, args.repeat)
+            before = baseline.get(case)
+            ratio, slower = compare(seconds, before, args.threshold)
+            if slower:
+                regressions.append(case)
+            print(f"{case:<36} {seconds:>8.4f}s "
+                  + (f"{before:>8.4f}s {ratio:>6.2f}x" if ratio is not None else f"{'-':>9} {'-':>7}")
+                  + ("  SLOWER" if slower else ""), flush=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as fh:
+            json.dump({"settings": settings(args), "results": results}, fh, indent=2)
+        print(f"saved {len(results)} timings to {args.save}")
+    if args.baseline:
+        print(f"{len(regressions)} regression(s) over {args.threshold:.0%}" + (": " + ", ".join(regressions) if regressions else ""))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Synthetic workbooks shaped like data/sample_data.csv, at any size.
+
+The sample's columns (Area, Production, Yield) are repeated to
+``--columns`` columns, each copy drawn one of three ways so the engine
+meets the cases that matter for speed and correctness:
+
+- "noisy": the sample tiled to ``--rows`` rows plus normal noise;
+- "skewed": lognormal values with the sample column's mean;
+- "ties": whole numbers drawn from the sample column, so nearly every
+  value repeats (Mode, ranks and quantiles all see ties).
+
+A ``--nan`` fraction of every column is missing.  Each of ``--files``
+files gets ``--sheets`` sheets: one .xlsx workbook per file, and one
+.csv per sheet (CSV files hold a single sheet)::
+
+    python benchmarks/generate.py out --rows 100000 --columns 12 --sheets 3 --files 2
+    python benchmarks/generate.py out --rows 1000000 --format csv
+
+The same arguments and ``--seed`` always give the same data.
+"""
+
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from coresummarystat.export import XlsxStreamWriter  # noqa: E402
+
+SAMPLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "data", "sample_data.csv")
+KINDS = ["noisy", "skewed", "ties"]
+FORMATS = ["csv", "xlsx"]
+
+
+def _column(kind, base, rows, rng):
+    if kind == "noisy":
+        values = np.tile(base, -(-rows // len(base)))[:rows]
+        return values + rng.normal(0, 1, rows).round(2)
+    if kind == "skewed":
+        # Mean of a lognormal(mu, sigma) is exp(mu + sigma**2 / 2)
+        sigma = 1.0
+        mu = np.log(max(base.mean(), 1.0)) - sigma ** 2 / 2
+        return rng.lognormal(mu, sigma, rows).round(3)
+    return rng.choice(base, rows)
+
+
+def synthetic_frame(rows, columns, nan=0.02, seed=0):
+    """One sheet of ``rows`` x ``columns`` float64 values (see the module docstring)."""
+    sample = pd.read_csv(SAMPLE)
+    rng = np.random.default_rng(seed)
+    data = {}
+    for i in range(columns):
+        name = sample.columns[i % len(sample.columns)]
+        kind = KINDS[i // len(sample.columns) % len(KINDS)]
+        values = _column(kind, sample[name].to_numpy(dtype=np.float64), rows, rng)
+        if nan:
+            values[rng.random(rows) < nan] = np.nan
+        data[f"{name.strip()}_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def sheet_name(index):
+    return f"Sheet{index + 1}"
+
+
+def write_files(folder, rows, columns, sheets=1, files=1, formats=FORMATS, nan=0.02, seed=0, excel_rows=None):
+    """Write the synthetic files into ``folder``; returns ``{format: [paths]}``.
+
+    ``excel_rows`` caps the rows of the .xlsx sheets (writing them is slow).
+    """
+    os.makedirs(folder, exist_ok=True)
+    paths = {fmt: [] for fmt in formats}
+    for f in range(files):
+        frames = [synthetic_frame(rows, columns, nan, seed + f * sheets + s) for s in range(sheets)]
+        if "csv" in formats:
+            for s, df in enumerate(frames):
+                path = os.path.join(folder, f"data{f + 1}_{sheet_name(s)}.csv")
+                df.to_csv(path, index=False)
+                paths["csv"].append(path)
+        if "xlsx" in formats:
+            path = os.path.join(folder, f"data{f + 1}.xlsx")
+            with XlsxStreamWriter(path) as writer:
+                for s, df in enumerate(frames):
+                    writer.add_frame(sheet_name(s), df if excel_rows is None else df.head(excel_rows))
+            paths["xlsx"].append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="Where to write the files")
+    parser.add_argument("--rows", type=int, default=100_000, help="Rows per sheet")
+    parser.add_argument("--columns", type=int, default=12, help="Columns per sheet")
+    parser.add_argument("--sheets", type=int, default=1, help="Sheets per file")
+    parser.add_argument("--files", type=int, default=1, help="Number of files")
+    parser.add_argument("--format", nargs="+", choices=FORMATS, default=FORMATS, help="File formats to write")
+    parser.add_argument("--excel-rows", type=int, help="Rows of the .xlsx sheets (default: --rows)")
+    parser.add_argument("--nan", type=float, default=0.02, help="Fraction of missing values")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    paths = write_files(args.folder, args.rows, args.columns, args.sheets, args.files, args.format,
+                        args.nan, args.seed, args.excel_rows)
+    for fmt_paths in paths.values():
+        for path in fmt_paths:
+            print(f"{path} ({os.path.getsize(path) / 1e6:.1f} MB)")
+
+
+if __name__ == "__main__":
+    main()
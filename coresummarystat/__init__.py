@@ -0,0 +1,5 @@
+"""GUI-independent core of CoreSummaryStat."""
+
+from coresummarystat.engine import MEASURES, summarize_block, summarize_frame
+
+__all__ = ["MEASURES", "summarize_block", "summarize_frame"]
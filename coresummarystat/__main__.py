@@ -0,0 +1,5 @@
+import sys
+
+from coresummarystat.cli import main
+
+sys.exit(main())
@@ -0,0 +1,332 @@
+"""Command-line entry point: ``python -m coresummarystat``.
+
+Runs the same summaries as the two GUIs without importing tkinter,
+matplotlib or seaborn, e.g.::
+
+    python -m coresummarystat "data/*.xlsx" -o summary.xlsx
+    python -m coresummarystat data/sample_data.csv --style v2 -m Mean -m "Std Dev" -o out.csv
+    python -m coresummarystat logs/ --watch -o live.xlsx
+    python -m coresummarystat sensors.csv --window 1h --window-on time -o hourly.xlsx
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import numpy as np
+
+from coresummarystat import pipeline, profiling
+from coresummarystat.correlation import DEFAULT_BLOCK, METHODS
+from coresummarystat.engine import canonical
+from coresummarystat.export import grouped_path, profile_path, windowed_path, write_summary, write_table
+from coresummarystat.mode import DEFAULT_CAPACITY, TIES
+from coresummarystat.quantiles import BACKENDS, SketchQuantiles, save_sketches
+from coresummarystat.readers import INPUT_EXTENSIONS
+from coresummarystat.rolling import KINDS, SLIDING_MEASURES, parse_window
+from coresummarystat.prepare import parse_downcast
+from coresummarystat.sketch import DEFAULT_K
+from coresummarystat.state import GROUPINGS, load_states, rollup_table, save_states
+from coresummarystat.store import SHEET_STORE
+from coresummarystat.streaming import DEFAULT_CHUNK_ROWS, STREAMING_MEASURES
+from coresummarystat.summarydb import default_path, open_db
+
+# Inputs with this extension are summary states saved with --save-states
+STATE_EXTENSION = ".json"
+
+
+def expand_inputs(patterns):
+    """Expand files, directories and glob patterns into a sorted file list."""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            matches = [os.path.join(pattern, name) for name in os.listdir(pattern)]
+        else:
+            matches = glob.glob(pattern) or [pattern]
+        files.extend(m for m in matches
+                     if m.lower().endswith(INPUT_EXTENSIONS + (STATE_EXTENSION,)) or m == pattern)
+    return sorted(dict.fromkeys(files))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="coresummarystat",
+        description="Generate summary statistics for Excel, CSV, Parquet and Arrow files without the GUI.",
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="Files, directories or glob patterns; .json files are states saved with --save-states")
+    parser.add_argument("-o", "--output", required=True,
+                        help="Output file (.xlsx, .csv, .parquet, .arrow or .feather)")
+    parser.add_argument("-s", "--sheet", action="append", dest="sheets",
+                        help="Sheet to include (repeatable, default: all sheets)")
+    parser.add_argument("-c", "--column", action="append", dest="columns",
+                        help="Column to include (repeatable, default: all numeric columns)")
+    parser.add_argument("-m", "--measure", action="append", dest="measures",
+                        help="Measure to compute (repeatable, default: all measures of the style)")
+    parser.add_argument("--style", choices=["core", "v2"], default="core",
+                        help="core: CoreSummaryStat.py output; v2: CoreSummaryStat_v2.py output")
+    parser.add_argument("-j", "--workers", type=int, default=1,
+                        help="Worker processes for (file, sheet) tasks, and threads for correlation stripes "
+                             "(0: one per CPU, default: 1)")
+    parser.add_argument("--chunksize", type=int, default=1,
+                        help="(file, sheet) tasks sent to a worker at a time (default: 1)")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read each sheet in bounded chunks (for files larger than memory); "
+                             "quartiles and Mode are approximate, MAD/Correlation are not computed")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS,
+                        help=f"Rows per chunk with --stream (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--mode-ties", choices=TIES, default="smallest",
+                        help="Which value to report when several are equally frequent (default: smallest)")
+    parser.add_argument("--mode-capacity", type=int, default=DEFAULT_CAPACITY,
+                        help=f"Frequent-value counters kept per column for Mode with --stream "
+                             f"(default: {DEFAULT_CAPACITY})")
+    parser.add_argument("--quantiles", choices=BACKENDS, default="exact",
+                        help="Quantile backend for Median/Q1-Q3/IQR/QD: exact selection or a KLL sketch "
+                             "(default: exact; --stream always uses the sketch)")
+    parser.add_argument("--sketch-k", type=int, default=DEFAULT_K,
+                        help=f"Quantile sketch size; rank error is about 1.7/k (default: {DEFAULT_K})")
+    parser.add_argument("--sketch-out", metavar="PATH",
+                        help="Also write per-column quantile sketches, merged over all files and sheets, "
+                             "to this JSON file")
+    parser.add_argument("--corr-method", choices=METHODS, default="pearson",
+                        help="Correlation coefficient (default: pearson)")
+    parser.add_argument("--corr-top", type=int, metavar="K",
+                        help="Report only the K column pairs with the largest |r| instead of the full matrix")
+    parser.add_argument("--corr-block", type=int, default=DEFAULT_BLOCK,
+                        help=f"Columns per block of the correlation matrix (default: {DEFAULT_BLOCK})")
+    parser.add_argument("--corr-float32", action="store_true",
+                        help="Compute correlations in single precision (half the memory, ~1e-6 error)")
+    parser.add_argument("--corr-out", metavar="DIR",
+                        help="Also write each sheet's full correlation matrix to a CSV in this folder, "
+                             "block by block")
+    parser.add_argument("--rollup", choices=list(GROUPINGS),
+                        help="Write one row per column over all files and sheets (column), per file and column "
+                             "(file) or per sheet name and column (sheet), merged from per-sheet summary states; "
+                             "quartiles and Mode are approximate as with --stream, MAD is not computed")
+    parser.add_argument("--save-states", metavar="PATH",
+                        help="Also write the mergeable summary state of every (file, sheet, column) to this "
+                             "JSON file, to roll up later without reading the data again")
+    parser.add_argument("-g", "--group-by", action="append", metavar="COLUMN",
+                        help="Also summarize every numeric column per group of this key column (repeat for "
+                             "several keys); written as a long table to a \"Grouped\" sheet, or to "
+                             "<output>_grouped.<ext> for single-table outputs")
+    parser.add_argument("--window", metavar="SIZE",
+                        help="Also summarize every numeric column over windows of SIZE rows, or of a duration "
+                             "such as 15min, 1h or 7D with --window-on; written as a long table to a \"Windowed\" "
+                             "sheet, or to <output>_windowed.<ext> for single-table outputs")
+    parser.add_argument("--window-on", metavar="COLUMN",
+                        help="Timestamp column ordering the rows and measuring duration windows")
+    parser.add_argument("--window-kind", choices=KINDS, default="sliding",
+                        help="sliding: a window ending at every row (or timestamp); tumbling: consecutive "
+                             "windows that do not overlap (default: sliding)")
+    parser.add_argument("--window-step", type=int, default=1, metavar="N",
+                        help="Report every N-th sliding window only (default: 1)")
+    parser.add_argument("--window-min-periods", type=int, default=1, metavar="N",
+                        help="Leave measures of windows with fewer than N values empty (default: 1)")
+    parser.add_argument("--downcast", nargs="?", const="exact", metavar="RTOL",
+                        help="Store float64 columns as float32 and int64 columns as smaller integers where "
+                             "values survive it: exactly by default, or within relative error RTOL (e.g. 1e-6); "
+                             "statistics are still accumulated in float64")
+    parser.add_argument("--cache", nargs="?", const="", metavar="PATH",
+                        help="Keep core-style results in a SQLite file keyed by file contents and only read "
+                             f"sheets that changed since the last run (default file: {default_path()})")
+    parser.add_argument("--cache-columns", action="store_true",
+                        help="Also keep the parsed numeric columns in the cache, so new measures or options "
+                             "do not parse the workbooks again (larger cache file)")
+    parser.add_argument("--cache-prune", type=float, metavar="DAYS",
+                        help="Drop cached files not seen for DAYS days before summarizing")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and rewrite the output as the inputs grow: CSVs are read from where "
+                             "the last poll stopped, other files again when they change, and new files in "
+                             "input directories are picked up; Ctrl-C stops (statistics as with --stream)")
+    parser.add_argument("--watch-interval", type=float, default=1.0, metavar="SECONDS",
+                        help="Seconds between polls of the inputs with --watch (default: 1)")
+    parser.add_argument("--debounce", type=float, default=2.0, metavar="SECONDS",
+                        help="Least seconds between two rewrites of the output with --watch (default: 2)")
+    parser.add_argument("--run-profile", action="store_true",
+                        help="Record wall time, CPU time, rows and peak memory of every stage per file and sheet, "
+                             "written as a \"Run_Profile\" sheet, or to <output>_profile.<ext> for single-table "
+                             "outputs")
+    parser.add_argument("--profile-out", metavar="PATH",
+                        help="Also profile the run with cProfile into PATH (.prof for pstats/snakeviz, .txt for "
+                             "a text report) or, for .html, with pyinstrument")
+    return parser
+
+
+def run(args, profiler=None):
+    available = pipeline.CORE_MEASURES if args.style == "core" else pipeline.V2_MEASURES
+    measures = args.measures or list(available)
+    unknown = [m for m in measures if m not in available]
+    if unknown:
+        raise ValueError(f"Unknown measure(s) for style '{args.style}': {', '.join(unknown)}")
+
+    if args.downcast is not None:
+        # The environment variable reaches worker processes too
+        SHEET_STORE.downcast = parse_downcast(args.downcast)
+        os.environ["CORESUMMARYSTAT_DOWNCAST"] = args.downcast
+    inputs = expand_inputs(args.inputs)
+    missing = [f for f in inputs if not os.path.isfile(f)]
+    if missing:
+        raise FileNotFoundError(f"No such file: {missing[0]}")
+    state_files = [f for f in inputs if f.lower().endswith(STATE_EXTENSION)]
+    files = [f for f in inputs if f not in state_files]
+    if state_files and not args.rollup:
+        raise ValueError("saved states (.json inputs) can only be used with --rollup")
+    if args.group_by and (args.stream or args.rollup):
+        raise ValueError("--group-by cannot be combined with --stream or --rollup")
+    if args.watch and (args.rollup or args.save_states or args.group_by or args.sketch_out or args.corr_out
+                       or args.window):
+        raise ValueError("--watch cannot be combined with --rollup, --save-states, --group-by, --sketch-out, "
+                         "--corr-out or --window")
+    window = None
+    if args.window:
+        if args.stream or args.rollup:
+            raise ValueError("--window cannot be combined with --stream or --rollup")
+        window = parse_window(args.window, args.window_kind, args.window_on, args.window_step,
+                              args.window_min_periods)
+
+    if args.watch:
+        # Directories stay directories, so files created later are watched too
+        folders = [p for p in args.inputs if os.path.isdir(p)]
+        paths = folders + expand_inputs([p for p in args.inputs if p not in folders])
+        watch(args, measures, paths, profiler)
+        return inputs
+
+    stream = None
+    if args.stream:
+        stream = {"chunk_rows": args.chunk_rows, "k": args.sketch_k, "capacity": args.mode_capacity}
+    if stream is not None or args.rollup:
+        skipped = [m for m in measures if m != "Correlation" and canonical(m) not in STREAMING_MEASURES]
+        if skipped:
+            mode = "--rollup" if args.rollup else "--stream"
+            print(f"coresummarystat: warning: not computed with {mode}: {', '.join(skipped)}", file=sys.stderr)
+    quantiles = SketchQuantiles(args.sketch_k) if args.quantiles == "sketch" else "exact"
+    corr = {"method": args.corr_method, "block_size": args.corr_block,
+            "dtype": np.float32 if args.corr_float32 else np.float64, "workers": pipeline.resolve_workers(args.workers)}
+    cache = None
+    if args.cache is not None:
+        cache = {"path": args.cache or None, "keep_columns": args.cache_columns}
+        if args.cache_prune is not None:
+            open_db(**cache).prune(args.cache_prune)
+    states = {}
+    if args.rollup or args.save_states:
+        states = pipeline.collect_states(files, args.columns, args.sheets, args.sketch_k, args.mode_capacity,
+                                         args.workers, args.chunksize, stream)
+    ddof, cv_scale = (1, 1.0) if args.style == "core" else (0, 100.0)
+    grouped = None
+    if args.group_by:
+        # Before the summaries: sheets read here (with the key columns) are reused from the sheet store
+        grouped = pipeline.grouped_table(files, args.group_by, measures, args.columns, args.sheets, args.workers,
+                                         args.chunksize, args.mode_ties, ddof, cv_scale)
+    windowed = None
+    if window is not None:
+        if window.kind == "sliding":
+            skipped = [m for m in measures if m != "Correlation" and canonical(m) not in SLIDING_MEASURES]
+            if skipped:
+                print(f"coresummarystat: warning: not computed in sliding windows: {', '.join(skipped)}",
+                      file=sys.stderr)
+        windowed = pipeline.windowed_table(files, window, measures, args.columns, args.sheets, args.workers,
+                                           args.chunksize, args.mode_ties, ddof, cv_scale)
+    if args.save_states:
+        save_states(states, args.save_states)
+    if args.rollup:
+        saved = {}
+        for path in state_files:
+            saved.update((key, state) for key, state in load_states(path).items()
+                         if (not args.sheets or key[1] in args.sheets)
+                         and (not args.columns or key[2] in args.columns))
+        # Sheets read in this run replace saved states of the same (file, sheet, column)
+        states = {**saved, **states}
+        table = rollup_table(states, [m for m in measures if m != "Correlation"], args.rollup, ddof, cv_scale,
+                             args.mode_ties)
+        if args.style == "core":
+            table = table.rename(columns=pipeline.MEASURE_KEYS)
+        write_table(table, args.output)
+        if profiler is not None:
+            write_table(profiler.table(), profile_path(args.output))
+    elif args.style == "core":
+        if grouped is not None:
+            grouped = grouped.rename(columns=pipeline.MEASURE_KEYS)
+        if windowed is not None:
+            windowed = windowed.rename(columns=pipeline.MEASURE_KEYS)
+        summary, master = pipeline.summarize_files(files, measures, args.columns, args.sheets,
+                                                   workers=args.workers, chunksize=args.chunksize, stream=stream,
+                                                   quantiles=quantiles, mode_ties=args.mode_ties,
+                                                   corr=dict(corr, top=args.corr_top), cache=cache)
+        write_summary(summary, master, args.output, grouped, profiler, windowed)
+    else:
+        out_df = pipeline.measures_for_files(files, measures, args.columns, args.sheets,
+                                             workers=args.workers, chunksize=args.chunksize, stream=stream,
+                                             quantiles=quantiles, mode_ties=args.mode_ties)
+        write_table(out_df, args.output)
+        if grouped is not None:
+            write_table(grouped, grouped_path(args.output))
+        if windowed is not None:
+            write_table(windowed, windowed_path(args.output))
+        if profiler is not None:
+            write_table(profiler.table(), profile_path(args.output))
+    if args.sketch_out:
+        sketches = pipeline.column_sketches(files, args.columns, args.sheets, k=args.sketch_k,
+                                            workers=args.workers, chunksize=args.chunksize)
+        save_sketches(sketches, args.sketch_out)
+    if args.corr_out:
+        os.makedirs(args.corr_out, exist_ok=True)
+        pipeline.write_correlations(files, args.corr_out, args.columns, args.sheets, **corr)
+    return inputs
+
+
+def _replace_output(write, path):
+    # Write next to the output and swap it in, so readers never see a half-written file
+    folder, name = os.path.split(path)
+    temp = os.path.join(folder, f".{name}")
+    write(temp)
+    os.replace(temp, path)
+
+
+def watch(args, measures, paths, profiler=None):
+    """``--watch``: rewrite ``args.output`` whenever the watched files change, until Ctrl-C.
+
+    With ``profiler`` its records (one "stream" stage per tail read) go
+    to ``export.profile_path`` of the output.
+    """
+    skipped = [m for m in measures if canonical(m) not in STREAMING_MEASURES]
+    if skipped:
+        print(f"coresummarystat: warning: not computed with --watch: {', '.join(skipped)}", file=sys.stderr)
+    rows = 0
+    events = pipeline.watch_events(paths, measures, args.columns, args.sheets, args.style, args.mode_ties,
+                                   args.watch_interval, args.debounce, args.sketch_k, args.mode_capacity)
+    print(f"Watching {', '.join(paths)} (Ctrl-C to stop)")
+    try:
+        for event in events:
+            if event[0] == "watching":
+                rows = event[2]
+                continue
+            results = event[1]
+            if args.style == "core":
+                summary, master = pipeline.summary_tables(results)
+                _replace_output(lambda path: write_summary(summary, master, path), args.output)
+            else:
+                table = pipeline.watched_measures_table(results, measures, args.columns)
+                _replace_output(lambda path: write_table(table, path), args.output)
+            if profiler is not None:
+                write_table(profiler.table(), profile_path(args.output))
+            print(f"{time.strftime('%H:%M:%S')} {args.output}: {len(results)} sheet(s), {rows:,} rows", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        events.close()
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    profiler = profiling.Profiler() if args.run_profile else None
+    try:
+        with profiling.activate(profiler), profiling.traced(args.profile_out):
+            files = run(args, profiler)
+    except (ImportError, OSError, ValueError) as exc:
+        print(f"coresummarystat: error: {exc}", file=sys.stderr)
+        return 1
+    print(f"Summarized {len(files)} file(s) to {args.output}")
+    return 0
@@ -0,0 +1,154 @@
+"""Client of the local summary service (see ``service``).
+
+``default_client()`` returns a ``ServiceClient`` when the
+``CORESUMMARYSTAT_SERVICE`` environment variable names a service
+(``host:port`` or ``unix:path``), else None, and the apps then work
+locally as before.  A client has the ``metadata`` functions the column
+pickers use (``sheet_names``, ``sheet_info``, ``first_sheet_info``) and
+BackgroundTask jobs yielding the same events as ``pipeline.summary_events``,
+``pipeline.measures_events`` and ``plots.image_events``, so a GUI swaps
+one for the other.  Each request is a "service" stage for ``profiling``.
+"""
+
+import http.client
+import os
+import socket
+
+import pandas as pd
+
+from coresummarystat import profiling
+from coresummarystat.metadata import SheetInfo
+from coresummarystat.pipeline import measures_rows
+from coresummarystat.service import dumps, loads, parse_address
+
+
+class _UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=None):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self._path)
+
+
+def default_client():
+    address = os.environ.get("CORESUMMARYSTAT_SERVICE")
+    return ServiceClient(address) if address else None
+
+
+class ServiceClient:
+    """Requests to one summary service; ``timeout`` is in seconds (None waits as long as needed)."""
+
+    def __init__(self, address, timeout=None):
+        self.address = address
+        self.timeout = timeout
+        self._where = parse_address(address)
+
+    def _connection(self):
+        if self._where[0] == "unix":
+            return _UnixConnection(self._where[1], self.timeout)
+        return http.client.HTTPConnection(self._where[1], self._where[2], timeout=self.timeout)
+
+    def request(self, endpoint, body=None):
+        """Decoded response of ``POST endpoint`` (``GET`` without a body).
+
+        Raises ``OSError`` when the service cannot be reached or fails
+        (``FileNotFoundError`` for a missing file) and ``ValueError`` for a
+        request it rejected.
+        """
+        conn = self._connection()
+        with profiling.stage("service", endpoint) as record:
+            try:
+                if body is None:
+                    conn.request("GET", endpoint)
+                else:
+                    conn.request("POST", endpoint, dumps(body), {"Content-Type": "application/json"})
+                response = conn.getresponse()
+                data = response.read()
+            except OSError as exc:
+                raise OSError(f"Summary service at {self.address}: {exc}") from exc
+            finally:
+                conn.close()
+            payload = loads(data)
+            if response.status != 200:
+                error = payload.get("error", response.reason) if isinstance(payload, dict) else response.reason
+                kind = {400: ValueError, 404: FileNotFoundError}.get(response.status, OSError)
+                raise kind(f"Summary service: {error}")
+            if isinstance(payload, list):
+                record["Rows"] = len(payload)
+        return payload
+
+    def status(self):
+        return self.request("/status")
+
+    # ================== Metadata ===================
+    def sheet_names(self, path):
+        return self.request("/sheets", {"path": os.path.abspath(path)})
+
+    def sheet_info(self, path, sheet_name):
+        return SheetInfo(**self.request("/columns", {"path": os.path.abspath(path), "sheet": sheet_name}))
+
+    def first_sheet_info(self, path):
+        return SheetInfo(**self.request("/columns", {"path": os.path.abspath(path), "sheet": None}))
+
+    # ================== Jobs ===================
+    def summary_events(self, files, measures, columns=None, sheets=None, quantiles=None, mode_ties="smallest",
+                       corr=None):
+        """Like ``pipeline.summary_events``, one request per file."""
+        names = {file: [s for s in self.sheet_names(file) if not sheets or s in sheets] for file in files}
+        total = sum(map(len, names.values()))
+        yield ("progress", 0, total, "")
+        done = 0
+        for file in files:
+            items = self.request("/summary", {"files": [os.path.abspath(file)], "measures": measures,
+                                              "columns": columns, "sheets": names[file], "style": "core",
+                                              "quantiles": quantiles, "mode_ties": mode_ties, "corr": corr})
+            for _, sheet_name, sheet_summary in items:
+                done += 1
+                yield ("sheet", file, sheet_name, sheet_summary)
+                yield ("progress", done, total, f"{os.path.basename(file)} - {sheet_name}")
+
+    def measures_events(self, path, sheets, columns, measures, quantiles=None, mode_ties="smallest"):
+        """Like ``pipeline.measures_events`` for ``sheets`` of ``path``, one request per sheet."""
+        total = len(sheets)
+        yield ("progress", 0, total, "")
+        for done, sheet in enumerate(sheets, 1):
+            items = self.request("/summary", {"files": [os.path.abspath(path)], "measures": measures,
+                                              "columns": columns, "sheets": [sheet], "style": "v2",
+                                              "quantiles": quantiles, "mode_ties": mode_ties})
+            for _, sheet_name, (present, empty, results) in items:
+                yield ("sheet", sheet_name, present, empty, results)
+            yield ("progress", done, total, sheet)
+
+    def measures_table(self, path, sheets, columns, measures, quantiles=None, mode_ties="smallest"):
+        """Like ``pipeline.measures_table`` for ``sheets`` of ``path``."""
+        rows = []
+        for event in self.measures_events(path, sheets, columns, measures, quantiles, mode_ties):
+            if event[0] == "sheet":
+                _, sheet, present, _, results = event
+                rows.extend(measures_rows(sheet, present, results, measures))
+        return pd.DataFrame(rows)
+
+    def image_events(self, path, sheets, columns, plot_types):
+        """Like ``plots.image_events`` for ``sheets`` of ``path``, one request per sheet."""
+        total = len(sheets)
+        yield ("progress", 0, total, "")
+        for done, sheet in enumerate(sheets, 1):
+            images = self.request("/plots", {"path": os.path.abspath(path), "sheets": [sheet], "columns": columns,
+                                             "plots": plot_types})
+            for sheet_name, plot_type, filename, png in images:
+                yield ("image", sheet_name, plot_type, filename, png)
+            yield ("progress", done, total, sheet)
+
+    def save_events(self, path, sheets, columns, plot_types, folder_path):
+        """Like ``plots.save_events``: write every plot as PNG into ``folder_path``."""
+        for event in self.image_events(path, sheets, columns, plot_types):
+            if event[0] == "image":
+                filename, png = event[3], event[4]
+                with open(os.path.join(folder_path, filename), "wb") as fh:
+                    fh.write(png)
+                yield ("saved", filename)
+            else:
+                yield event
@@ -0,0 +1,147 @@
+"""Vectorized summary statistics for all numeric columns of a sheet.
+
+Every selected measure is computed from a single 2-D float32 or float64
+block (rows x columns, see ``prepare``).  Intermediates are shared
+between measures: the NaN mask is computed once, one quantile pass (see
+``quantiles``) serves Median/Q1/Q2/Q3/IQR/QD, and one moment pass serves
+Mean/Variance/Std/Skewness/Kurtosis/CV/MAD.  Mode is counted per column
+by ``mode``.  The moment pass runs over slabs of columns in float64, so
+its temporaries stay small however large the sheet.  Each pass is a
+"measure" stage for ``profiling``.
+"""
+
+import numpy as np
+
+from coresummarystat import profiling
+from coresummarystat.mode import block_mode
+from coresummarystat.moments import finish_moments
+from coresummarystat.prepare import column_slabs, float_block, numeric_block
+from coresummarystat.quantiles import get_backend
+
+MEASURES = [
+    "Mean", "Median", "Mode", "Range", "Variance", "Standard Deviation",
+    "Skewness", "Kurtosis", "Max", "Min", "Coefficient of Variation",
+    "Q1", "Q2", "Q3", "IQR", "Quartile Deviation", "Mean Absolute Deviation",
+]
+
+# Labels used by CoreSummaryStat_v2 that map onto the measures above
+ALIASES = {"Std Dev": "Standard Deviation"}
+
+QUANTILES = {"Q1": 0.25, "Median": 0.5, "Q2": 0.5, "Q3": 0.75}
+
+_MOMENT_MEASURES = {
+    "Variance", "Standard Deviation", "Skewness", "Kurtosis",
+    "Coefficient of Variation", "Mean Absolute Deviation",
+}
+_EXTREME_MEASURES = {"Min", "Max", "Range"}
+# Measures that keep the column's integer dtype, as pandas does
+_DTYPE_PRESERVING = {"Min", "Max", "Range", "Mode"}
+
+
+def canonical(measure):
+    return ALIASES.get(measure, measure)
+
+
+def _moment_sums(block, mask, safe_counts, wanted):
+    # Mean and sums of deviation powers, one float64 slab of columns at a time
+    ncols = block.shape[1]
+    mean = np.empty(ncols)
+    m2, m3, m4, mad = np.zeros(ncols), np.zeros(ncols), np.zeros(ncols), np.zeros(ncols)
+    for cols in column_slabs(*block.shape):
+        values = np.asarray(block[:, cols], dtype=np.float64)
+        kept = mask[:, cols]
+        mean[cols] = np.where(kept, values, 0.0).sum(axis=0) / safe_counts[cols]
+        if not wanted & _MOMENT_MEASURES:
+            continue
+        dev = np.where(kept, values - mean[cols], 0.0)
+        if "Mean Absolute Deviation" in wanted:
+            mad[cols] = np.abs(dev).sum(axis=0)
+        dev2 = dev * dev
+        m2[cols] = dev2.sum(axis=0)
+        if "Skewness" in wanted:
+            m3[cols] = (dev2 * dev).sum(axis=0)
+        if "Kurtosis" in wanted:
+            m4[cols] = (dev2 * dev2).sum(axis=0)
+    return mean, m2, m3, m4, mad
+
+
+def summarize_block(block, measures, ddof=1, cv_scale=1.0, quantiles=None, mode_ties="smallest", present=None):
+    """Compute ``measures`` for every column of a 2-D float block.
+
+    Returns a dict mapping each requested measure label to a 1-D array
+    with one value per column.  ``ddof`` applies to Variance, Standard
+    Deviation and CV; ``cv_scale`` multiplies CV (100 for a percentage).
+    ``quantiles`` picks the quantile backend ("exact", the default, or
+    "sketch"; see ``quantiles.get_backend``) and ``mode_ties`` how Mode
+    ties are resolved (see ``mode.TIES``).  ``present`` is the block's
+    non-NaN mask, when the caller already has it.
+    """
+    block = float_block(block)
+    wanted = {canonical(m) for m in measures}
+    mask = ~np.isnan(block) if present is None else present
+    counts = mask.sum(axis=0)
+    empty = counts == 0
+    safe_counts = np.where(empty, 1, counts)
+    res = {}
+    nrows = block.shape[0]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        qnames = [name for name, q in QUANTILES.items()
+                  if name in wanted or (q != 0.5 and wanted & {"IQR", "Quartile Deviation"})]
+        if qnames:
+            backend = get_backend(quantiles)
+            with profiling.stage("measure", f"{', '.join(qnames)} ({backend.name})", nrows):
+                res.update(zip(qnames, backend.compute(block, [QUANTILES[name] for name in qnames], present=mask)))
+        if "Mode" in wanted:
+            with profiling.stage("measure", "Mode", nrows):
+                res["Mode"] = block_mode(block, mode_ties, mask)
+        if wanted & _EXTREME_MEASURES:
+            # fmin/fmax skip NaNs without a masked copy of the block
+            with profiling.stage("measure", "Min, Max", nrows):
+                res["Min"] = np.where(empty, np.nan, np.fmin.reduce(block, axis=0, initial=np.inf)).astype(np.float64)
+                res["Max"] = np.where(empty, np.nan, np.fmax.reduce(block, axis=0, initial=-np.inf)).astype(np.float64)
+
+        moments = [m for m in MEASURES if m in wanted and (m == "Mean" or m in _MOMENT_MEASURES)]
+        if moments:
+            with profiling.stage("measure", ", ".join(moments), nrows):
+                mean, m2, m3, m4, mad = _moment_sums(block, mask, safe_counts, wanted)
+            mean[empty] = np.nan
+            res["Mean"] = mean
+            res["Mean Absolute Deviation"] = mad / safe_counts
+        if wanted & _MOMENT_MEASURES:
+            res.update(finish_moments(counts, mean, m2, m3 if "Skewness" in wanted else None,
+                                      m4 if "Kurtosis" in wanted else None, wanted, ddof, cv_scale))
+
+        if "Range" in wanted:
+            res["Range"] = res["Max"] - res["Min"]
+        if "IQR" in wanted or "Quartile Deviation" in wanted:
+            iqr = res["Q3"] - res["Q1"]
+            res["IQR"] = iqr
+            res["Quartile Deviation"] = iqr / 2
+
+    return {m: res[canonical(m)] for m in measures}
+
+
+def summarize_frame(df, measures, columns=None, ddof=1, cv_scale=1.0, quantiles=None, mode_ties="smallest"):
+    """Summarize the numeric columns of ``df`` in one vectorized pass.
+
+    Returns ``{column: {measure: value}}`` in column order.  Min, Max,
+    Range and Mode keep the integer type of integer columns.  ``quantiles``
+    and ``mode_ties`` are passed on to ``summarize_block``.
+    """
+    names, dtypes, block = numeric_block(df, columns)
+    if not names:
+        return {}
+    results = summarize_block(block, measures, ddof=ddof, cv_scale=cv_scale, quantiles=quantiles,
+                              mode_ties=mode_ties)
+    summary = {}
+    for j, (col, dtype) in enumerate(zip(names, dtypes)):
+        keep_int = isinstance(dtype, np.dtype) and dtype.kind in "iu"
+        stats = {}
+        for m in measures:
+            value = results[m][j]
+            if keep_int and canonical(m) in _DTYPE_PRESERVING and not np.isnan(value):
+                value = dtype.type(value)
+            stats[m] = value
+        summary[col] = stats
+    return summary
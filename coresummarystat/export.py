@@ -0,0 +1,299 @@
+"""Writers for summary results.
+
+Tables are written by the exporter registered for the file extension
+(``EXPORTERS``; add more with ``register_exporter``):
+
+- ``.csv``;
+- ``.parquet``, and ``.arrow``/``.feather`` (Arrow IPC), which need pyarrow;
+- ``.xlsx``, through ``XlsxStreamWriter``, which writes rows as they
+  come instead of building the workbook in memory.  It uses xlsxwriter
+  in ``constant_memory`` mode when installed, else openpyxl's write-only
+  mode.  The workbook is written next to the output and only replaces
+  it once complete, so a failed export leaves an existing file alone.
+
+Excel sheet names are cleaned by ``SheetNamer``: invalid characters are
+replaced, long names are cut to 31 characters (the file part of a
+"<file> - <sheet>" label first, keeping any "_Correlation" suffix), the
+reserved name "History" gets a "_" and repeats get a "~2", "~3" suffix,
+so long "<file> - <sheet>" names no longer break the workbook.
+
+Writing an output file is an "export" stage for ``profiling``.
+"""
+
+import importlib.util
+import math
+import os
+import re
+
+import pandas as pd
+
+from coresummarystat import profiling
+
+MAX_SHEET_NAME = 31
+MAX_SHEET_ROWS = 1_048_576
+_INVALID_SHEET_CHARS = re.compile(r"[\[\]:*?/\\]")
+
+
+def shorten(text, limit):
+    """``text`` cut to ``limit`` characters by dropping its middle."""
+    if len(text) <= limit:
+        return text
+    tail = (limit - 1) // 2
+    return text[:limit - 1 - tail] + "…" + text[len(text) - tail:]
+
+
+def shorten_label(label, limit):
+    """``label`` cut to ``limit`` characters, keeping the sheet of "<file> - <sheet>" when it fits."""
+    if len(label) <= limit:
+        return label
+    head, sep, tail = label.rpartition(" - ")
+    if head and len(sep) + len(tail) + 2 <= limit:
+        return shorten(head, limit - len(sep) - len(tail)) + sep + tail
+    suffix = "_Correlation" if tail.endswith("_Correlation") and len(tail) > len("_Correlation") else ""
+    return shorten(tail[:len(tail) - len(suffix)], limit - len(suffix)) + suffix
+
+
+class SheetNamer:
+    """Turns arbitrary labels into unique, valid Excel sheet names."""
+
+    def __init__(self):
+        self._used = set()
+
+    def __call__(self, label):
+        base = _INVALID_SHEET_CHARS.sub("_", str(label)).strip("'") or "Sheet"
+        if base.lower() == "history":
+            # Reserved by Excel for change tracking
+            base += "_"
+        name = shorten_label(base, MAX_SHEET_NAME)
+        n = 1
+        while name.lower() in self._used:
+            n += 1
+            suffix = f"~{n}"
+            name = shorten_label(base, MAX_SHEET_NAME - len(suffix)) + suffix
+        self._used.add(name.lower())
+        return name
+
+
+def _cell(value):
+    # Excel has no NaN/inf: leave such cells blank, as DataFrame.to_excel does
+    if isinstance(value, float):
+        return value if math.isfinite(value) else None
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def frame_rows(df, index=False):
+    """Header row, then data rows of ``df`` as lists of plain Python values."""
+    header = ([df.index.name or ""] if index else []) + [str(c) for c in df.columns]
+    yield header
+    index_values = df.index.tolist() if index else None
+    for i, row in enumerate(df.itertuples(index=False, name=None)):
+        values = [_cell(v.item() if hasattr(v, "item") else v) for v in row]
+        yield ([_cell(index_values[i])] + values) if index else values
+
+
+class XlsxStreamWriter:
+    """Write DataFrames to an .xlsx sheet by sheet without holding the workbook in memory."""
+
+    def __init__(self, path):
+        self.path = path
+        self.names = SheetNamer()
+        folder, name = os.path.split(path)
+        self._temp = os.path.join(folder, f".{name}")
+        # Fail on an unwritable folder before any sheet is written
+        open(self._temp, "wb").close()
+        try:
+            import xlsxwriter
+        except ImportError:
+            import openpyxl
+            self._book = openpyxl.Workbook(write_only=True)
+            self._xlsxwriter = False
+            self._create_error = ()
+        else:
+            self._book = xlsxwriter.Workbook(self._temp, {"constant_memory": True})
+            self._xlsxwriter = True
+            self._create_error = xlsxwriter.exceptions.FileCreateError
+
+    def add_frame(self, label, df, index=False):
+        """Write ``df`` to a new sheet named after ``label``; returns the sheet name."""
+        name = self.names(label)
+        if self._xlsxwriter:
+            sheet = self._book.add_worksheet(name)
+            for r, row in enumerate(frame_rows(df, index)):
+                for c, value in enumerate(row):
+                    if value is not None:
+                        sheet.write(r, c, value)
+        else:
+            sheet = self._book.create_sheet(name)
+            for row in frame_rows(df, index):
+                sheet.append(row)
+        return name
+
+    def _finish(self):
+        # Both libraries free their per-sheet temporary files here
+        if self._xlsxwriter:
+            self._book.close()
+        else:
+            self._book.save(self._temp)
+
+    def _remove_temp(self):
+        if os.path.exists(self._temp):
+            os.remove(self._temp)
+
+    def close(self):
+        """Write the workbook and move it to ``path``."""
+        try:
+            self._finish()
+        except self._create_error as exc:
+            # Not an OSError subclass: callers report OSErrors as "cannot write"
+            raise OSError(f"Cannot write {self.path}: {exc}") from exc
+        except BaseException:
+            self._remove_temp()
+            raise
+        os.replace(self._temp, self.path)
+
+    def discard(self):
+        """Drop the workbook; ``path`` is left as it was."""
+        try:
+            self._finish()
+        except Exception:
+            # Already failing: the original error is the one worth reporting
+            pass
+        finally:
+            self._remove_temp()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        if exc[0] is None:
+            self.close()
+        else:
+            self.discard()
+
+
+# ================== Table exporters ===================
+def _require_pyarrow(ext):
+    if importlib.util.find_spec("pyarrow") is None:
+        raise ImportError(f"{ext} output needs pyarrow (pip install pyarrow)")
+
+
+def write_csv(df, path):
+    df.to_csv(path, index=False)
+
+
+def write_parquet(df, path):
+    _require_pyarrow(".parquet")
+    df.to_parquet(path, index=False)
+
+
+def write_arrow(df, path):
+    """Arrow IPC file (Feather v2)."""
+    _require_pyarrow(os.path.splitext(path)[1])
+    df.reset_index(drop=True).to_feather(path)
+
+
+def write_xlsx(df, path):
+    with XlsxStreamWriter(path) as writer:
+        writer.add_frame("Sheet1", df)
+
+
+EXPORTERS = {
+    ".csv": write_csv,
+    ".parquet": write_parquet,
+    ".arrow": write_arrow,
+    ".feather": write_arrow,
+    ".xlsx": write_xlsx,
+}
+
+
+def register_exporter(ext, func):
+    """Use ``func(df, path)`` for files ending in ``ext``."""
+    EXPORTERS[ext.lower()] = func
+
+
+def write_table(df, path):
+    """Write a single table, choosing the format from the file extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in EXPORTERS:
+        raise ValueError(f"Unsupported output format: {ext or path} (use {', '.join(EXPORTERS)})")
+    with profiling.stage("export", os.path.basename(path), len(df)):
+        EXPORTERS[ext](df, path)
+
+
+# ================== Core summaries ===================
+def summary_frames(summary):
+    """Yield ``(sheet_name, DataFrame, index)`` for every table of a core summary."""
+    for sheet, cols in summary.items():
+        dfs = []
+        for col, stats in cols.items():
+            if col == "Correlation":
+                yield f"{sheet}_Correlation", stats, True
+            else:
+                dfs.append(pd.DataFrame(stats, index=[col]))
+        if dfs:
+            yield sheet, pd.concat(dfs), True
+
+
+def grouped_path(path):
+    """Where a group-by table goes next to a single-table output: "<name>_grouped<ext>"."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_grouped{ext}"
+
+
+def windowed_path(path):
+    """Where a windowed table goes next to a single-table output: "<name>_windowed<ext>"."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_windowed{ext}"
+
+
+def profile_path(path):
+    """Where a run profile goes next to a single-table output: "<name>_profile<ext>"."""
+    stem, ext = os.path.splitext(path)
+    return f"{stem}_profile{ext}"
+
+
+def write_summary_workbook(summary, master_descriptive, path, grouped=None, profile=None, windowed=None):
+    """Write a core summary as ``ExcelSummaryApp.save_output`` does, one sheet at a time."""
+    with XlsxStreamWriter(path) as writer:
+        with profiling.stage("export", os.path.basename(path), len(master_descriptive)):
+            for sheet_name, df, index in summary_frames(summary):
+                writer.add_frame(sheet_name, df, index)
+
+            # Add Master Descriptive Sheet
+            writer.add_frame("Master_Descriptive", master_descriptive)
+            if grouped is not None:
+                # Long group-by tables continue on "Grouped~2", ... past Excel's row limit
+                for start in range(0, max(len(grouped), 1), MAX_SHEET_ROWS - 1):
+                    writer.add_frame("Grouped", grouped.iloc[start:start + MAX_SHEET_ROWS - 1])
+            if windowed is not None:
+                for start in range(0, max(len(windowed), 1), MAX_SHEET_ROWS - 1):
+                    writer.add_frame("Windowed", windowed.iloc[start:start + MAX_SHEET_ROWS - 1])
+        if profile is not None:
+            # Last, so it includes writing the sheets above
+            writer.add_frame("Run_Profile", profile.table())
+
+
+def write_summary(summary, master_descriptive, path, grouped=None, profile=None, windowed=None):
+    """Full workbook for .xlsx; for other formats the Master_Descriptive table.
+
+    A ``grouped`` table (see ``pipeline.grouped_table``) becomes a
+    "Grouped" sheet, or a separate file at ``grouped_path(path)``, and a
+    ``windowed`` table (see ``pipeline.windowed_table``) a "Windowed"
+    sheet or a file at ``windowed_path(path)``.  A
+    ``profiling.Profiler`` becomes a "Run_Profile" sheet, or a file at
+    ``profile_path(path)``.
+    """
+    if path.lower().endswith(".xlsx"):
+        write_summary_workbook(summary, master_descriptive, path, grouped, profile, windowed)
+    else:
+        write_table(master_descriptive, path)
+        if grouped is not None:
+            write_table(grouped, grouped_path(path))
+        if windowed is not None:
+            write_table(windowed, windowed_path(path))
+        if profile is not None:
+            write_table(profile.table(), profile_path(path))
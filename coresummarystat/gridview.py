@@ -0,0 +1,116 @@
+"""Virtual Tk grid over a ``resultgrid.ResultsModel``.
+
+The Treeview only ever holds the rows on screen.  Scrolling, paging,
+sorting (click a heading) and filtering (the entries above the grid)
+re-fill those rows from the model, so the cost of an update depends on
+the window height, not on the number of results.
+"""
+
+import tkinter as tk
+from tkinter import ttk
+
+FILTER_COLUMNS = ["Sheet", "Column", "Measure"]
+
+
+class VirtualGrid(ttk.Frame):
+    """Scrollable, sortable, filterable view of a ``ResultsModel``."""
+
+    def __init__(self, master, model, height=25, widths=None):
+        super().__init__(master)
+        self.model = model
+        self.height = height
+        self.first = 0
+        self._refresh_pending = False
+
+        filter_bar = ttk.Frame(self)
+        filter_bar.pack(fill="x", pady=(0, 5))
+        self.filter_vars = {}
+        for column in [c for c in FILTER_COLUMNS if c in model.columns]:
+            ttk.Label(filter_bar, text=f"{column}:").pack(side="left", padx=(5, 2))
+            var = tk.StringVar()
+            var.trace_add("write", lambda *_, c=column, v=var: self.set_filter(c, v.get()))
+            ttk.Entry(filter_bar, textvariable=var, width=14).pack(side="left")
+            self.filter_vars[column] = var
+
+        body = ttk.Frame(self)
+        body.pack(fill="both", expand=True)
+        self.tree = ttk.Treeview(body, columns=model.columns, show="headings", height=height)
+        for column in model.columns:
+            self.tree.heading(column, text=column, command=lambda c=column: self.sort(c))
+            self.tree.column(column, width=(widths or {}).get(column, 150), anchor="w")
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.tree.pack(side="left", fill="both", expand=True)
+
+        self.status = ttk.Label(self, text="")
+        self.status.pack(fill="x")
+
+        for widget in (self.tree, self.scrollbar):
+            widget.bind("<MouseWheel>", lambda e: self.scroll(-3 if e.delta > 0 else 3))
+            widget.bind("<Button-4>", lambda e: self.scroll(-3))
+            widget.bind("<Button-5>", lambda e: self.scroll(3))
+        self.tree.bind("<Prior>", lambda e: self.scroll(-self.height))
+        self.tree.bind("<Next>", lambda e: self.scroll(self.height))
+        self.tree.bind("<Home>", lambda e: self.scroll_to(0))
+        self.tree.bind("<End>", lambda e: self.scroll_to(len(self.model)))
+
+    # ================== Model changes ===================
+    def append(self, rows):
+        """Add rows to the model and redraw once the event loop is idle."""
+        self.model.append(rows)
+        self.refresh_later()
+
+    def clear(self):
+        self.model.clear()
+        self.first = 0
+        self.refresh()
+
+    def set_filter(self, column, text):
+        self.model.set_filter(column, text.strip())
+        self.first = 0
+        self.refresh_later()
+
+    def sort(self, column):
+        self.model.sort(column)
+        for c in self.model.columns:
+            arrow = (" ▲" if self.model.ascending else " ▼") if c == column else ""
+            self.tree.heading(c, text=c + arrow)
+        self.refresh()
+
+    # ================== Scrolling ===================
+    def scroll(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def scroll_to(self, first):
+        self.first = first
+        self.refresh()
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(int(float(amount) * len(self.model)))
+        elif unit == "pages":
+            self.scroll(int(amount) * self.height)
+        else:
+            self.scroll(int(amount))
+
+    # ================== Drawing ===================
+    def refresh_later(self):
+        # Coalesce bursts of appends/keystrokes into one redraw
+        if not self._refresh_pending:
+            self._refresh_pending = True
+            self.after_idle(self.refresh)
+
+    def refresh(self):
+        self._refresh_pending = False
+        total = len(self.model)
+        self.first = max(0, min(self.first, total - self.height))
+        self.tree.delete(*self.tree.get_children())
+        for row in self.model.rows(self.first, self.height):
+            self.tree.insert("", "end", values=row)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.first + self.height) / total))
+            last = min(self.first + self.height, total)
+            self.status.configure(text=f"Rows {self.first + 1:,}–{last:,} of {total:,}")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.status.configure(text="No results")
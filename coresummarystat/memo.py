@@ -0,0 +1,107 @@
+"""Memoized summary results, one cell per (file, sheet, column, measure).
+
+Cells are keyed by the file fingerprint (path, mtime, size), the sheet,
+the column, the measure and the options that change its value (ddof,
+CV scale, quantile backend, Mode tie policy, lossy downcasting of the
+sheet store).  Re-running a summary
+after ticking one more measure or column computes only the missing
+cells; everything else comes from the cache.  A cell of an older version
+of a file is never returned, and all of them are dropped the first time
+a newer version is seen.
+
+Like the sheet cache, the result cache is per process.
+"""
+
+import threading
+from collections import OrderedDict
+
+from coresummarystat.engine import canonical, summarize_frame
+from coresummarystat.prepare import numeric_columns
+from coresummarystat.quantiles import get_backend
+from coresummarystat.store import SHEET_STORE, fingerprint
+
+DEFAULT_MAX_CELLS = 1_000_000
+
+
+def options_key(ddof=1, cv_scale=1.0, quantiles=None, mode_ties="smallest"):
+    """Hashable form of the ``summarize_frame`` options."""
+    backend = get_backend(quantiles)
+    key = ddof, cv_scale, backend.name, getattr(backend, "k", None), mode_ties
+    if SHEET_STORE.downcast:
+        # Sheets are read through SHEET_STORE: lossy downcasting changes results, exact downcasting does not
+        key += ("downcast", SHEET_STORE.downcast)
+    return key
+
+
+class ResultCache:
+    """LRU cache of per-cell results in front of ``engine.summarize_frame``."""
+
+    def __init__(self, max_cells=DEFAULT_MAX_CELLS):
+        self.max_cells = max_cells
+        self.hits = 0
+        self.misses = 0
+        self._cells = OrderedDict()  # (fingerprint, sheet, column, measure, options) -> value
+        self._paths = {}             # path -> latest fingerprint seen
+        self._lock = threading.RLock()
+
+    def _forget_path(self, fp):
+        # Drop cells of older versions of the same file
+        if self._paths.get(fp[0], fp) != fp:
+            for key in [k for k in self._cells if k[0][0] == fp[0] and k[0] != fp]:
+                del self._cells[key]
+        self._paths[fp[0]] = fp
+
+    def summarize(self, df, source, measures, columns=None, **options):
+        """``summarize_frame(df, measures, columns, **options)`` through the cache.
+
+        ``source`` is the ``(path, sheet_name)`` that ``df`` was read from;
+        with None nothing is cached.
+        """
+        if source is None:
+            return summarize_frame(df, measures, columns, **options)
+        path, sheet_name = source
+        fp = fingerprint(path)
+        opts = options_key(**options)
+        names = numeric_columns(df, columns)
+
+        def key(col, m):
+            return fp, sheet_name, col, canonical(m), opts
+
+        with self._lock:
+            self._forget_path(fp)
+            cached = {}
+            for col in names:
+                for m in measures:
+                    if key(col, m) in self._cells:
+                        self._cells.move_to_end(key(col, m))
+                        cached[col, m] = self._cells[key(col, m)]
+            self.hits += len(cached)
+        todo_cols = [col for col in names if any((col, m) not in cached for m in measures)]
+        todo_measures = [m for m in measures if any((col, m) not in cached for col in names)]
+
+        # Compute outside the lock: the smallest rectangle covering every missing cell
+        fresh = summarize_frame(df, todo_measures, todo_cols, **options) if todo_cols else {}
+
+        summary = {}
+        with self._lock:
+            for col in names:
+                stats = {}
+                for m in measures:
+                    if (col, m) in cached:
+                        stats[m] = cached[col, m]
+                    else:
+                        self.misses += 1
+                        self._cells[key(col, m)] = stats[m] = fresh[col][m]
+                summary[col] = stats
+            while len(self._cells) > self.max_cells:
+                self._cells.popitem(last=False)
+        return summary
+
+    def clear(self):
+        with self._lock:
+            self._cells.clear()
+            self._paths.clear()
+
+
+# Shared by the GUIs and the pipeline within one process
+RESULT_CACHE = ResultCache()
@@ -0,0 +1,33 @@
+"""Cheap workbook metadata for the column pickers.
+
+Reads sheet names, the header row and a small sample of rows to tell
+which columns are numeric, so a column list can be shown long before a
+large sheet could be fully parsed.  The full read happens only when a
+summary or plot is requested.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from coresummarystat.store import SHEET_STORE
+
+SAMPLE_ROWS = 200
+
+SheetInfo = namedtuple("SheetInfo", ["name", "columns", "numeric_columns"])
+
+
+def sheet_names(path, store=None):
+    return (store or SHEET_STORE).sheet_names(path)
+
+
+def sheet_info(path, sheet_name, nrows=SAMPLE_ROWS, store=None):
+    """Columns of a sheet and the ones that look numeric in the first ``nrows`` rows."""
+    sample = (store or SHEET_STORE).get_sample(path, sheet_name, nrows)
+    numeric = sample.select_dtypes(include=[np.number]).columns
+    return SheetInfo(sheet_name, list(sample.columns), list(numeric))
+
+
+def first_sheet_info(path, nrows=SAMPLE_ROWS, store=None):
+    """``sheet_info`` of the first sheet of ``path``."""
+    return sheet_info(path, sheet_names(path, store)[0], nrows, store)
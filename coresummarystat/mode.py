@@ -0,0 +1,161 @@
+"""Mode of numeric columns: exact counting and a streaming approximation.
+
+Values are counted in one of three ways, picked per column:
+
+- integer-valued data in a narrow range goes through ``np.bincount``
+  (linear time, no sort);
+- low-cardinality data, judged from a sample, goes through the pandas
+  hash table (``value_counts``);
+- anything else goes through ``np.unique``, i.e. one sort and run
+  lengths.
+
+Ties are resolved by ``ties``: "smallest" (the default, as
+``Series.mode().iloc[0]`` and ``scipy.stats.mode``), "largest", or
+"first" (first to appear in the data).  ``modes`` returns every mode.
+
+``HeavyHitters`` is a Misra-Gries summary for columns read in chunks:
+it keeps at most ``capacity`` counters, finds every value occurring in
+more than ``n / (capacity + 1)`` rows, and undercounts by at most
+``error``.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+TIES = ["smallest", "largest", "first"]
+DEFAULT_CAPACITY = 1000
+
+# np.bincount is used when the integer range is at most this many times the length
+_BINCOUNT_SPAN = 4
+_SAMPLE_SIZE = 5000
+# Sampled share of distinct values below which hashing beats sorting
+_HASH_DISTINCT_RATIO = 0.1
+
+ModeResult = namedtuple("ModeResult", ["modes", "count"])
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=np.float64).ravel()
+    return values[~np.isnan(values)]
+
+
+def value_counts(values):
+    """``(distinct values, counts)`` of a 1-D float array without NaNs."""
+    n = len(values)
+    if n == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    lo, hi = values.min(), values.max()
+    span = hi - lo
+    if np.isfinite(span) and span <= _BINCOUNT_SPAN * n + 1024 and np.array_equal(values, np.floor(values)):
+        counts = np.bincount((values - lo).astype(np.intp))
+        present = np.flatnonzero(counts)
+        return present + lo, counts[present]
+    sample = values[::max(1, n // _SAMPLE_SIZE)]
+    if n > _SAMPLE_SIZE and len(np.unique(sample)) < _HASH_DISTINCT_RATIO * len(sample):
+        counted = pd.Series(values).value_counts(sort=False)
+        return counted.index.to_numpy(dtype=np.float64), counted.to_numpy()
+    return np.unique(values, return_counts=True)
+
+
+def _pick(candidates, values, ties):
+    if len(candidates) == 1 or ties == "smallest":
+        return candidates.min()
+    if ties == "largest":
+        return candidates.max()
+    if ties == "first":
+        return values[np.isin(values, candidates)][0]
+    raise ValueError(f"Unknown tie policy: {ties!r} (choose from {', '.join(TIES)})")
+
+
+def modes(values):
+    """``ModeResult(modes, count)``: every most frequent value, sorted, and its count."""
+    uniq, counts = value_counts(_finite(values))
+    if len(uniq) == 0:
+        return ModeResult(np.empty(0), 0)
+    top = counts.max()
+    return ModeResult(np.sort(uniq[counts == top]), int(top))
+
+
+def mode(values, ties="smallest"):
+    """Most frequent value, NaN for an empty column; ties resolved by ``ties``."""
+    values = _finite(values)
+    uniq, counts = value_counts(values)
+    if len(uniq) == 0:
+        return np.nan
+    return _pick(uniq[counts == counts.max()], values, ties)
+
+
+def block_mode(block, ties="smallest", present=None):
+    """``mode`` of each column of a 2-D float block; ``present`` is its non-NaN mask, if known."""
+    if present is None:
+        return np.array([mode(block[:, j], ties) for j in range(block.shape[1])], dtype=np.float64)
+    return np.array([mode(block[present[:, j], j], ties) for j in range(block.shape[1])], dtype=np.float64)
+
+
+class HeavyHitters:
+    """Mergeable Misra-Gries frequent-value counts of one column."""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self.capacity = int(capacity)
+        self.n = 0
+        self.error = 0
+        self.values = np.empty(0)
+        self.counts = np.empty(0, dtype=np.int64)
+
+    def _add(self, values, counts):
+        values, inverse = np.unique(np.r_[self.values, values], return_inverse=True)
+        counts = np.bincount(inverse, weights=np.r_[self.counts, counts]).astype(np.int64)
+        if len(values) > self.capacity:
+            # Subtract the (capacity + 1)-th largest count; what drops to zero is forgotten
+            cut = np.partition(counts, len(counts) - self.capacity - 1)[len(counts) - self.capacity - 1]
+            counts = counts - cut
+            self.error += int(cut)
+            keep = counts > 0
+            values, counts = values[keep], counts[keep]
+        self.values, self.counts = values, counts
+
+    def update(self, values):
+        """Count another chunk of values; NaNs are ignored."""
+        values = _finite(values)
+        self.n += len(values)
+        if len(values):
+            self._add(*value_counts(values))
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this summary in place and return self."""
+        self.n += other.n
+        self.error += other.error
+        self._add(other.values, other.counts)
+        return self
+
+    def top(self, limit=None):
+        """``[(value, count), ...]`` by decreasing count (counts are lower bounds)."""
+        order = np.lexsort((self.values, -self.counts))[:limit]
+        return [(float(self.values[i]), int(self.counts[i])) for i in order]
+
+    def mode(self, ties="smallest"):
+        """Estimated mode; "first" falls back to "smallest" since order is not kept.
+
+        NaN when no value was frequent enough to keep a counter, e.g. for
+        a continuous column where every value is distinct.
+        """
+        if len(self.values) == 0:
+            return np.nan
+        candidates = self.values[self.counts == self.counts.max()]
+        return candidates.max() if ties == "largest" else candidates.min()
+
+    def to_dict(self):
+        return {"capacity": self.capacity, "n": self.n, "error": self.error,
+                "values": self.values.tolist(), "counts": self.counts.tolist()}
+
+    @classmethod
+    def from_dict(cls, state):
+        self = cls(state["capacity"])
+        self.n = int(state["n"])
+        self.error = int(state["error"])
+        self.values = np.asarray(state["values"], dtype=np.float64)
+        self.counts = np.asarray(state["counts"], dtype=np.int64)
+        return self
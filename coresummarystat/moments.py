@@ -0,0 +1,128 @@
+"""Mergeable central moments for many columns at once.
+
+``Moments`` holds, per column, the count, mean, the sums of squared,
+cubed and fourth-power deviations (M2..M4), min and max.  Two states
+combine exactly with the pairwise update of Chan et al. / Pébay, so a
+column can be summarized chunk by chunk, or sheet by sheet, with the
+same result as a single pass over all of the data.
+"""
+
+import numpy as np
+
+MOMENT_MEASURES = [
+    "Mean", "Variance", "Standard Deviation", "Skewness", "Kurtosis",
+    "Coefficient of Variation", "Min", "Max", "Range",
+]
+
+
+def finish_moments(counts, mean, m2, m3, m4, wanted, ddof=1, cv_scale=1.0):
+    """Turn per-column count/mean/M2..M4 into the measures in ``wanted``.
+
+    Variance and Standard Deviation use ``ddof``; Skewness and Kurtosis
+    are the biased estimators of ``scipy.stats.skew``/``kurtosis``.
+    ``m3``/``m4`` may be None when skewness/kurtosis are not wanted.
+    """
+    res = {}
+    empty = counts == 0
+    safe_counts = np.where(empty, 1, counts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        var = m2 / (counts - ddof)
+        var = np.where(counts <= ddof, np.nan, var)
+        std = np.sqrt(var)
+        res["Mean"] = mean
+        res["Variance"] = var
+        res["Standard Deviation"] = std
+        res["Coefficient of Variation"] = np.where(mean != 0, std / mean * cv_scale, np.nan)
+        if "Skewness" in wanted or "Kurtosis" in wanted:
+            m2n = m2 / safe_counts
+            flat = empty | (m2n <= (np.finfo(np.float64).eps * mean) ** 2)
+            if "Skewness" in wanted:
+                res["Skewness"] = np.where(flat, np.nan, (m3 / safe_counts) / m2n ** 1.5)
+            if "Kurtosis" in wanted:
+                res["Kurtosis"] = np.where(flat, np.nan, (m4 / safe_counts) / m2n ** 2 - 3.0)
+    return res
+
+
+class Moments:
+    """Count, mean, M2..M4, min and max for each of ``ncols`` columns."""
+
+    FIELDS = ("n", "mean", "m2", "m3", "m4", "min", "max")
+
+    def __init__(self, ncols):
+        self.n = np.zeros(ncols, dtype=np.int64)
+        self.mean = np.zeros(ncols)
+        self.m2 = np.zeros(ncols)
+        self.m3 = np.zeros(ncols)
+        self.m4 = np.zeros(ncols)
+        self.min = np.full(ncols, np.inf)
+        self.max = np.full(ncols, -np.inf)
+
+    @classmethod
+    def from_block(cls, block):
+        """Moments of each column of a 2-D float block (NaN = missing)."""
+        block = np.asarray(block, dtype=np.float64)
+        if block.ndim == 1:
+            block = block[:, None]
+        self = cls(block.shape[1])
+        mask = ~np.isnan(block)
+        n = mask.sum(axis=0)
+        if not n.any():
+            return self
+        safe_n = np.where(n == 0, 1, n)
+        mean = np.where(mask, block, 0.0).sum(axis=0) / safe_n
+        dev = np.where(mask, block - mean, 0.0)
+        dev2 = dev * dev
+        self.n = n.astype(np.int64)
+        self.mean = mean
+        self.m2 = dev2.sum(axis=0)
+        self.m3 = (dev2 * dev).sum(axis=0)
+        self.m4 = (dev2 * dev2).sum(axis=0)
+        self.min = np.where(mask, block, np.inf).min(axis=0)
+        self.max = np.where(mask, block, -np.inf).max(axis=0)
+        return self
+
+    def merge(self, other):
+        """Combine with ``other`` in place (exact pairwise update) and return self."""
+        na = self.n.astype(np.float64)
+        nb = other.n.astype(np.float64)
+        n = na + nb
+        safe_n = np.where(n == 0, 1.0, n)
+        delta = other.mean - self.mean
+        d_n = delta / safe_n
+        mean = self.mean + d_n * nb
+        m2 = self.m2 + other.m2 + delta * d_n * na * nb
+        m3 = (self.m3 + other.m3 + delta * d_n * d_n * na * nb * (na - nb)
+              + 3.0 * d_n * (na * other.m2 - nb * self.m2))
+        m4 = (self.m4 + other.m4
+              + delta * d_n ** 3 * na * nb * (na * na - na * nb + nb * nb)
+              + 6.0 * d_n * d_n * (na * na * other.m2 + nb * nb * self.m2)
+              + 4.0 * d_n * (na * other.m3 - nb * self.m3))
+        self.n = self.n + other.n
+        self.mean, self.m2, self.m3, self.m4 = mean, m2, m3, m4
+        self.min = np.minimum(self.min, other.min)
+        self.max = np.maximum(self.max, other.max)
+        return self
+
+    def update(self, block):
+        """Fold another chunk of rows into the state."""
+        return self.merge(Moments.from_block(block))
+
+    def result(self, measures, ddof=1, cv_scale=1.0):
+        """``{measure: array}`` for the measures in ``MOMENT_MEASURES``."""
+        empty = self.n == 0
+        mean = np.where(empty, np.nan, self.mean)
+        res = finish_moments(self.n, mean, self.m2, self.m3, self.m4, set(measures), ddof, cv_scale)
+        res["Min"] = np.where(empty, np.nan, self.min)
+        res["Max"] = np.where(empty, np.nan, self.max)
+        res["Range"] = res["Max"] - res["Min"]
+        return {m: res[m] for m in measures if m in res}
+
+    def to_dict(self):
+        return {f: getattr(self, f).tolist() for f in self.FIELDS}
+
+    @classmethod
+    def from_dict(cls, state):
+        self = cls(len(state["n"]))
+        for f in cls.FIELDS:
+            setattr(self, f, np.asarray(state[f], dtype=np.int64 if f == "n" else np.float64))
+        return self
@@ -0,0 +1,722 @@
+"""Summary pipelines shared by the GUIs and the command line.
+
+Nothing in here imports tkinter, matplotlib or seaborn, so the same code
+runs headless on batch machines.  Stages run while a ``profiling``
+profiler is active are recorded, in worker processes too.
+"""
+
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from coresummarystat import profiling
+from coresummarystat.correlation import correlation_table, write_matrix
+from coresummarystat.engine import canonical
+from coresummarystat.groupby import group_summary
+from coresummarystat.quantiles import SketchQuantiles, merge_sketches
+from coresummarystat.rolling import window_summary
+from coresummarystat.sketch import DEFAULT_K
+from coresummarystat.state import frame_states, rollup
+from coresummarystat.memo import RESULT_CACHE, options_key
+from coresummarystat.mode import DEFAULT_CAPACITY
+from coresummarystat.prepare import numeric_block, numeric_columns
+from coresummarystat.store import SHEET_STORE, LazySheets
+from coresummarystat.streaming import stream_states, stream_summary
+from coresummarystat.summarydb import open_db
+from coresummarystat.watch import Watcher
+
+# Measures offered by CoreSummaryStat.py, in display order
+CORE_MEASURES = [
+    "Mean", "Median", "Mode", "Range", "Variance", "Standard Deviation",
+    "Skewness", "Kurtosis", "Max", "Min", "Coefficient of Variation",
+    "Q1", "Q2", "Q3", "Quartile Deviation", "Correlation",
+]
+
+# Measures offered by CoreSummaryStat_v2.py, in display order
+V2_MEASURES = [
+    "Mean", "Median", "Mode", "Std Dev", "Variance", "Min", "Max", "Range",
+    "Q1", "Q3", "IQR", "Quartile Deviation", "Mean Absolute Deviation",
+    "Coefficient of Variation",
+]
+
+# Short keys used for some measures in the core output tables
+MEASURE_KEYS = {"Coefficient of Variation": "CV", "Quartile Deviation": "QD"}
+
+
+# ================== Reading ===================
+def list_sheets(path, store=None):
+    """Sheet names of ``path`` in workbook order ("CSV", "Parquet" or "Arrow" for single tables)."""
+    return (store or SHEET_STORE).sheet_names(path)
+
+
+def read_sheet(path, sheet_name, store=None, columns=None):
+    """Read a single sheet of ``path`` through the sheet cache.
+
+    ``columns`` limits what is read to those columns.
+    """
+    return (store or SHEET_STORE).get_sheet(path, sheet_name, columns)
+
+
+def read_sheets(path, sheets=None, store=None, columns=None):
+    """``{sheet_name: DataFrame}`` of ``path``, parsed lazily through the sheet cache.
+
+    Single-table files (CSV, Parquet, Arrow) yield one sheet.  ``sheets``
+    limits an Excel workbook to the named sheets (all sheets when None)
+    and ``columns`` the columns read from each sheet.
+    """
+    names = [s for s in list_sheets(path, store) if sheets is None or s in sheets]
+    return LazySheets(path, names, store, columns)
+
+
+def sheet_source(df_dict, sheet_name):
+    """``(path, sheet_name)`` when ``df_dict`` is a ``LazySheets`` of a file, else None.
+
+    Summaries of a known source are memoized in ``memo.RESULT_CACHE``.
+    """
+    path = getattr(df_dict, "path", None)
+    return None if path is None else (path, sheet_name)
+
+
+def sheet_tasks(files, sheets=None, cache=None):
+    """(file, sheet) pairs in file order, then workbook order.
+
+    With a ``cache`` (see ``iter_sheet_summaries``) sheet names of known
+    files come from the database instead of the workbook.
+    """
+    tasks = []
+    for file in files:
+        for sheet_name in (list_sheets(file) if cache is None else cached_sheet_names(open_db(**cache), file)):
+            if sheets is None or sheet_name in sheets:
+                tasks.append((file, sheet_name))
+    return tasks
+
+
+def resolve_workers(workers):
+    """Number of worker processes; 0 or None means one per CPU."""
+    if not workers:
+        return os.cpu_count() or 1
+    return max(1, int(workers))
+
+
+# ================== CoreSummaryStat pipeline ===================
+def summarize_sheet(df, measures, columns=None, quantiles=None, mode_ties="smallest", source=None, corr=None):
+    """Core-style summary of one sheet: ``{column: stats}`` plus "Correlation".
+
+    ``quantiles`` selects the quantile backend ("exact" or "sketch") and
+    ``mode_ties`` how Mode ties are resolved (see ``mode.TIES``).  With
+    ``source=(path, sheet_name)`` per-cell results are memoized.  ``corr``
+    is a dict of ``correlation.correlation_table`` options (``method``,
+    ``top``, ``block_size``, ``dtype``, ``workers``).
+    """
+    names = numeric_columns(df)
+    if columns:
+        numeric = set(names)
+        names = [c for c in columns if c in numeric]
+    numeric_df = df[names]
+
+    selected_measures = [m for m in measures if m != "Correlation"]
+    with profiling.source(*(source or (None, None))):
+        col_stats = RESULT_CACHE.summarize(numeric_df, source, selected_measures,
+                                           quantiles=quantiles, mode_ties=mode_ties)
+        sheet_summary = {}
+        for col in numeric_df.columns:
+            sheet_summary[col] = {MEASURE_KEYS.get(m, m): v for m, v in col_stats[col].items()}
+
+        if "Correlation" in measures and not numeric_df.empty:
+            with profiling.stage("correlation", (corr or {}).get("method", "pearson"), len(numeric_df)):
+                sheet_summary["Correlation"] = correlation_table(numeric_df, **(corr or {}))
+    return sheet_summary
+
+
+def master_rows(file, sheet_name, sheet_summary):
+    """Rows of the Master_Descriptive table for one summarized sheet."""
+    rows = []
+    for col, stats in sheet_summary.items():
+        if col == "Correlation":
+            continue
+        row = stats.copy()
+        row["File"] = os.path.basename(file)
+        row["Sheet"] = sheet_name
+        row["Column"] = col
+        rows.append(row)
+    return rows
+
+
+def summarize_sheet_stream(file, sheet_name, measures, columns=None, **options):
+    """Core-style summary of one sheet read in bounded chunks.
+
+    ``options`` go to ``streaming.stream_summary`` (``chunk_rows``, ``k``).
+    Correlation is not available in this mode.
+    """
+    selected_measures = [m for m in measures if m != "Correlation"]
+    col_stats = stream_summary(file, sheet_name, selected_measures, columns or None, **options)
+    return {col: {MEASURE_KEYS.get(m, m): v for m, v in stats.items()} for col, stats in col_stats.items()}
+
+
+def _summarize_task(task):
+    file, sheet_name, measures, columns, stream, quantiles, mode_ties, corr, cache = task
+    if stream is not None:
+        return summarize_sheet_stream(file, sheet_name, measures, columns, mode_ties=mode_ties, **stream)
+    if cache is not None:
+        return cached_summarize_sheet(open_db(**cache), file, sheet_name, measures, columns, quantiles, mode_ties,
+                                      corr)
+    return summarize_sheet(read_sheet(file, sheet_name, columns=columns or None), measures, columns,
+                           quantiles, mode_ties, (file, sheet_name), corr)
+
+
+def map_tasks(func, tasks, workers, chunksize):
+    """Map ``func`` over ``tasks`` in order, in a process pool when ``workers > 1``.
+
+    Stages recorded in the workers go to the profiler active here, if any.
+    """
+    if workers == 1:
+        for task in tasks:
+            yield func(task)
+        return
+    profiler = profiling.active()
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(tasks) or 1))
+    try:
+        if profiler is None:
+            yield from pool.map(func, tasks, chunksize=chunksize)
+            return
+        for result, records in pool.map(profiling.profiled_task(func), tasks, chunksize=chunksize):
+            profiler.extend(records)
+            yield result
+    finally:
+        # Drop queued tasks if the consumer stops early (e.g. a cancelled GUI run)
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_sheet_summaries(files, measures, columns=None, sheets=None, workers=1, chunksize=1, stream=None,
+                         quantiles=None, mode_ties="smallest", corr=None, cache=None):
+    """Yield ``(file, sheet_name, sheet_summary)`` in deterministic order.
+
+    With ``workers > 1`` each (file, sheet) is read and summarized in a
+    process pool; ``chunksize`` tasks are sent to a worker at a time.
+    Results are still yielded in file/workbook order.  ``stream`` is a
+    dict of ``summarize_sheet_stream`` options to read sheets in bounded
+    chunks instead of loading them whole.  ``quantiles``, ``mode_ties``
+    and ``corr`` work as in ``summarize_sheet``.
+
+    ``cache`` is a dict of ``summarydb.open_db`` options (``path``,
+    ``keep_columns``): results are then kept in that database and only
+    sheets of new or changed files are read.  It does not apply with
+    ``stream``.
+    """
+    workers = resolve_workers(workers)
+    if stream is not None:
+        cache = None
+    if workers == 1 and stream is None and cache is None:
+        for file in files:
+            for sheet_name, df in read_sheets(file, sheets, columns=columns or None).items():
+                yield file, sheet_name, summarize_sheet(df, measures, columns, quantiles, mode_ties,
+                                                        (file, sheet_name), corr)
+        return
+
+    tasks = [(file, sheet_name, measures, columns, stream, quantiles, mode_ties, corr, cache)
+             for file, sheet_name in sheet_tasks(files, sheets, cache)]
+    for task, sheet_summary in zip(tasks, map_tasks(_summarize_task, tasks, workers, chunksize)):
+        yield task[0], task[1], sheet_summary
+
+
+def summarize_files(files, measures, columns=None, sheets=None, workers=1, chunksize=1, stream=None,
+                    quantiles=None, mode_ties="smallest", corr=None, cache=None):
+    """Summarize every sheet of every file.
+
+    Returns ``(summary_data, master_descriptive)`` where ``summary_data``
+    is keyed by "<file> - <sheet>" as in ``ExcelSummaryApp.save_output``.
+    See ``iter_sheet_summaries`` for the other options.
+    """
+    return summary_tables(iter_sheet_summaries(files, measures, columns, sheets, workers, chunksize, stream,
+                                               quantiles, mode_ties, corr, cache))
+
+
+def summary_tables(sheet_summaries):
+    """``(summary_data, master_descriptive)`` of ``(file, sheet_name, sheet_summary)`` items."""
+    summary_data = {}
+    all_stats = []
+    for file, sheet_name, sheet_summary in sheet_summaries:
+        all_stats.extend(master_rows(file, sheet_name, sheet_summary))
+        summary_data[f"{os.path.basename(file)} - {sheet_name}"] = sheet_summary
+    return summary_data, pd.DataFrame(all_stats)
+
+
+def summary_events(files, measures, columns=None, sheets=None, workers=1, quantiles=None,
+                   mode_ties="smallest", corr=None, cache=None, group_by=None, window=None):
+    """BackgroundTask job for ``summarize_files``.
+
+    Yields ``("sheet", file, sheet_name, sheet_summary)`` as each sheet is
+    done and ``("progress", done, total, label)`` counted in sheets.  With
+    ``group_by`` key columns it ends with ``("grouped", table)``, the
+    core-style ``grouped_table``, and with a ``rolling.Window`` with
+    ``("windowed", table)``, the core-style ``windowed_table``.
+    """
+    total = len(sheet_tasks(files, sheets, cache))
+    yield ("progress", 0, total, "")
+    done = 0
+    for file, sheet_name, sheet_summary in iter_sheet_summaries(files, measures, columns, sheets, workers,
+                                                                quantiles=quantiles, mode_ties=mode_ties,
+                                                                corr=corr, cache=cache):
+        done += 1
+        yield ("sheet", file, sheet_name, sheet_summary)
+        yield ("progress", done, total, f"{os.path.basename(file)} - {sheet_name}")
+    if group_by:
+        table = grouped_table(files, group_by, measures, columns, sheets, workers, mode_ties=mode_ties)
+        yield ("grouped", table.rename(columns=MEASURE_KEYS))
+    if window is not None:
+        table = windowed_table(files, window, measures, columns, sheets, workers, mode_ties=mode_ties)
+        yield ("windowed", table.rename(columns=MEASURE_KEYS))
+
+
+# ================== On-disk cache ===================
+def cached_sheet_names(db, file):
+    """``list_sheets(file)``, remembered in ``db`` per file hash."""
+    digest = db.digest(file)
+    names = db.sheet_names(digest)
+    if names is None:
+        names = list_sheets(file)
+        db.put_sheet_names(digest, names)
+    return names
+
+
+def cached_summarize_sheet(db, file, sheet_name, measures, columns=None, quantiles=None, mode_ties="smallest",
+                           corr=None):
+    """``summarize_sheet`` of one sheet of ``file`` through the ``summarydb.SummaryDB`` ``db``.
+
+    When every result is in ``db`` nothing is read.  Otherwise the sheet
+    is loaded from the columns stored in ``db`` if there are any, else
+    read from the file, and the new results are stored.
+    """
+    digest = db.digest(file)
+    selected = [m for m in measures if m != "Correlation"]
+    opts = options_key(1, 1.0, quantiles, mode_ties)
+    # Threads do not change the table
+    corr_options = tuple(sorted((k, v) for k, v in (corr or {}).items() if k != "workers"))
+    with profiling.stage("disk cache", "miss", file=file, sheet=sheet_name) as record:
+        names = db.numeric_columns(digest, sheet_name, columns or None)
+        df = None
+        if names is not None:
+            cells = db.get_cells(digest, sheet_name, opts)
+            table = None
+            if "Correlation" in measures and names:
+                table = db.get_table(digest, sheet_name, ("Correlation", tuple(names), corr_options))
+            if (all((col, canonical(m)) in cells for col in names for m in selected)
+                    and (table is not None or "Correlation" not in measures or not names)):
+                sheet_summary = {col: {MEASURE_KEYS.get(m, m): cells[col, canonical(m)] for m in selected}
+                                 for col in names}
+                if table is not None:
+                    sheet_summary["Correlation"] = table
+                record["Detail"] = "hit"
+                return sheet_summary
+            df = db.load_frame(digest, sheet_name, names)
+            if df is not None:
+                record["Detail"] = "stored columns"
+                record["Rows"] = len(df)
+    if df is None:
+        df = read_sheet(file, sheet_name, columns=columns or None)
+        db.put_layout(digest, sheet_name, df, columns or None)
+
+    sheet_summary = summarize_sheet(df, measures, columns, quantiles, mode_ties, (file, sheet_name), corr)
+    names = [col for col in sheet_summary if col != "Correlation"]
+    db.put_cells(digest, sheet_name, opts, {(col, canonical(m)): sheet_summary[col][MEASURE_KEYS.get(m, m)]
+                                            for col in names for m in selected})
+    if "Correlation" in sheet_summary:
+        db.put_table(digest, sheet_name, ("Correlation", tuple(names), corr_options), sheet_summary["Correlation"])
+    return sheet_summary
+
+
+# ================== CoreSummaryStat_v2 pipeline ===================
+def compute_measures(df, columns, measures, quantiles=None, mode_ties="smallest", source=None):
+    """v2-style measures: population std/variance and CV in percent."""
+    return RESULT_CACHE.summarize(df, source, measures, columns, ddof=0, cv_scale=100.0,
+                                  quantiles=quantiles, mode_ties=mode_ties)
+
+
+def measures_rows(sheet, columns, results, measures):
+    """``save_measures`` rows of one sheet; columns without results get NaN."""
+    rows = []
+    for col in columns:
+        row = {"Sheet": sheet, "Column": col}
+        for m in measures:
+            row[m] = results[col][m] if col in results else np.nan
+        rows.append(row)
+    return rows
+
+
+def measures_table(df_dict, columns, measures, quantiles=None, mode_ties="smallest", combine=False):
+    """One row per (sheet, column) with a column per measure, as ``save_measures``.
+
+    When ``columns`` is empty every numeric column of each sheet is used.
+    ``combine`` adds rows for each column over all sheets (see
+    ``combined_results``).
+    """
+    results = []
+    states = {}
+    for sheet, df in df_dict.items():
+        sheet_columns = columns or numeric_columns(df)
+        sheet_columns = [col for col in sheet_columns if col in df.columns]
+        with profiling.source(getattr(df_dict, "path", None), sheet):
+            sheet_results = compute_measures(df, sheet_columns, measures, quantiles, mode_ties,
+                                             sheet_source(df_dict, sheet))
+            if combine:
+                states.update(sheet_states(df, sheet, sheet_columns))
+        results.extend(measures_rows(sheet, sheet_columns, sheet_results, measures))
+    if combine:
+        combined = combined_results(states, measures, mode_ties)
+        results.extend(measures_rows(COMBINED_SHEET, list(combined), combined, measures))
+    return pd.DataFrame(results)
+
+
+def measures_events(df_dict, columns, measures, quantiles=None, mode_ties="smallest", combine=False):
+    """BackgroundTask job for the v2 measures preview.
+
+    Yields ``("sheet", sheet, present, empty, results)`` per sheet, where
+    ``present`` are the selected columns found in the sheet and ``empty``
+    those without any data, and ``("progress", done, total, sheet)``.
+    ``combine`` ends with a ``COMBINED_SHEET`` event for all sheets together.
+    """
+    total = len(df_dict)
+    yield ("progress", 0, total, "")
+    states = {}
+    for done, (sheet, df) in enumerate(df_dict.items(), 1):
+        present = [col for col in columns if col in df.columns]
+        empty = {col for col in present if not df[col].notna().any()}
+        with profiling.source(getattr(df_dict, "path", None), sheet):
+            results = compute_measures(df, present, measures, quantiles, mode_ties, sheet_source(df_dict, sheet))
+            if combine:
+                states.update(sheet_states(df, sheet, present))
+        yield ("sheet", sheet, present, empty, results)
+        yield ("progress", done, total, sheet)
+    if combine:
+        combined = combined_results(states, measures, mode_ties)
+        present = [col for col in columns if col in combined]
+        empty = {col for col in present if combined[col]["Count"] == 0}
+        yield ("sheet", COMBINED_SHEET, present, empty, combined)
+
+
+def stream_measures_events(path, sheets, columns, measures, mode_ties="smallest", **options):
+    """Like ``measures_events`` but reads each sheet in bounded chunks."""
+    total = len(sheets)
+    yield ("progress", 0, total, "")
+    for done, sheet in enumerate(sheets, 1):
+        results = stream_summary(path, sheet, measures, columns or None, ddof=0, cv_scale=100.0,
+                                 mode_ties=mode_ties, **options)
+        present = [col for col in columns if col in results]
+        yield ("sheet", sheet, present, set(), results)
+        yield ("progress", done, total, sheet)
+
+
+def _measures_task(task):
+    file, sheet_name, measures, columns, stream, quantiles, mode_ties = task
+    if stream is None:
+        return measures_table(read_sheets(file, [sheet_name], columns=columns or None), columns, measures,
+                              quantiles, mode_ties)
+    results = stream_summary(file, sheet_name, measures, columns or None, ddof=0, cv_scale=100.0,
+                             mode_ties=mode_ties, **stream)
+    sheet_columns = [col for col in columns if col in results] if columns else list(results)
+    return pd.DataFrame(measures_rows(sheet_name, sheet_columns, results, measures))
+
+
+def measures_for_files(files, measures, columns=None, sheets=None, workers=1, chunksize=1, stream=None,
+                       quantiles=None, mode_ties="smallest"):
+    """``measures_table`` over several files, one (file, sheet) task at a time.
+
+    A leading "File" column is added when more than one file is given.
+    ``stream``, ``quantiles`` and ``mode_ties`` work as in ``iter_sheet_summaries``.
+    """
+    workers = resolve_workers(workers)
+    if workers == 1 and stream is None:
+        tables = [measures_table(read_sheets(file, sheets, columns=columns or None), columns, measures,
+                                 quantiles, mode_ties)
+                  for file in files]
+        labels = files
+    else:
+        tasks = [(file, sheet_name, measures, columns, stream, quantiles, mode_ties)
+                 for file, sheet_name in sheet_tasks(files, sheets)]
+        tables = list(map_tasks(_measures_task, tasks, workers, chunksize))
+        labels = [task[0] for task in tasks]
+    if len(files) > 1:
+        for file, table in zip(labels, tables):
+            table.insert(0, "File", os.path.basename(file))
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+# ================== Summary states ===================
+# Sheet label of rows combining all sheets
+COMBINED_SHEET = "All sheets"
+
+
+def sheet_states(df, sheet_name, columns=None, file=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+    """``{(file, sheet_name, column): state.SummaryState}`` of one sheet's numeric columns."""
+    return {(file, sheet_name, col): state
+            for col, state in frame_states(df, columns or None, k, capacity).items()}
+
+
+def combined_results(states, measures, mode_ties="smallest"):
+    """v2-style ``{column: {measure: value}}`` of each column over all ``states``, plus "Count"."""
+    out = {}
+    for col, state in rollup(states, "column").items():
+        out[col] = state.result(measures, ddof=0, cv_scale=100.0, mode_ties=mode_ties)
+        out[col]["Count"] = state.count
+    return out
+
+
+def _states_task(task):
+    file, sheet_name, columns, stream, k, capacity = task
+    if stream is not None:
+        states = stream_states(file, sheet_name, columns or None, **dict(stream, k=k, capacity=capacity))
+        return {(file, sheet_name, col): state for col, state in states.items()}
+    return sheet_states(read_sheet(file, sheet_name, columns=columns or None), sheet_name, columns, file, k,
+                        capacity)
+
+
+def collect_states(files, columns=None, sheets=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY, workers=1,
+                   chunksize=1, stream=None):
+    """``{(file, sheet, column): state.SummaryState}`` for every sheet of every file.
+
+    ``stream`` is a dict of ``streaming.stream_states`` options to read
+    sheets in bounded chunks.  Roll the states up with ``state.rollup``
+    or keep them with ``state.save_states``.
+    """
+    tasks = [(file, sheet_name, columns, stream, k, capacity) for file, sheet_name in sheet_tasks(files, sheets)]
+    states = {}
+    for sheet_result in map_tasks(_states_task, tasks, resolve_workers(workers), chunksize):
+        states.update(sheet_result)
+    return states
+
+
+# ================== Group-by summaries ===================
+def sheet_groups(df, keys, measures, columns=None, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+    """``groupby.group_summary`` of one sheet; None when the sheet lacks a key column."""
+    if any(key not in df.columns for key in keys):
+        return None
+    measures = [m for m in measures if m != "Correlation"]
+    with profiling.stage("group-by", ", ".join(map(str, keys)), len(df)):
+        return group_summary(df, keys, measures, columns or None, ddof, cv_scale, mode_ties)
+
+
+def _group_task(task):
+    file, sheet_name, keys, measures, columns, ddof, cv_scale, mode_ties = task
+    read_columns = list(keys) + [col for col in columns if col not in keys] if columns else None
+    df = read_sheet(file, sheet_name, columns=read_columns)
+    with profiling.source(file, sheet_name):
+        return sheet_groups(df, keys, measures, columns, ddof, cv_scale, mode_ties)
+
+
+def grouped_table(files, keys, measures, columns=None, sheets=None, workers=1, chunksize=1, mode_ties="smallest",
+                  ddof=1, cv_scale=1.0):
+    """Long table of ``measures`` per (file, sheet, group of ``keys``, column).
+
+    Columns are "File", "Sheet", the keys, "Column", "Count" and one per
+    measure.  Sheets without every key column are skipped.  Sheets are
+    read through the sheet store, so summarizing the same files in the
+    same process afterwards does not parse them again.
+    """
+    tasks = [(file, sheet_name, list(keys), measures, columns, ddof, cv_scale, mode_ties)
+             for file, sheet_name in sheet_tasks(files, sheets)]
+    tables = []
+    for task, table in zip(tasks, map_tasks(_group_task, tasks, resolve_workers(workers), chunksize)):
+        if table is not None:
+            table.insert(0, "File", os.path.basename(task[0]))
+            table.insert(1, "Sheet", task[1])
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def grouped_events(df_dict, keys, columns, measures, mode_ties="smallest"):
+    """BackgroundTask job for the v2 measures preview grouped by ``keys``.
+
+    Yields ``("grouped", sheet, table)`` per sheet with every key column,
+    where ``table`` is a v2-style ``groupby.group_summary``, and
+    ``("progress", done, total, sheet)``.
+    """
+    total = len(df_dict)
+    yield ("progress", 0, total, "")
+    for done, (sheet, df) in enumerate(df_dict.items(), 1):
+        with profiling.source(getattr(df_dict, "path", None), sheet):
+            table = sheet_groups(df, keys, measures, columns, ddof=0, cv_scale=100.0, mode_ties=mode_ties)
+        if table is not None:
+            yield ("grouped", sheet, table)
+        yield ("progress", done, total, sheet)
+
+
+def grouped_measures_table(df_dict, keys, columns, measures, mode_ties="smallest"):
+    """``grouped_events`` results as one table with a leading "Sheet" column."""
+    tables = []
+    for event in grouped_events(df_dict, keys, columns, measures, mode_ties):
+        if event[0] == "grouped":
+            _, sheet, table = event
+            table.insert(0, "Sheet", sheet)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+# ================== Windowed summaries ===================
+def sheet_windows(df, window, measures, columns=None, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+    """``rolling.window_summary`` of one sheet; None when the sheet lacks the ``window.on`` column."""
+    if window.on is not None and window.on not in df.columns:
+        return None
+    measures = [m for m in measures if m != "Correlation"]
+    with profiling.stage("window", f"{window.kind} {window.size}", len(df)):
+        return window_summary(df, measures, window, columns or None, ddof, cv_scale, mode_ties)
+
+
+def _window_task(task):
+    file, sheet_name, window, measures, columns, ddof, cv_scale, mode_ties = task
+    read_columns = None
+    if columns:
+        read_columns = [window.on] + [col for col in columns if col != window.on] if window.on else list(columns)
+    df = read_sheet(file, sheet_name, columns=read_columns)
+    with profiling.source(file, sheet_name):
+        return sheet_windows(df, window, measures, columns, ddof, cv_scale, mode_ties)
+
+
+def windowed_table(files, window, measures, columns=None, sheets=None, workers=1, chunksize=1,
+                   mode_ties="smallest", ddof=1, cv_scale=1.0):
+    """Long table of ``measures`` per (file, sheet, window of ``window``, column).
+
+    Columns are "File", "Sheet", "Window Start", "Window End", "Column",
+    "Count" and one per measure.  Sheets without the ``window.on`` column
+    are skipped.
+    """
+    tasks = [(file, sheet_name, window, measures, columns, ddof, cv_scale, mode_ties)
+             for file, sheet_name in sheet_tasks(files, sheets)]
+    tables = []
+    for task, table in zip(tasks, map_tasks(_window_task, tasks, resolve_workers(workers), chunksize)):
+        if table is not None:
+            table.insert(0, "File", os.path.basename(task[0]))
+            table.insert(1, "Sheet", task[1])
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+def window_events(df_dict, window, columns, measures, mode_ties="smallest"):
+    """BackgroundTask job for the v2 measures preview over windows of ``window``.
+
+    Yields ``("windowed", sheet, table)`` per sheet with the ``window.on``
+    column, where ``table`` is a v2-style ``rolling.window_summary``, and
+    ``("progress", done, total, sheet)``.
+    """
+    total = len(df_dict)
+    yield ("progress", 0, total, "")
+    for done, (sheet, df) in enumerate(df_dict.items(), 1):
+        with profiling.source(getattr(df_dict, "path", None), sheet):
+            table = sheet_windows(df, window, measures, columns, ddof=0, cv_scale=100.0, mode_ties=mode_ties)
+        if table is not None:
+            yield ("windowed", sheet, table)
+        yield ("progress", done, total, sheet)
+
+
+def windowed_measures_table(df_dict, window, columns, measures, mode_ties="smallest"):
+    """``window_events`` results as one table with a leading "Sheet" column."""
+    tables = []
+    for event in window_events(df_dict, window, columns, measures, mode_ties):
+        if event[0] == "windowed":
+            _, sheet, table = event
+            table.insert(0, "Sheet", sheet)
+            tables.append(table)
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame()
+
+
+# ================== Quantile sketches ===================
+def _sketch_task(task):
+    file, sheet_name, columns, k = task
+    names, _, block = numeric_block(read_sheet(file, sheet_name, columns=columns or None), columns or None)
+    return dict(zip(names, SketchQuantiles(k).sketches(block)))
+
+
+def column_sketches(files, columns=None, sheets=None, k=DEFAULT_K, workers=1, chunksize=1):
+    """``{column: KLLSketch}`` merged over every sheet of every file.
+
+    Columns with the same name in different sheets or files share one
+    sketch, so ``sketch.quantiles(...)`` describes the pooled data.  Save
+    and reload the result with ``quantiles.save_sketches``/``load_sketches``.
+    """
+    tasks = [(file, sheet_name, columns, k) for file, sheet_name in sheet_tasks(files, sheets)]
+    merged = {}
+    for sketches in map_tasks(_sketch_task, tasks, resolve_workers(workers), chunksize):
+        merge_sketches(merged, sketches)
+    return merged
+
+
+# ================== Correlation matrices ===================
+def _matrix_filename(file, sheet_name):
+    return re.sub(r'[\\/:*?"<>|]', "_", f"{os.path.basename(file)} - {sheet_name}_Correlation.csv")
+
+
+def write_correlations(files, folder, columns=None, sheets=None, **options):
+    """Write the correlation matrix of every sheet to a CSV in ``folder``, stripe by stripe.
+
+    ``options`` go to ``correlation.write_matrix`` (``method``,
+    ``block_size``, ``dtype``, ``workers``).  Returns the paths written.
+    """
+    paths = []
+    for file, sheet_name in sheet_tasks(files, sheets):
+        path = os.path.join(folder, _matrix_filename(file, sheet_name))
+        write_matrix(read_sheet(file, sheet_name, columns=columns or None), path, columns=columns or None,
+                     **options)
+        paths.append(path)
+    return paths
+
+
+# ================== Watch mode ===================
+def watch_events(paths, measures, columns=None, sheets=None, style="core", mode_ties="smallest", interval=1.0,
+                 debounce=2.0, k=DEFAULT_K, capacity=DEFAULT_CAPACITY, save=None):
+    """BackgroundTask job keeping the summaries of growing files up to date, until cancelled.
+
+    ``paths`` (files or folders, see ``watch.Watcher``) are polled every
+    ``interval`` seconds.  Yields ``("watching", files, rows, new_rows)``
+    after every poll and, when something changed but at most once every
+    ``debounce`` seconds, ``("refresh", results)`` with
+    ``[(file, sheet_name, {column: stats})]`` of every watched sheet.
+    ``style`` "core" gives the results of ``summarize_sheet_stream``
+    (sample std, ``MEASURE_KEYS``), "v2" those of ``stream_measures_events``
+    (population std, CV in percent).  Correlation is not available.
+
+    ``save(results)`` is called before every "refresh", on the job's
+    thread, e.g. to rewrite an output file without blocking a GUI; if it
+    fails, ``("unsaved", exc)`` is yielded and it runs again next time.
+    """
+    selected = [m for m in measures if m != "Correlation"]
+    ddof, cv_scale = (1, 1.0) if style == "core" else (0, 100.0)
+    watcher = Watcher(paths, columns, sheets, k, capacity if "Mode" in selected else None)
+    pending = False
+    refreshed = None
+    while True:
+        changed = watcher.poll()
+        pending = pending or bool(changed)
+        yield ("watching", len(watcher.sources), watcher.rows, sum(changed.values()))
+        if pending and (refreshed is None or time.monotonic() - refreshed >= debounce):
+            results = watcher.results(selected, ddof, cv_scale, mode_ties)
+            if style == "core":
+                results = [(file, sheet_name, {col: {MEASURE_KEYS.get(m, m): v for m, v in stats.items()}
+                                               for col, stats in col_stats.items()})
+                           for file, sheet_name, col_stats in results]
+            if save is not None:
+                try:
+                    save(results)
+                except (ImportError, OSError, ValueError) as exc:
+                    # e.g. the file is open in Excel
+                    yield ("unsaved", exc)
+            yield ("refresh", results)
+            pending = False
+            refreshed = time.monotonic()
+        time.sleep(interval)
+
+
+def watched_measures_table(results, measures, columns=None):
+    """v2 ``watch_events`` results as a ``measures_for_files`` table."""
+    tables = []
+    for file, sheet_name, col_stats in results:
+        sheet_columns = [col for col in columns if col in col_stats] if columns else list(col_stats)
+        table = pd.DataFrame(measures_rows(sheet_name, sheet_columns, col_stats, measures))
+        table.insert(0, "File", os.path.basename(file))
+        tables.append(table)
+    if not tables:
+        return pd.DataFrame()
+    table = pd.concat(tables, ignore_index=True)
+    return table if table["File"].nunique() > 1 else table.drop(columns="File")
@@ -0,0 +1,342 @@
+"""Figures for the Plots tab of CoreSummaryStat_v2.
+
+Figures are built with ``matplotlib.figure.Figure`` on the Agg canvas
+rather than pyplot, so they hold no global state and can be drawn off
+the Tk main thread or in worker processes.
+
+Every plot is described by a ``PlotSpec`` and rendered once to PNG
+bytes.  The bytes are kept in ``PLOT_CACHE``, keyed by the data (file
+fingerprint and sheet, or a hash of the columns), the plot type, the
+columns and ``STYLE``, so the preview shows cached images and "Save
+Plots" writes the same bytes without drawing anything again.
+
+Columns with more than ``LARGE_ROWS`` values are reduced before drawing
+(see ``binned``): histograms are binned with NumPy, densities and
+violins use an FFT-binned KDE, and boxes are drawn from precomputed
+quartiles with a bounded sample of outliers.  Such plots are labeled
+"binned" with their row count.
+
+"Window Lines" plots (one per column, with a ``rolling.Window``) draw
+the Mean and Median of every window, its Q1-Q3 band and its Min and
+Max against the window end; more than ``LINE_POINTS`` windows are
+thinned to every k-th one.  Preparing and drawing each plot are
+"plot data" and "plot" stages for ``profiling``.
+"""
+
+import io
+import os
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from coresummarystat import binned, profiling
+from coresummarystat.correlation import corr_frame
+from coresummarystat.pipeline import map_tasks, resolve_workers, sheet_source
+from coresummarystat.rolling import LINE_MEASURES, window_summary
+from coresummarystat.store import fingerprint
+
+PLOT_TYPES = ["Histogram", "Boxplot", "Violinplot", "Density Plot", "Correlation Heatmap", "Window Lines"]
+
+# Columns longer than this are plotted from fixed-size summaries
+LARGE_ROWS = 100_000
+
+# Most windows drawn by a "Window Lines" plot
+LINE_POINTS = 5_000
+
+# Part of every cache key: bump when the look of the plots changes
+STYLE = ("pastel", 100, LARGE_ROWS, LINE_POINTS)
+PALETTE, DPI, _, _ = STYLE
+
+# Fewer plots than this to render are drawn on the calling thread
+MIN_POOL_PLOTS = 4
+
+# columns: names drawn; colors: palette index of each column; window: rolling.Window of "Window Lines"
+PlotSpec = namedtuple("PlotSpec", ["sheet", "plot_type", "columns", "colors", "filename", "window"],
+                      defaults=(None,))
+
+
+def _subplots(figsize):
+    fig = Figure(figsize=figsize, dpi=DPI)
+    FigureCanvasAgg(fig)
+    return fig, fig.add_subplot()
+
+
+# ================== Plot specs ===================
+def sheet_specs(sheet, df, selected_cols, selected_plots, window=None):
+    """``PlotSpec`` of every plot to draw for one sheet, in display order.
+
+    ``filename`` is the PNG name used by "Save Plots".  "Window Lines"
+    needs a ``window`` and, with ``window.on``, that column in ``df``.
+    """
+    specs = []
+    present = [(i, col) for i, col in enumerate(selected_cols)
+               if col in df.columns and df[col].notna().any()]
+    for pt in selected_plots:
+        if pt in ["Boxplot", "Violinplot"]:
+            for i, col in present:
+                specs.append(PlotSpec(sheet, pt, (col,), (i,), f"{pt}_{col}_{sheet}.png"))
+        elif pt in ["Histogram", "Density Plot"]:
+            specs.append(PlotSpec(sheet, pt, tuple(c for _, c in present), tuple(i for i, _ in present),
+                                  f"{pt}_{sheet}.png"))
+        elif pt == "Correlation Heatmap" and len(selected_cols) >= 2:
+            specs.append(PlotSpec(sheet, pt, tuple(selected_cols), (), f"Correlation_Heatmap_{sheet}.png"))
+        elif pt == "Window Lines" and window is not None and (window.on is None or window.on in df.columns):
+            for i, col in present:
+                if col != window.on:
+                    specs.append(PlotSpec(sheet, pt, (col,), (i,), f"Window_Lines_{col}_{sheet}.png", window))
+    return specs
+
+
+def reduce_column(plot_type, values):
+    """Fixed-size stand-in for a column longer than ``LARGE_ROWS``."""
+    reduced = {"n": len(values)}
+    if plot_type == "Histogram":
+        reduced["hist"] = binned.histogram(values, bins=20)
+    elif plot_type == "Density Plot":
+        reduced["kde"] = binned.binned_kde(values, cut=3)
+    else:
+        reduced["box"] = binned.box_stats(values)
+        if plot_type == "Violinplot":
+            reduced["kde"] = binned.binned_kde(values, cut=2)
+    return reduced
+
+
+def spec_data(spec, df):
+    """The data ``draw_figure`` needs for ``spec``, small enough to send to a worker.
+
+    Long columns are replaced by ``reduce_column`` summaries and the
+    heatmap gets its correlation matrix rather than the columns.
+    """
+    with profiling.stage("plot data", spec.plot_type, len(df), sheet=spec.sheet):
+        if spec.plot_type == "Correlation Heatmap":
+            return corr_frame(df[list(spec.columns)])
+        if spec.plot_type == "Window Lines":
+            table = window_summary(df, LINE_MEASURES, spec.window, list(spec.columns), ddof=0, cv_scale=100.0)
+            stride = max(1, -(-len(table) // LINE_POINTS))
+            return {"x": table["Window End"].to_numpy()[::stride], "stride": stride,
+                    **{m: table[m].to_numpy()[::stride] for m in LINE_MEASURES}}
+        data = {}
+        for col in spec.columns:
+            values = df[col].dropna().to_numpy()
+            if len(values) > LARGE_ROWS:
+                values = reduce_column(spec.plot_type, values.astype(np.float64))
+            data[col] = values
+        return data
+
+
+def _label_binned(ax, n):
+    ax.text(0.99, 0.99, f"binned, n={n:,}", transform=ax.transAxes, ha="right", va="top",
+            fontsize=8, color="dimgray")
+
+
+def _draw_reduced(ax, pt, col, reduced, color):
+    if pt == "Histogram":
+        counts, edges = reduced["hist"]
+        ax.stairs(counts, edges, fill=True, alpha=0.7, color=color, label=col)
+        ax.set_xlabel(col)
+        ax.set_ylabel("Count")
+    elif pt == "Density Plot":
+        if reduced["kde"] is not None:
+            grid, density = reduced["kde"]
+            ax.fill_between(grid, density, alpha=0.5, color=color, label=col)
+        ax.set_ylabel("Density")
+    elif pt == "Boxplot":
+        ax.bxp([reduced["box"]], positions=[0], widths=0.8, patch_artist=True,
+               boxprops={"facecolor": color}, medianprops={"color": "black"},
+               flierprops={"marker": "d", "markersize": 4})
+        ax.set_xticks([])
+        ax.set_ylabel(col)
+    else:
+        box = reduced["box"]
+        if reduced["kde"] is not None:
+            grid, density = reduced["kde"]
+            half = density / density.max() * 0.4
+            ax.fill_betweenx(grid, -half, half, color=color)
+        ax.vlines(0, box["whislo"], box["whishi"], color="0.3", linewidth=1)
+        ax.vlines(0, box["q1"], box["q3"], color="0.3", linewidth=5)
+        ax.scatter([0], [box["med"]], color="white", s=12, zorder=3)
+        ax.set_xticks([])
+        ax.set_ylabel(col)
+
+
+def draw_figure(spec, data):
+    """Build the ``Figure`` of one ``PlotSpec`` from ``spec_data``."""
+    pastel_colors = sns.color_palette(PALETTE)
+    pt, sheet = spec.plot_type, spec.sheet
+    if pt in ["Boxplot", "Violinplot"]:
+        col = spec.columns[0]
+        fig, ax = _subplots((6, 4))
+        color = pastel_colors[spec.colors[0] % len(pastel_colors)]
+        if isinstance(data[col], dict):
+            _draw_reduced(ax, pt, col, data[col], color)
+            _label_binned(ax, data[col]["n"])
+        elif pt == "Boxplot":
+            sns.boxplot(y=pd.Series(data[col], name=col), color=color, ax=ax)
+        else:
+            sns.violinplot(y=pd.Series(data[col], name=col), color=color, ax=ax)
+        ax.set_title(f"{pt} – {col} (Sheet: {sheet})")
+    elif pt == "Window Lines":
+        col = spec.columns[0]
+        fig, ax = _subplots((8, 4))
+        color = pastel_colors[spec.colors[0] % len(pastel_colors)]
+        x = data["x"]
+        ax.fill_between(x, data["Q1"], data["Q3"], color=color, alpha=0.5, label="Q1–Q3")
+        ax.plot(x, data["Min"], color="0.6", linewidth=0.8, linestyle="--", label="Min / Max")
+        ax.plot(x, data["Max"], color="0.6", linewidth=0.8, linestyle="--")
+        ax.plot(x, data["Median"], color="black", linewidth=1, label="Median")
+        ax.plot(x, data["Mean"], color="tab:red", linewidth=1, label="Mean")
+        window = spec.window
+        ax.set_title(f"{col} – {window.kind} window of {window.size}{'' if window.on else ' rows'} (Sheet: {sheet})")
+        ax.set_xlabel(f"Window end ({window.on})" if window.on else "Window end (row)")
+        ax.set_ylabel(col)
+        ax.legend(fontsize=8)
+        if data["stride"] > 1:
+            ax.text(0.99, 0.01, f"every {data['stride']:,}th window", transform=ax.transAxes, ha="right",
+                    va="bottom", fontsize=8, color="dimgray")
+        fig.autofmt_xdate()
+    elif pt in ["Histogram", "Density Plot"]:
+        fig, ax = _subplots((6, max(4, len(spec.columns) * 0.6)))
+        largest = 0
+        for col, i in zip(spec.columns, spec.colors):
+            color = pastel_colors[i % len(pastel_colors)]
+            if isinstance(data[col], dict):
+                _draw_reduced(ax, pt, col, data[col], color)
+                largest = max(largest, data[col]["n"])
+                continue
+            series = pd.Series(data[col], name=col)
+            if pt == "Histogram":
+                sns.histplot(series, bins=20, alpha=0.7, color=color, label=col, ax=ax)
+            else:
+                sns.kdeplot(series, fill=True, alpha=0.5, color=color, label=col, ax=ax)
+        ax.set_title(f"{pt} – Sheet: {sheet}")
+        ax.legend()
+        if largest:
+            _label_binned(ax, largest)
+    else:
+        fig, ax = _subplots((6, max(4, len(spec.columns) * 0.6)))
+        corr = data
+        mask = np.triu(np.ones_like(corr, dtype=bool))
+        sns.heatmap(corr, mask=mask, cmap="RdYlGn", annot=True, fmt=".2f", ax=ax)
+        ax.set_title(f"Correlation Heatmap – Sheet: {sheet}")
+    return fig
+
+
+def render_png(spec, data):
+    """PNG bytes of one plot, drawn with the Agg backend."""
+    with profiling.stage("plot", f"{spec.plot_type}: {', '.join(map(str, spec.columns))}", sheet=spec.sheet):
+        buf = io.BytesIO()
+        draw_figure(spec, data).savefig(buf, format="png")
+        return buf.getvalue()
+
+
+def _render_task(task):
+    return render_png(*task)
+
+
+def iter_figures(df_dict, selected_cols, selected_plots, window=None):
+    """Yield ``(sheet, plot_type, filename, fig)`` for every plot, uncached."""
+    for sheet, df in df_dict.items():
+        for spec in sheet_specs(sheet, df, selected_cols, selected_plots, window):
+            yield sheet, spec.plot_type, spec.filename, draw_figure(spec, spec_data(spec, df))
+
+
+# ================== Rendering cache ===================
+def data_key(df_dict, sheet, df, columns):
+    """Identity of the data behind a plot: file version and sheet, else a content hash."""
+    source = sheet_source(df_dict, sheet)
+    if source is not None:
+        return fingerprint(source[0]), sheet
+    present = [col for col in columns if col in df.columns]
+    return sheet, int(pd.util.hash_pandas_object(df[present], index=False).sum())
+
+
+class PlotCache:
+    """LRU cache of rendered PNG bytes under a memory budget."""
+
+    def __init__(self, max_bytes=256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            png = self._images.get(key)
+            if png is not None:
+                self._images.move_to_end(key)
+            return png
+
+    def put(self, key, png):
+        with self._lock:
+            if key in self._images:
+                return
+            self._images[key] = png
+            self.nbytes += len(png)
+            while self.nbytes > self.max_bytes:
+                _, old = self._images.popitem(last=False)
+                self.nbytes -= len(old)
+
+    def clear(self):
+        with self._lock:
+            self._images.clear()
+            self.nbytes = 0
+
+
+# Shared by previews and saves within one process
+PLOT_CACHE = PlotCache()
+
+
+def image_events(df_dict, selected_cols, selected_plots, workers=1, cache=None, window=None):
+    """BackgroundTask job: ``("image", sheet, plot_type, filename, png)`` events.
+
+    Cached plots come back immediately; the rest are rendered, in a pool
+    of ``workers`` processes when there are enough of them (0 means one
+    per CPU).  Progress is counted in plots.  ``window`` is the
+    ``rolling.Window`` of "Window Lines" plots.
+    """
+    cache = PLOT_CACHE if cache is None else cache
+    key_cols = list(selected_cols) + ([window.on] if window is not None and window.on else [])
+    entries = []
+    for sheet, df in df_dict.items():
+        key = data_key(df_dict, sheet, df, key_cols)
+        for spec in sheet_specs(sheet, df, selected_cols, selected_plots, window):
+            entries.append((spec, (key, spec.plot_type, spec.columns, spec.colors, spec.window, STYLE), df))
+
+    total = len(entries)
+    yield ("progress", 0, total, "")
+    missing = [cache.get(key) is None for _, key, _ in entries]
+    todo = [(spec, spec_data(spec, df)) for (spec, _, df), miss in zip(entries, missing) if miss]
+    workers = min(resolve_workers(workers), len(todo)) if len(todo) >= MIN_POOL_PLOTS else 1
+    rendered = map_tasks(_render_task, todo, workers, 1)
+    try:
+        for done, ((spec, key, df), miss) in enumerate(zip(entries, missing), 1):
+            png = next(rendered) if miss else cache.get(key)
+            if png is None:
+                # Evicted since the lookup above
+                png = render_png(spec, spec_data(spec, df))
+            cache.put(key, png)
+            yield ("image", spec.sheet, spec.plot_type, spec.filename, png)
+            yield ("progress", done, total, spec.sheet)
+    finally:
+        # Shuts the pool down if the job is cancelled
+        rendered.close()
+
+
+def save_events(df_dict, selected_cols, selected_plots, folder_path, workers=1, cache=None, window=None):
+    """BackgroundTask job: write every plot as PNG into ``folder_path``.
+
+    Plots already previewed are written from the cache without redrawing.
+    """
+    for event in image_events(df_dict, selected_cols, selected_plots, workers, cache, window):
+        if event[0] == "image":
+            filename, png = event[3], event[4]
+            with open(os.path.join(folder_path, filename), "wb") as fh:
+                fh.write(png)
+            yield ("saved", filename)
+        else:
+            yield event
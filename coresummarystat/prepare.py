@@ -0,0 +1,138 @@
+"""Data preparation for the summary engine: compact numeric blocks.
+
+``numeric_block`` turns the numeric columns of a sheet into one 2-D
+Fortran-ordered block with at most one copy: when the numeric columns
+already share one dtype and memory block it is a view of the
+DataFrame's data.  The block is float32 when every column is float32 or
+an integer type float32 holds exactly, float64 otherwise.  The engine
+reads such blocks in slabs of columns and accumulates in float64, so a
+float32 block gives the same results as its float64 copy would.
+
+``compact_frame`` is the opt-in downcasting step applied as sheets are
+read (see ``store.SheetStore``):
+
+- float64 columns become float32 when every value survives the round
+  trip within ``rtol`` (0: exactly, e.g. data that was float32, whole
+  numbers or binary fractions);
+- int64 columns become the smallest integer type holding their values.
+
+That halves the cached sheets and the blocks built from them.  With
+``rtol > 0`` results can differ from float64 ones by about ``rtol``.
+Downcasting is off unless ``CORESUMMARYSTAT_DOWNCAST`` is set ("exact"
+or a tolerance such as "1e-6") or a store is created with ``downcast``.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_numeric_dtype
+
+# dtypes whose values float32 represents exactly
+_FLOAT32_EXACT = {np.dtype(t) for t in (np.float32, np.float16, np.int8, np.uint8, np.int16, np.uint16)}
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+# Elements per slab of columns processed at once (8 MB as float64)
+SLAB_ELEMENTS = 1 << 20
+
+
+def parse_downcast(value):
+    """Downcast tolerance from a setting: None (off), 0.0 ("exact") or a relative tolerance."""
+    if value is None or value is False or str(value).strip().lower() in ("", "off", "no", "false"):
+        return None
+    if value is True or str(value).strip().lower() in ("exact", "on", "yes", "true"):
+        return 0.0
+    rtol = float(value)
+    if rtol < 0:
+        raise ValueError(f"Downcast tolerance must be at least 0, got {value}")
+    return rtol
+
+
+def default_downcast():
+    return parse_downcast(os.environ.get("CORESUMMARYSTAT_DOWNCAST"))
+
+
+# ================== Numeric blocks ===================
+def numeric_columns(df, columns=None):
+    """Names of the numeric columns of ``df``, in frame order.
+
+    Found from the dtypes alone, without copying any data.  ``columns``
+    restricts the result to the given names; names that are missing or
+    not numeric are skipped.
+    """
+    names = [col for col, dtype in df.dtypes.items() if is_numeric_dtype(dtype) and not is_bool_dtype(dtype)]
+    if columns is not None:
+        wanted = set(columns)
+        names = [c for c in names if c in wanted]
+    return names
+
+
+def block_dtype(dtypes):
+    """float32 when every dtype fits in it exactly, else float64."""
+    if dtypes and all(isinstance(dt, np.dtype) and dt in _FLOAT32_EXACT for dt in dtypes):
+        return np.dtype(np.float32)
+    return np.dtype(np.float64)
+
+
+def float_block(block):
+    """``block`` as a 2-D float32 or float64 array, converting other types to float64."""
+    block = np.asarray(block)
+    if block.dtype not in (np.float32, np.float64):
+        block = block.astype(np.float64)
+    return block[:, None] if block.ndim == 1 else block
+
+
+def column_slabs(nrows, ncols):
+    """Column slices of about ``SLAB_ELEMENTS`` elements (at least one column each)."""
+    step = max(1, SLAB_ELEMENTS // max(nrows, 1))
+    return [slice(start, start + step) for start in range(0, ncols, step)]
+
+
+def numeric_block(df, columns=None):
+    """Return (names, dtypes, block) for the numeric columns of ``df``.
+
+    ``columns`` works as in ``numeric_columns``.  ``block`` is a
+    Fortran-ordered float32 or float64 array (see ``block_dtype``) with
+    NaN for missing values.
+    """
+    names = numeric_columns(df, columns)
+    numeric = df[names]
+    dtypes = list(numeric.dtypes)
+    block = numeric.to_numpy(dtype=block_dtype(dtypes), na_value=np.nan)
+    return names, dtypes, np.asfortranarray(block)
+
+
+# ================== Downcasting ===================
+def _fits_float32(values, rtol):
+    finite = values[np.isfinite(values)]
+    if len(finite) == 0:
+        return True
+    if np.abs(finite).max() > _FLOAT32_MAX:
+        return False
+    rounded = finite.astype(np.float32).astype(np.float64)
+    if rtol == 0:
+        return bool(np.array_equal(rounded, finite))
+    return bool(np.all(np.abs(rounded - finite) <= rtol * np.abs(finite)))
+
+
+def compact_frame(df, rtol=0.0):
+    """``df`` with float64 columns as float32 (within ``rtol``) and int64 columns downcast.
+
+    Columns that would lose precision, and non-numeric columns, are kept.
+    Only changed columns are copied.
+    """
+    changed = {}
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == np.float64:
+            values = df.iloc[:, i].to_numpy()
+            if _fits_float32(values, rtol):
+                changed[i] = values.astype(np.float32)
+        elif dtype == np.int64:
+            column = pd.to_numeric(df.iloc[:, i], downcast="integer")
+            if column.dtype != dtype:
+                changed[i] = column.to_numpy()
+    if not changed:
+        return df
+    out = df.copy(deep=False)
+    for i, values in changed.items():
+        out.isetitem(i, values)
+    return out
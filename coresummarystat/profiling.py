@@ -0,0 +1,227 @@
+"""Per-stage timing and memory records of a run.
+
+A ``Profiler`` collects one record per stage of the work on a (file,
+sheet): wall time, CPU time of the thread running the stage (helper
+threads such as BLAS or correlation ``workers`` are not included), rows
+processed and the process's peak resident set size when the stage
+ended.  Stages are:
+
+- "open": opening a workbook (zip, shared strings, sheet list);
+- "read": getting a sheet from the sheet store ("parsed" or "cached");
+- "measure": one shared pass of the engine, with the measures it
+  served (quantiles, Mode, Min/Max, moments), since measures are not
+  computed one by one;
+- "correlation", "group-by", "plot data" and "plot" (one per figure);
+- "stream" (reading and summarizing in chunks) and "disk cache";
+- "export": writing an output file;
+- "display": filling a GUI grid with results.
+
+Code marks stages with ``stage(...)``, which records into the profiler
+made active on the current thread with ``activate`` and does nothing
+otherwise.  ``pipeline.map_tasks`` runs tasks in worker processes
+under their own profiler and merges the records back (the "PID" column
+tells processes apart).  Peak RSS is a high-water mark of the whole
+process, so it shows the stage at which memory peaked rather than what
+each stage used; it needs the ``resource`` module (Unix) or psutil.
+
+``traced(path)`` dumps a cProfile of the enclosed block (``.prof`` for
+pstats/snakeviz, ``.txt`` for a text report) or, for ``.html``, a
+pyinstrument profile.  GUI runs with diagnostics on are traced to the
+path in the ``CORESUMMARYSTAT_PROFILE`` environment variable.  Only the
+calling thread is traced, not worker processes.
+"""
+
+import cProfile
+import functools
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+COLUMNS = ["File", "Sheet", "Stage", "Detail", "Rows", "Wall (s)", "CPU (s)", "Peak RSS (MB)", "PID"]
+_FORMATS = {"Rows": ",.0f", "Wall (s)": ".4f", "CPU (s)": ".4f", "Peak RSS (MB)": ".1f"}
+
+_local = threading.local()
+
+
+def peak_rss():
+    """Peak resident set size of this process so far, in bytes (None when unknown)."""
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+    try:
+        import psutil
+    except ImportError:
+        return None
+    info = psutil.Process().memory_info()
+    return getattr(info, "peak_wset", info.rss)
+
+
+def default_trace():
+    return os.environ.get("CORESUMMARYSTAT_PROFILE") or None
+
+
+class Profiler:
+    """Stage records of one run; safe to add to from several threads."""
+
+    def __init__(self):
+        self.records = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name, detail="", rows=None, file=None, sheet=None):
+        """Record the enclosed block; yields the record so ``rows`` can be set inside it.
+
+        ``file`` and ``sheet`` default to those of the enclosing ``source``.
+        """
+        context = getattr(_local, "source", (None, None))
+        record = {"File": file if file is not None else context[0],
+                  "Sheet": sheet if sheet is not None else context[1],
+                  "Stage": name, "Detail": detail, "Rows": rows}
+        # Thread CPU: other threads' work during the stage is not charged to it
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            record["Wall (s)"] = time.perf_counter() - wall
+            record["CPU (s)"] = time.thread_time() - cpu
+            peak = peak_rss()
+            record["Peak RSS (MB)"] = None if peak is None else peak / 2 ** 20
+            record["PID"] = os.getpid()
+            with self._lock:
+                self.records.append(record)
+
+    def extend(self, records):
+        with self._lock:
+            self.records.extend(records)
+
+    def table(self):
+        """The records as a DataFrame with ``COLUMNS``, file names without folders."""
+        with self._lock:
+            table = pd.DataFrame(self.records, columns=COLUMNS)
+        table["File"] = [os.path.basename(f) if isinstance(f, str) else f for f in table["File"]]
+        table["Rows"] = table["Rows"].astype("Int64")
+        return table
+
+    def rows(self):
+        """Records as tuples in ``COLUMNS`` order, numbers kept as numbers (for ``resultgrid.ResultsModel``)."""
+        return [tuple((None if column in _FORMATS else "") if pd.isna(value) else value
+                      for column, value in zip(COLUMNS, row))
+                for row in self.table().itertuples(index=False, name=None)]
+
+
+def _format_cell(spec, value):
+    return "" if value is None or pd.isna(value) else format(value, spec)
+
+
+# ``ResultsModel(COLUMNS, formatters=FORMATTERS)`` shows ``Profiler.rows()``
+FORMATTERS = {column: functools.partial(_format_cell, spec) for column, spec in _FORMATS.items()}
+
+
+# ================== Active profiler ===================
+def active():
+    """The profiler recording on this thread, or None."""
+    return getattr(_local, "profiler", None)
+
+
+@contextmanager
+def traced(path):
+    """cProfile (or pyinstrument, for .html) the enclosed block into ``path``; None does nothing."""
+    if not path:
+        yield
+        return
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".html":
+        try:
+            from pyinstrument import Profiler as Sampler
+        except ImportError:
+            raise ImportError(".html profiles need pyinstrument (pip install pyinstrument)") from None
+        sampler = Sampler()
+        sampler.start()
+        try:
+            yield
+        finally:
+            sampler.stop()
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(sampler.output_html())
+        return
+    tracer = cProfile.Profile()
+    tracer.enable()
+    try:
+        yield
+    finally:
+        tracer.disable()
+        if ext == ".txt":
+            out = io.StringIO()
+            pstats.Stats(tracer, stream=out).sort_stats("cumulative").print_stats(50)
+            with open(path, "w", encoding="utf-8") as fh:
+                fh.write(out.getvalue())
+        else:
+            tracer.dump_stats(path)
+
+
+@contextmanager
+def activate(profiler):
+    """Record stages of this thread into ``profiler`` (None: leave things as they are)."""
+    if profiler is None:
+        yield
+        return
+    previous = active()
+    _local.profiler = profiler
+    try:
+        yield
+    finally:
+        _local.profiler = previous
+
+
+@contextmanager
+def stage(name, detail="", rows=None, file=None, sheet=None):
+    """``Profiler.stage`` of the active profiler; yields a throwaway record when there is none."""
+    profiler = active()
+    if profiler is None:
+        yield {}
+        return
+    with profiler.stage(name, detail, rows, file, sheet) as record:
+        yield record
+
+
+@contextmanager
+def source(file, sheet):
+    """Attribute stages in the enclosed block to ``file`` and ``sheet``."""
+    previous = getattr(_local, "source", (None, None))
+    _local.source = (file, sheet)
+    try:
+        yield
+    finally:
+        _local.source = previous
+
+
+def run_profiled(profiler, job, *args, **kwargs):
+    """BackgroundTask job: ``job(*args, **kwargs)`` with ``profiler`` active on the job's thread.
+
+    With a profiler the job is also ``traced`` to ``default_trace()``.
+    """
+    with activate(profiler), traced(default_trace() if profiler is not None else None):
+        yield from job(*args, **kwargs)
+
+
+def _call_profiled(func, task):
+    profiler = Profiler()
+    with activate(profiler):
+        result = func(task)
+    return result, profiler.records
+
+
+def profiled_task(func):
+    """``func`` for a worker process: returns ``(func(task), records)``."""
+    return functools.partial(_call_profiled, func)
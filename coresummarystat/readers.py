@@ -0,0 +1,178 @@
+"""Readers for every supported input format, with engine auto-selection.
+
+Each format is read with the fastest engine that is installed:
+
+- ``.xlsx``/``.xlsm``/``.xls``: python-calamine (Rust) when installed,
+  else pandas' default (openpyxl, or xlrd for ``.xls``);
+- ``.csv``: pyarrow's multithreaded CSV reader when pyarrow is
+  installed, else the pandas C parser;
+- ``.parquet`` and ``.feather``/``.arrow`` (Arrow IPC): read natively
+  with pyarrow, one sheet per file.
+
+``columns`` pushes column projection down to the reader: Parquet and
+Arrow files only decode those columns, CSV readers skip the others
+while parsing, and Excel readers drop them before building the frame.
+Names that are not in the file are ignored.  Pass ``engine`` to force
+a particular engine, e.g. to compare them (see ``benchmarks/``).
+"""
+
+import importlib.util
+import os
+
+import pandas as pd
+
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
+# Single-table formats and the name of their only "sheet"
+TABLE_SHEETS = {".csv": "CSV", ".parquet": "Parquet", ".feather": "Arrow", ".arrow": "Arrow"}
+
+INPUT_EXTENSIONS = EXCEL_EXTENSIONS + tuple(TABLE_SHEETS)
+
+# For Tk file dialogs
+FILE_TYPES = [
+    ("Data files", " ".join(f"*{ext}" for ext in INPUT_EXTENSIONS)),
+    ("Excel files", " ".join(f"*{ext}" for ext in EXCEL_EXTENSIONS)),
+    ("CSV files", "*.csv"),
+    ("Parquet", "*.parquet"),
+    ("Arrow IPC", "*.arrow *.feather"),
+]
+
+
+def has_module(name):
+    return importlib.util.find_spec(name) is not None
+
+
+def extension(path):
+    return os.path.splitext(path)[1].lower()
+
+
+def is_table(path):
+    """True for single-table formats (CSV, Parquet, Arrow), False for workbooks."""
+    return extension(path) in TABLE_SHEETS
+
+
+def table_sheet(path):
+    """Sheet name reported for a single-table file ("CSV", "Parquet" or "Arrow")."""
+    return TABLE_SHEETS[extension(path)]
+
+
+def _require_pyarrow(path):
+    if not has_module("pyarrow"):
+        raise ImportError(f"{extension(path)} input needs pyarrow (pip install pyarrow)")
+
+
+# ================== Engines ===================
+def excel_engine():
+    """pandas ``ExcelFile`` engine: "calamine" when installed, else None (pandas' choice)."""
+    return "calamine" if has_module("python_calamine") else None
+
+
+def csv_engine():
+    """pandas ``read_csv`` engine: "pyarrow" when installed, else "c"."""
+    return "pyarrow" if has_module("pyarrow") else "c"
+
+
+def engines():
+    """``{format: engine}`` picked on this machine, for logs and benchmarks."""
+    return {
+        "excel": excel_engine() or "openpyxl",
+        "csv": csv_engine(),
+        "parquet": "pyarrow" if has_module("pyarrow") else "unavailable",
+        "arrow": "pyarrow" if has_module("pyarrow") else "unavailable",
+    }
+
+
+# ================== Column projection ===================
+def _present(header, columns):
+    # Requested names in file order; unknown names are dropped
+    wanted = set(columns)
+    return [c for c in header if c in wanted]
+
+
+def _usecols(columns):
+    return None if columns is None else (lambda c, wanted=frozenset(columns): c in wanted)
+
+
+# ================== Workbooks ===================
+def open_workbook(path, engine=None):
+    """``pd.ExcelFile`` opened with ``engine`` (auto-selected when None)."""
+    return pd.ExcelFile(path, engine=engine or excel_engine())
+
+
+def read_excel_sheet(book, sheet_name, columns=None, nrows=None):
+    """One sheet of an open ``pd.ExcelFile``, limited to ``columns`` and ``nrows``."""
+    return book.parse(sheet_name, usecols=_usecols(columns), nrows=nrows)
+
+
+# ================== Single tables ===================
+def csv_header(path):
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def read_csv(path, columns=None, nrows=None, engine=None):
+    """A CSV file; pyarrow does not support ``nrows``, so samples use the C parser."""
+    engine = engine or csv_engine()
+    if nrows is not None and engine == "pyarrow":
+        engine = "c"
+    if engine == "pyarrow":
+        usecols = None if columns is None else _present(csv_header(path), columns)
+        return pd.read_csv(path, engine="pyarrow", usecols=usecols)
+    return pd.read_csv(path, engine=engine, usecols=_usecols(columns), nrows=nrows)
+
+
+def _arrow_names(path):
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if extension(path) == ".parquet":
+        return pyarrow.parquet.read_schema(path).names
+    with pyarrow.ipc.open_file(path) as reader:
+        return reader.schema.names
+
+
+def _arrow_batches(path, columns, batch_rows):
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    if extension(path) == ".parquet":
+        source = pyarrow.parquet.ParquetFile(path)
+        names = _present(source.schema_arrow.names, columns) if columns is not None else None
+        yield from source.iter_batches(batch_size=batch_rows, columns=names)
+        return
+    with pyarrow.ipc.open_file(path) as reader:
+        names = _present(reader.schema.names, columns) if columns is not None else None
+        for i in range(reader.num_record_batches):
+            batch = reader.get_batch(i)
+            batch = batch.select(names) if names is not None else batch
+            for start in range(0, batch.num_rows, batch_rows):
+                yield batch.slice(start, batch_rows)
+
+
+def read_arrow(path, columns=None, nrows=None):
+    """A Parquet or Arrow IPC file, decoding only ``columns``."""
+    _require_pyarrow(path)
+    if nrows is not None:
+        batch = next(_arrow_batches(path, columns, nrows), None)
+        return pd.DataFrame() if batch is None else batch.to_pandas()
+    if columns is not None:
+        columns = _present(_arrow_names(path), columns)
+    if extension(path) == ".parquet":
+        return pd.read_parquet(path, columns=columns)
+    return pd.read_feather(path, columns=columns)
+
+
+def read_table(path, columns=None, nrows=None, engine=None):
+    """A single-table file of any format in ``TABLE_SHEETS``."""
+    if extension(path) == ".csv":
+        return read_csv(path, columns, nrows, engine)
+    return read_arrow(path, columns, nrows)
+
+
+def iter_table_chunks(path, chunk_rows, columns=None):
+    """Yield DataFrames of at most ``chunk_rows`` rows of a single-table file."""
+    if extension(path) == ".csv":
+        yield from pd.read_csv(path, chunksize=chunk_rows, usecols=_usecols(columns))
+        return
+    _require_pyarrow(path)
+    for batch in _arrow_batches(path, columns, chunk_rows):
+        yield batch.to_pandas()
@@ -0,0 +1,149 @@
+"""Summary results as one long DataFrame, viewed a page at a time.
+
+``ResultsModel`` keeps every (sheet, column, measure, value) row in a
+DataFrame and maintains a filtered and sorted view of row positions.
+Widgets ask for ``rows(start, count)`` and only ever format the rows on
+screen, so showing 500 columns x 16 measures x dozens of sheets costs
+the same as showing one sheet.  ``gridview.VirtualGrid`` is the Tk side.
+"""
+
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["Sheet", "Column", "Measure", "Value"]
+
+
+def format_value(value):
+    """Display text of a result cell: 4 decimals, "NA" for missing."""
+    if isinstance(value, str):
+        return value
+    if value is None or pd.isna(value):
+        return "NA"
+    return f"{value:.4f}"
+
+
+def core_rows(sheet, sheet_summary):
+    """Long-form rows of a ``pipeline.summarize_sheet`` result."""
+    rows = []
+    for col, stats in sheet_summary.items():
+        if col == "Correlation":
+            rows.append((sheet, "Correlation", "", "See Excel Output"))
+            continue
+        rows.extend((sheet, col, measure, value) for measure, value in stats.items())
+    return rows
+
+
+def measures_rows(sheet, present, empty, results, measures):
+    """Long-form rows of a v2 ``measures_events`` "sheet" event."""
+    rows = []
+    for col in present:
+        if col in empty:
+            rows.append((sheet, col, "", "No numeric data"))
+        elif col not in results:
+            rows.extend((sheet, col, m, "Error") for m in measures)
+        else:
+            rows.extend((sheet, col, m, results[col][m]) for m in measures)
+    return rows
+
+
+def grouped_rows(sheet, table, keys, measures):
+    """Long-form rows of a ``groupby.group_summary`` table; the group is shown with the sheet."""
+    labels = [" | ".join([str(sheet)] + [f"{key}={value}" for key, value in zip(keys, group)])
+              for group in table[keys].itertuples(index=False, name=None)]
+    return _labeled_rows(labels, table, measures)
+
+
+def windowed_rows(sheet, table, measures):
+    """Long-form rows of a ``rolling.window_summary`` table; the window is shown with the sheet."""
+    labels = [f"{sheet} | {start} – {end}" for start, end in zip(table["Window Start"], table["Window End"])]
+    return _labeled_rows(labels, table, measures)
+
+
+def _labeled_rows(labels, table, measures):
+    rows = []
+    for label, col, values in zip(labels, table["Column"], table[measures].itertuples(index=False, name=None)):
+        rows.extend(zip([label] * len(measures), [col] * len(measures), measures, values))
+    return rows
+
+
+class ResultsModel:
+    """Filtered, sorted view over long-form results."""
+
+    def __init__(self, columns=COLUMNS, formatter=format_value, formatters=None):
+        self.columns = list(columns)
+        self.formatter = formatter
+        # Display text per column; the frame keeps raw values so numbers sort as numbers
+        self.formatters = {"Value": formatter} if formatters is None else dict(formatters)
+        self.filters = {}
+        self.sort_column = None
+        self.ascending = True
+        self.clear()
+
+    def clear(self):
+        self._frame = pd.DataFrame(columns=self.columns)
+        self._pending = []
+        self._view = None
+
+    @property
+    def frame(self):
+        """All rows, in the order they were added."""
+        if self._pending:
+            chunk = pd.DataFrame(self._pending, columns=self.columns)
+            self._frame = chunk if self._frame.empty else pd.concat([self._frame, chunk], ignore_index=True)
+            self._pending = []
+        return self._frame
+
+    def append(self, rows):
+        """Add a list of row tuples (in ``columns`` order)."""
+        if rows:
+            self._pending.extend(rows)
+            self._view = None
+
+    def set_filter(self, column, text):
+        """Keep rows whose ``column`` contains ``text`` (case-insensitive); "" clears it."""
+        if text:
+            self.filters[column] = text
+        else:
+            self.filters.pop(column, None)
+        self._view = None
+
+    def sort(self, column, ascending=None):
+        """Sort by ``column``; without ``ascending`` a repeated call flips the order."""
+        if ascending is None:
+            ascending = not self.ascending if column == self.sort_column else True
+        self.sort_column, self.ascending = column, ascending
+        self._view = None
+
+    def _sort_key(self, values):
+        # Numbers sort as numbers; text such as "NA" or "Error" goes last
+        numeric = pd.to_numeric(values, errors="coerce")
+        if numeric.notna().any():
+            return numeric
+        return values.astype(str).str.lower()
+
+    @property
+    def view(self):
+        """Positions into ``frame`` of the filtered, sorted rows."""
+        if self._view is None:
+            frame = self.frame
+            keep = np.ones(len(frame), dtype=bool)
+            for column, text in self.filters.items():
+                keep &= frame[column].astype(str).str.contains(text, case=False, regex=False).to_numpy()
+            view = np.flatnonzero(keep)
+            if self.sort_column is not None and len(view):
+                key = self._sort_key(frame[self.sort_column].iloc[view])
+                order = key.reset_index(drop=True).sort_values(ascending=self.ascending, kind="stable",
+                                                               na_position="last").index
+                view = view[order.to_numpy()]
+            self._view = view
+        return self._view
+
+    def __len__(self):
+        return len(self.view)
+
+    def rows(self, start, count):
+        """Formatted rows ``start:start + count`` of the view."""
+        positions = self.view[start:start + count]
+        page = self.frame.iloc[positions]
+        formatters = [self.formatters.get(c, str) for c in self.columns]
+        return [tuple(f(v) for f, v in zip(formatters, row)) for row in page.itertuples(index=False)]
@@ -0,0 +1,236 @@
+"""Measures over sliding or tumbling windows of time-ordered rows.
+
+A ``Window`` is a number of rows or, with ``on``, a duration of a
+timestamp column ("15min", "1h", "7D").  Rows are put in ``on`` order
+first; rows without a valid timestamp are left out.
+
+- Sliding windows end at every ``step``-th row, from the first full
+  window on (row windows), or at every ``step``-th distinct timestamp
+  ``t``, covering ``(t - size, t]`` (time windows).
+- Tumbling windows cut the rows into consecutive blocks of ``size``
+  rows, or into intervals of ``size`` aligned on the epoch, as
+  ``DataFrame.resample`` does.
+
+Tumbling windows do not overlap, so they are groups and are summarized
+by ``groupby.group_column``: every measure, exact quantiles, one sort
+per column.  Sliding windows are computed from the (start, end) rows of
+every window, for all columns at once:
+
+- Count, Mean, Variance, Std Dev and CV from prefix sums of the counts,
+  values and squared values (centered on each column's mean to limit
+  cancellation), so any number of windows costs O(n);
+- Min and Max with pandas' variable-window kernels (a monotonic deque,
+  O(n)), and Median and quartiles with its skip list (O(n log w)), fed
+  the same bounds through a ``BaseIndexer``.
+
+Mode, Skewness, Kurtosis and Mean Absolute Deviation are NaN in sliding
+windows.  Windows with fewer than ``min_periods`` values in a column
+get NaN measures for that column.
+"""
+
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+from pandas.api.indexers import BaseIndexer
+
+from coresummarystat.engine import QUANTILES, canonical
+from coresummarystat.groupby import group_column
+from coresummarystat.moments import finish_moments
+from coresummarystat.prepare import column_slabs, numeric_block
+
+KINDS = ["sliding", "tumbling"]
+
+SLIDING_MEASURES = ({"Mean", "Variance", "Standard Deviation", "Coefficient of Variation", "Min", "Max", "Range",
+                     "IQR", "Quartile Deviation"} | set(QUANTILES))
+
+# From running sums of each sliding window
+MOMENT_MEASURES = {"Mean", "Variance", "Standard Deviation", "Coefficient of Variation"}
+# From pandas' variable-window kernels
+ORDER_MEASURES = {"Min", "Max", "Q1", "Median", "Q3"}
+
+# Lines of the "Window Lines" plot
+LINE_MEASURES = ["Mean", "Median", "Q1", "Q3", "Min", "Max"]
+
+# size: rows (int) or a pandas duration string when ``on`` names a timestamp column
+Window = namedtuple("Window", ["size", "kind", "on", "step", "min_periods"], defaults=("sliding", None, 1, 1))
+
+
+def parse_window(size, kind="sliding", on=None, step=1, min_periods=1):
+    """``Window`` from user input; raises ValueError for an invalid one."""
+    if kind not in KINDS:
+        raise ValueError(f"Unknown window kind: {kind!r} (choose from {', '.join(KINDS)})")
+    text = str(size).strip()
+    if text.isdigit():
+        size = int(text)
+        if size < 1:
+            raise ValueError("A window must span at least one row")
+    else:
+        if not on:
+            raise ValueError(f"A window of {text!r} needs a timestamp column to be measured on")
+        if pd.Timedelta(text) <= pd.Timedelta(0):
+            raise ValueError(f"A window must be longer than zero, got {text!r}")
+        size = text
+    if int(step) < 1 or int(min_periods) < 1:
+        raise ValueError("Window step and minimum count must be at least 1")
+    return Window(size, kind, on or None, int(step), int(min_periods))
+
+
+def _times(df, on):
+    # Rows with a timestamp, in time order, and their times as int64 nanoseconds
+    if on not in df.columns:
+        raise ValueError(f"Window column not found: {on}")
+    times = pd.to_datetime(df[on], errors="coerce")
+    if times.dt.tz is not None:
+        times = times.dt.tz_convert(None)
+    times = times.to_numpy(dtype="datetime64[ns]")
+    keep = ~np.isnat(times)
+    order = np.flatnonzero(keep)[np.argsort(times[keep], kind="stable")]
+    return df.iloc[order], times[order].view(np.int64)
+
+
+def _label(values, times):
+    # Row numbers (1-based) or timestamps
+    if times is None:
+        return values + 1
+    return pd.to_datetime(times[values])
+
+
+class _Bounds(BaseIndexer):
+    """Precomputed window bounds, one (start, end) per row."""
+
+    def get_window_bounds(self, num_values=0, min_periods=None, center=None, closed=None, step=None):
+        return self.start, self.end
+
+
+def sliding_bounds(n, window, times=None):
+    """``(starts, ends, emit)``: rows ``[starts[i], ends[i])`` of the window ending at row ``i``.
+
+    ``emit`` are the rows whose windows are reported.
+    """
+    rows = np.arange(n, dtype=np.int64)
+    if isinstance(window.size, int):
+        starts = np.maximum(rows + 1 - window.size, 0)
+        ends = rows + 1
+        emit = rows[window.size - 1::window.step]
+    else:
+        width = pd.Timedelta(window.size).value
+        starts = np.searchsorted(times, times - width, side="right").astype(np.int64)
+        ends = np.searchsorted(times, times, side="right").astype(np.int64)
+        # One window per distinct timestamp, ending at its last row
+        emit = np.flatnonzero(ends == rows + 1)[::window.step]
+    return starts, ends, emit
+
+
+def tumbling_codes(n, window, times=None):
+    """Window number of every row."""
+    if isinstance(window.size, int):
+        return np.arange(n, dtype=np.intp) // window.size
+    width = pd.Timedelta(window.size).value
+    _, codes = np.unique(times // width, return_inverse=True)
+    return codes.astype(np.intp)
+
+
+def _sliding_measures(block, starts, ends, emit, measures, ddof, cv_scale):
+    wanted = {canonical(m) for m in measures}
+    need = set(wanted)
+    if need & {"IQR", "Quartile Deviation"}:
+        need |= {"Q1", "Q3"}
+    if "Q2" in need:
+        need.add("Median")
+    if "Range" in need:
+        need |= {"Min", "Max"}
+    nwin, ncols = len(emit), block.shape[1]
+    s, e = starts[emit], ends[emit]
+    counts = np.empty((nwin, ncols), dtype=np.int64)
+    res = {m: np.full((nwin, ncols), np.nan) for m in need & (MOMENT_MEASURES | ORDER_MEASURES)}
+    for cols in column_slabs(*block.shape):
+        values = np.asarray(block[:, cols], dtype=np.float64)
+        kept = ~np.isnan(values)
+        center = np.where(kept, values, 0.0).sum(axis=0) / np.maximum(kept.sum(axis=0), 1)
+        dev = np.where(kept, values - center, 0.0)
+        zero = np.zeros((1, dev.shape[1]))
+        n = np.vstack([zero.astype(np.int64), np.cumsum(kept, axis=0)])
+        s1 = np.vstack([zero, np.cumsum(dev, axis=0)])
+        s2 = np.vstack([zero, np.cumsum(dev * dev, axis=0)])
+        count = n[e] - n[s]
+        sum1 = s1[e] - s1[s]
+        safe = np.maximum(count, 1)
+        m2 = np.maximum(s2[e] - s2[s] - sum1 * sum1 / safe, 0.0)
+        mean = np.where(count > 0, sum1 / safe + center, np.nan)
+        counts[:, cols] = count
+        moments = finish_moments(count, mean, m2, None, None, need & MOMENT_MEASURES, ddof, cv_scale)
+        for name in need & MOMENT_MEASURES:
+            res[name][:, cols] = moments[name]
+
+        if not need & ORDER_MEASURES:
+            continue
+        rolled = pd.DataFrame(values).rolling(_Bounds(start=starts, end=ends), min_periods=1)
+        if "Min" in need:
+            res["Min"][:, cols] = rolled.min().to_numpy()[emit]
+        if "Max" in need:
+            res["Max"][:, cols] = rolled.max().to_numpy()[emit]
+        for name in ["Q1", "Median", "Q3"]:
+            if name in need:
+                res[name][:, cols] = rolled.quantile(QUANTILES[name], interpolation="linear").to_numpy()[emit]
+    if "Q2" in need:
+        res["Q2"] = res["Median"]
+    if "Range" in need:
+        res["Range"] = res["Max"] - res["Min"]
+    if need & {"IQR", "Quartile Deviation"}:
+        res["IQR"] = res["Q3"] - res["Q1"]
+        res["Quartile Deviation"] = res["IQR"] / 2
+    return {m: res.get(canonical(m), np.full((nwin, ncols), np.nan)) for m in measures}, counts
+
+
+def window_summary(df, measures, window, columns=None, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+    """Long table of ``measures`` per window of ``window`` and numeric column of ``df``.
+
+    One row per (window, column), in window order then column order,
+    with "Window Start", "Window End" (1-based row numbers, or
+    timestamps with ``window.on``), "Column", "Count" and a column per
+    measure.  ``ddof``, ``cv_scale`` and ``mode_ties`` work as in
+    ``engine.summarize_block``.
+    """
+    times = None
+    if window.on is not None:
+        df, times = _times(df, window.on)
+        df = df.drop(columns=[window.on])
+    names, _, block = numeric_block(df, columns)
+    n, ncols = block.shape
+
+    if window.kind == "sliding":
+        starts, ends, emit = sliding_bounds(n, window, times)
+        values, counts = _sliding_measures(block, starts, ends, emit, measures, ddof, cv_scale)
+        if isinstance(window.size, int):
+            first, last = _label(starts[emit], times), _label(ends[emit] - 1, times)
+        else:
+            last = pd.to_datetime(times[emit])
+            first = last - pd.Timedelta(window.size)
+    else:
+        codes = tumbling_codes(n, window, times)
+        nwin = int(codes.max()) + 1 if n else 0
+        values = {m: np.empty((nwin, ncols)) for m in measures}
+        counts = np.empty((nwin, ncols), dtype=np.int64)
+        for j in range(ncols):
+            results, counts[:, j] = group_column(block[:, j], codes, nwin, measures, ddof, cv_scale, mode_ties)
+            for m in measures:
+                values[m][:, j] = results[m]
+        offsets = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]]) if n else np.empty(0, dtype=np.intp)
+        if isinstance(window.size, int):
+            first, last = _label(offsets, times), _label(np.r_[offsets[1:], n] - 1, times)
+        else:
+            width = pd.Timedelta(window.size)
+            first = pd.to_datetime(times[offsets] // width.value * width.value)
+            last = first + width
+
+    too_few = counts < window.min_periods
+    table = pd.DataFrame({
+        "Window Start": np.repeat(np.asarray(first), ncols),
+        "Window End": np.repeat(np.asarray(last), ncols),
+        "Column": names * len(counts),
+        "Count": counts.ravel(),
+    })
+    for m in measures:
+        table[m] = np.where(too_few, np.nan, values[m]).ravel()
+    return table
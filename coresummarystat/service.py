@@ -0,0 +1,398 @@
+"""Local summary service: warm worker processes shared by several apps.
+
+Start it once per machine (or per team share) with::
+
+    python -m coresummarystat.service --workers 4
+    python -m coresummarystat.service --address unix:/tmp/coresummarystat.sock
+
+and point the apps at it with ``CORESUMMARYSTAT_SERVICE`` (e.g.
+``127.0.0.1:8765`` or ``unix:/tmp/coresummarystat.sock``, see
+``client``).  The workers import pandas, SciPy, matplotlib and seaborn
+once, when the service starts, and keep the sheets they parse in their
+``SHEET_STORE`` (and plots in their ``PLOT_CACHE``).  Every file is
+always handled by the same worker, so a workbook is parsed once however
+many apps ask for it.  Whole responses are cached too, keyed by the
+request and the version (mtime, size) of every file it reads: a repeated
+query is answered without reaching a worker.
+
+Each worker runs one task (one sheet) at a time from a queue served
+round-robin by request, so a request for one small sheet is not queued
+behind every sheet of a large request made just before it.
+
+The protocol is HTTP/1.1 with JSON bodies (``dumps``/``loads`` also
+carry DataFrames, bytes and NaN), one request per connection:
+
+- ``GET /status``: workers, queued tasks and cached responses;
+- ``POST /sheets`` ``{"path"}``: sheet names;
+- ``POST /columns`` ``{"path", "sheet"}``: ``metadata.sheet_info`` fields;
+- ``POST /summary`` ``{"files", "measures", "columns", "sheets", "style",
+  "quantiles", "mode_ties", "corr"}``: ``[file, sheet, summary]`` items
+  (``summarize_sheet`` for style "core", the "sheet" events of
+  ``measures_events`` for "v2");
+- ``POST /plots`` ``{"path", "sheets", "columns", "plots"}``:
+  ``[sheet, plot_type, filename, png]`` items as from ``image_events``.
+
+Errors come back as ``{"error": message}`` with status 400 (bad
+request), 404 (no such file) or 500.  There is no authentication:
+listen on localhost or a Unix socket only.
+"""
+
+import argparse
+import asyncio
+import base64
+import importlib
+import itertools
+import json
+import os
+import signal
+import socket
+import sys
+import zlib
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from coresummarystat import metadata, pipeline
+from coresummarystat.store import SHEET_STORE, LazySheets, fingerprint
+
+DEFAULT_ADDRESS = "127.0.0.1:8765"
+
+# Responses kept for repeated requests
+CACHE_ENTRIES = 256
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+
+# ================== Wire format ===================
+def _plain(obj):
+    # JSON-compatible copy; dicts with other than string keys keep their keys as pairs
+    if isinstance(obj, dict):
+        if all(isinstance(k, str) for k in obj):
+            return {k: _plain(v) for k, v in obj.items()}
+        return {"__items__": [[_plain(k), _plain(v)] for k, v in obj.items()]}
+    if isinstance(obj, (list, tuple)):
+        return [_plain(v) for v in obj]
+    if isinstance(obj, (set, frozenset)):
+        return {"__set__": [_plain(v) for v in obj]}
+    if isinstance(obj, pd.DataFrame):
+        return {"__frame__": {"columns": _plain(list(obj.columns)), "index": _plain(list(obj.index)),
+                              "index_name": obj.index.name, "data": _plain(obj.to_numpy(dtype=object).tolist())}}
+    if isinstance(obj, bytes):
+        return {"__bytes__": base64.b64encode(obj).decode("ascii")}
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if obj is pd.NA or obj is pd.NaT:
+        return None
+    return obj
+
+
+def _revive(obj):
+    if "__items__" in obj:
+        return {_hashable(k): v for k, v in obj["__items__"]}
+    if "__set__" in obj:
+        return {_hashable(v) for v in obj["__set__"]}
+    if "__frame__" in obj:
+        frame = obj["__frame__"]
+        df = pd.DataFrame(frame["data"], index=frame["index"], columns=frame["columns"])
+        df.index.name = frame["index_name"]
+        return df.infer_objects()
+    if "__bytes__" in obj:
+        return base64.b64decode(obj["__bytes__"])
+    return obj
+
+
+def _hashable(value):
+    return tuple(value) if isinstance(value, list) else value
+
+
+def dumps(obj):
+    """UTF-8 JSON of ``obj``, including DataFrames, bytes, sets and NaN."""
+    return json.dumps(_plain(obj)).encode("utf-8")
+
+
+def loads(data):
+    return json.loads(data, object_hook=_revive)
+
+
+def parse_address(address):
+    """``("unix", path)`` or ``("tcp", host, port)`` of ``host:port`` or ``unix:path``."""
+    if address.startswith("unix:"):
+        return ("unix", address[len("unix:"):])
+    address = address.removeprefix("http://").rstrip("/")
+    host, _, port = address.rpartition(":")
+    if not host or not port.isdigit():
+        raise ValueError(f"Service address must be host:port or unix:path, got {address!r}")
+    return ("tcp", host, int(port))
+
+
+# ================== Worker tasks ===================
+def _warm():
+    # Pay the imports once, when the worker starts, instead of on its first request
+    importlib.import_module("coresummarystat.plots")
+
+
+def _ping(_):
+    return os.getpid()
+
+
+def _sheet_names_task(path):
+    return SHEET_STORE.sheet_names(path)
+
+
+def _columns_task(task):
+    path, sheet = task
+    return metadata.sheet_info(path, sheet or SHEET_STORE.sheet_names(path)[0])._asdict()
+
+
+def _summary_task(task):
+    file, sheet, measures, columns, style, quantiles, mode_ties, corr = task
+    if style == "core":
+        df = pipeline.read_sheet(file, sheet, columns=columns or None)
+        return pipeline.summarize_sheet(df, measures, columns, quantiles, mode_ties, (file, sheet), corr)
+    sheets = LazySheets(file, [sheet], columns=columns or None)
+    columns = columns or pipeline.numeric_columns(sheets[sheet])
+    events = pipeline.measures_events(sheets, columns, measures, quantiles, mode_ties)
+    # ("sheet", sheet, present, empty, results) without the sheet name
+    return next(event[2:] for event in events if event[0] == "sheet")
+
+
+def _plots_task(task):
+    from coresummarystat import plots
+
+    path, sheet, columns, plot_types = task
+    sheets = LazySheets(path, [sheet], columns=columns)
+    return [event[1:] for event in plots.image_events(sheets, columns, plot_types) if event[0] == "image"]
+
+
+# ================== Scheduling ===================
+class FairQueue:
+    """Queued tasks of several requests, handed out round-robin by request."""
+
+    def __init__(self):
+        self._queues = OrderedDict()   # request id -> deque of tasks
+        self._ready = asyncio.Event()
+
+    def put(self, request, task):
+        self._queues.setdefault(request, deque()).append(task)
+        self._ready.set()
+
+    async def get(self):
+        while not self._queues:
+            self._ready.clear()
+            await self._ready.wait()
+        request, tasks = self._queues.popitem(last=False)
+        task = tasks.popleft()
+        if tasks:
+            # To the back of the line: the next request goes first
+            self._queues[request] = tasks
+        return task
+
+    def __len__(self):
+        return sum(len(tasks) for tasks in self._queues.values())
+
+
+class WorkerPool:
+    """Warm single-process executors, one ``FairQueue`` each; files are pinned to workers."""
+
+    def __init__(self, size):
+        self.size = max(1, size)
+        self._executors = [ProcessPoolExecutor(max_workers=1, initializer=_warm) for _ in range(self.size)]
+        self._queues = [FairQueue() for _ in range(self.size)]
+        self._lanes = []
+
+    async def start(self):
+        self._lanes = [asyncio.create_task(self._lane(i)) for i in range(self.size)]
+        loop = asyncio.get_running_loop()
+        # Start every process now, so the first requests find them warm
+        return await asyncio.gather(*(loop.run_in_executor(ex, _ping, None) for ex in self._executors))
+
+    async def _lane(self, i):
+        loop = asyncio.get_running_loop()
+        while True:
+            func, arg, future = await self._queues[i].get()
+            if future.cancelled():
+                continue
+            try:
+                result = await loop.run_in_executor(self._executors[i], func, arg)
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(result)
+
+    def worker_for(self, path):
+        return zlib.crc32(os.path.abspath(path).encode("utf-8")) % self.size
+
+    def submit(self, request, path, func, arg):
+        """Future of ``func(arg)``, run by the worker that owns ``path``."""
+        future = asyncio.get_running_loop().create_future()
+        self._queues[self.worker_for(path)].put(request, (func, arg, future))
+        return future
+
+    def queued(self):
+        return sum(len(queue) for queue in self._queues)
+
+    def shutdown(self):
+        for lane in self._lanes:
+            lane.cancel()
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# ================== Server ===================
+class SummaryService:
+    """Routes requests to the ``WorkerPool`` and caches whole responses."""
+
+    def __init__(self, workers=1, cache_entries=CACHE_ENTRIES):
+        self.pool = WorkerPool(workers)
+        self.cache_entries = cache_entries
+        self._responses = OrderedDict()   # (endpoint, request, file versions) -> JSON bytes
+        self._requests = itertools.count()
+        self.routes = {
+            ("GET", "/status"): self.status,
+            ("POST", "/sheets"): self.sheets,
+            ("POST", "/columns"): self.columns,
+            ("POST", "/summary"): self.summary,
+            ("POST", "/plots"): self.plots,
+        }
+
+    async def status(self, request, body):
+        return {"workers": self.pool.size, "queued": self.pool.queued(), "cached": len(self._responses),
+                "pid": os.getpid()}
+
+    async def sheets(self, request, body):
+        path = body["path"]
+        return await self.pool.submit(request, path, _sheet_names_task, path)
+
+    async def columns(self, request, body):
+        path = body["path"]
+        return await self.pool.submit(request, path, _columns_task, (path, body.get("sheet")))
+
+    async def _sheet_tasks(self, request, files, sheets):
+        names = await asyncio.gather(*(self.pool.submit(request, f, _sheet_names_task, f) for f in files))
+        return [(file, sheet) for file, file_sheets in zip(files, names)
+                for sheet in file_sheets if not sheets or sheet in sheets]
+
+    async def summary(self, request, body):
+        options = (body["measures"], body.get("columns"), body.get("style", "core"), body.get("quantiles"),
+                   body.get("mode_ties", "smallest"), body.get("corr"))
+        tasks = await self._sheet_tasks(request, body["files"], body.get("sheets"))
+        results = await asyncio.gather(*(self.pool.submit(request, file, _summary_task, (file, sheet) + options)
+                                         for file, sheet in tasks))
+        return [[file, sheet, result] for (file, sheet), result in zip(tasks, results)]
+
+    async def plots(self, request, body):
+        path = body["path"]
+        tasks = await self._sheet_tasks(request, [path], body.get("sheets"))
+        images = await asyncio.gather(*(self.pool.submit(request, path, _plots_task,
+                                                         (path, sheet, body["columns"], body["plots"]))
+                                        for _, sheet in tasks))
+        return [image for sheet_images in images for image in sheet_images]
+
+    def _cache_key(self, method, target, body):
+        if method != "POST":
+            return None
+        files = body.get("files") or [body["path"]]
+        # Raises FileNotFoundError (404) before any work is queued
+        return target, json.dumps(body, sort_keys=True), tuple(fingerprint(f) for f in files)
+
+    async def respond(self, method, target, data):
+        """``(status, JSON bytes)`` of one request."""
+        handler = self.routes.get((method, target))
+        if handler is None:
+            return 404, dumps({"error": f"No such endpoint: {method} {target}"})
+        try:
+            body = json.loads(data) if data else {}
+            key = self._cache_key(method, target, body)
+            if key is not None and key in self._responses:
+                self._responses.move_to_end(key)
+                return 200, self._responses[key]
+            payload = dumps(await handler(next(self._requests), body))
+        except FileNotFoundError as exc:
+            return 404, dumps({"error": str(exc)})
+        except (KeyError, TypeError, ValueError) as exc:
+            return 400, dumps({"error": f"{type(exc).__name__}: {exc}"})
+        except Exception as exc:
+            return 500, dumps({"error": f"{type(exc).__name__}: {exc}"})
+        if key is not None:
+            self._responses[key] = payload
+            while len(self._responses) > self.cache_entries:
+                self._responses.popitem(last=False)
+        return 200, payload
+
+    async def handle(self, reader, writer):
+        try:
+            method, target, _ = (await reader.readline()).decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b"\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                headers[name.strip().lower()] = value.strip()
+            data = await reader.readexactly(int(headers.get("content-length", 0)))
+            status, payload = await self.respond(method, target.split("?")[0], data)
+        except (ValueError, asyncio.IncompleteReadError):
+            status, payload = 400, dumps({"error": "Malformed HTTP request"})
+        except Exception as exc:
+            # Still answer, so the client reports an error instead of a dropped connection
+            status, payload = 500, dumps({"error": f"{type(exc).__name__}: {exc}"})
+        writer.write(f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\nContent-Type: application/json\r\n"
+                     f"Content-Length: {len(payload)}\r\nConnection: close\r\n\r\n".encode("latin-1") + payload)
+        try:
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def serve(self, address=DEFAULT_ADDRESS, ready=None):
+        """Serve until cancelled; ``ready(address)`` is called once listening."""
+        kind, *where = parse_address(address)
+        if kind == "unix" and not hasattr(socket, "AF_UNIX"):
+            raise ValueError("Unix sockets are not available on this platform; use host:port")
+        await self.pool.start()
+        if hasattr(signal, "SIGTERM") and sys.platform != "win32":
+            # Shut the workers down on a plain kill too, not only on Ctrl-C
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+        server = None
+        try:
+            if kind == "unix":
+                server = await asyncio.start_unix_server(self.handle, where[0])
+            else:
+                server = await asyncio.start_server(self.handle, *where)
+            if ready is not None:
+                ready(address)
+            async with server:
+                await server.serve_forever()
+        finally:
+            self.pool.shutdown()
+            if kind == "unix" and server is not None and os.path.exists(where[0]):
+                os.remove(where[0])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m coresummarystat.service", description=__doc__.splitlines()[0])
+    parser.add_argument("--address", default=DEFAULT_ADDRESS,
+                        help=f"host:port or unix:path to listen on (default: {DEFAULT_ADDRESS})")
+    parser.add_argument("-j", "--workers", type=int, default=0,
+                        help="Worker processes (default 0: one per CPU)")
+    parser.add_argument("--cache-entries", type=int, default=CACHE_ENTRIES,
+                        help=f"Responses kept for repeated requests (default: {CACHE_ENTRIES})")
+    args = parser.parse_args(argv)
+
+    service = SummaryService(pipeline.resolve_workers(args.workers), args.cache_entries)
+    try:
+        asyncio.run(service.serve(args.address, lambda address: print(
+            f"Serving on {address} with {service.pool.size} worker(s) (Ctrl-C to stop)", flush=True)))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        pass
+    except (OSError, ValueError) as exc:
+        print(f"coresummarystat.service: error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""Mergeable summaries of single columns, for rollups across sheets and files.
+
+A ``SummaryState`` holds everything needed to report a column without
+its data: the count, mean and M2..M4 (``moments.Moments``), min and max,
+a ``KLLSketch`` for the quantiles and ``HeavyHitters`` for the Mode.
+``merge`` is associative, so states of (file, sheet, column) can be
+combined in any order and grouping, e.g. the same column over 300 daily
+sheets, in time proportional to the number of states.
+
+Moment-based measures of a merged state are exact; Median, quartiles,
+IQR and QD are exact while a column has at most ``k`` values and within
+the sketch's rank error beyond that, and Mode is found as in
+``--stream`` mode.  Mean Absolute Deviation is not available.
+
+States are keyed by ``(file, sheet, column)`` and saved to and loaded
+from JSON with ``save_states``/``load_states``.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from coresummarystat.engine import canonical
+from coresummarystat.mode import DEFAULT_CAPACITY, HeavyHitters
+from coresummarystat.moments import MOMENT_MEASURES, Moments
+from coresummarystat.prepare import numeric_block
+from coresummarystat.sketch import DEFAULT_K, KLLSketch
+
+# How ``rollup`` groups states, by the (file, sheet, column) key
+GROUPINGS = {
+    "column": lambda key: key[2],
+    "file": lambda key: (key[0], key[2]),
+    "sheet": lambda key: (key[1], key[2]),
+}
+
+# Index columns of ``rollup_table`` for each grouping
+GROUP_LABELS = {"column": ["Column"], "file": ["File", "Column"], "sheet": ["Sheet", "Column"]}
+
+
+class SummaryState:
+    """Count, moments, min/max, quantile sketch and mode counters of one column."""
+
+    def __init__(self, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+        self.moments = Moments(1)
+        self.sketch = KLLSketch(k)
+        self.heavy_hitters = HeavyHitters(capacity)
+
+    @classmethod
+    def from_values(cls, values, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+        return cls(k, capacity).update(values)
+
+    @property
+    def count(self):
+        return int(self.moments.n[0])
+
+    def update(self, values):
+        """Fold an array of values (NaN = missing) into the state."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        self.moments.update(values)
+        self.sketch.update(values)
+        self.heavy_hitters.update(values)
+        return self
+
+    def merge(self, other):
+        """Fold ``other`` into this state in place and return self."""
+        self.moments.merge(other.moments)
+        self.sketch.merge(other.sketch)
+        self.heavy_hitters.merge(other.heavy_hitters)
+        return self
+
+    def copy(self):
+        return SummaryState.from_dict(self.to_dict())
+
+    def result(self, measures, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+        """``{measure: value}``; measures a state cannot give (MAD) are NaN."""
+        res = {m: v[0] for m, v in self.moments.result(MOMENT_MEASURES, ddof, cv_scale).items()}
+        q1, median, q3 = self.sketch.quantiles([0.25, 0.5, 0.75])
+        res.update({"Q1": q1, "Median": median, "Q2": median, "Q3": q3,
+                    "IQR": q3 - q1, "Quartile Deviation": (q3 - q1) / 2,
+                    "Mode": self.heavy_hitters.mode(mode_ties)})
+        return {m: res.get(canonical(m), np.nan) for m in measures}
+
+    def to_dict(self):
+        return {"moments": self.moments.to_dict(), "sketch": self.sketch.to_dict(),
+                "mode": self.heavy_hitters.to_dict()}
+
+    @classmethod
+    def from_dict(cls, state):
+        self = cls.__new__(cls)
+        self.moments = Moments.from_dict(state["moments"])
+        self.sketch = KLLSketch.from_dict(state["sketch"])
+        self.heavy_hitters = HeavyHitters.from_dict(state["mode"])
+        return self
+
+
+def frame_states(df, columns=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+    """``{column: SummaryState}`` for the numeric columns of ``df``."""
+    names, _, block = numeric_block(df, columns)
+    return {col: SummaryState.from_values(block[:, j], k, capacity) for j, col in enumerate(names)}
+
+
+# ================== Rollups ===================
+def rollup(states, by="column"):
+    """Merge ``{(file, sheet, column): SummaryState}`` into ``{group: SummaryState}``.
+
+    ``by`` is "column" (across all files and sheets), "file" (per file
+    and column), "sheet" (per sheet name and column, across files) or a
+    function of the key.  The input states are not modified.
+    """
+    group_of = GROUPINGS[by] if isinstance(by, str) else by
+    merged = {}
+    for key, state in states.items():
+        group = group_of(key)
+        if group in merged:
+            merged[group].merge(state)
+        else:
+            merged[group] = state.copy()
+    return merged
+
+
+def rollup_table(states, measures, by="column", ddof=1, cv_scale=1.0, mode_ties="smallest"):
+    """One row per group of ``rollup(states, by)`` with a column per measure and "Count"."""
+    labels = GROUP_LABELS.get(by, ["Group"]) if isinstance(by, str) else ["Group"]
+    rows = []
+    for group, state in rollup(states, by).items():
+        keys = list(group) if len(labels) > 1 else [group]
+        row = dict(zip(labels, keys))
+        if by == "file":
+            row["File"] = os.path.basename(row["File"])
+        row["Count"] = state.count
+        row.update(state.result(measures, ddof, cv_scale, mode_ties))
+        rows.append(row)
+    return pd.DataFrame(rows, columns=labels + ["Count"] + list(measures))
+
+
+# ================== Saved states ===================
+def save_states(states, path):
+    """Write ``{(file, sheet, column): SummaryState}`` to a JSON file."""
+    records = [{"file": file, "sheet": sheet, "column": str(col), "state": state.to_dict()}
+               for (file, sheet, col), state in states.items()]
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(records, fh)
+
+
+def load_states(path):
+    """Read states written by ``save_states``."""
+    with open(path, encoding="utf-8") as fh:
+        records = json.load(fh)
+    return {(r["file"], r["sheet"], r["column"]): SummaryState.from_dict(r["state"]) for r in records}
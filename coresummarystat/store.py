@@ -0,0 +1,225 @@
+"""Session cache of parsed sheets.
+
+Sheets are keyed by ``(path, mtime, size, sheet)`` so an edited file is
+parsed again, while switching sheets or re-running a summary on an
+unchanged file does no parsing at all.  Open workbooks are kept too, so
+reading another sheet of the same file does not reopen the zip or
+re-parse its shared strings.  Files are read through ``readers``, so
+the fastest installed engine is used, and a read limited to some
+columns only decodes those; asking for more columns later reads the
+union and replaces the cached frame.  Sheets are evicted least recently used
+first once their total size exceeds the memory budget.
+
+The budget defaults to 512 MB and can be set with the
+``CORESUMMARYSTAT_CACHE_MB`` environment variable (which also reaches
+worker processes) or per store with ``max_bytes``.  Sheets are
+downcast as they are read (see ``prepare.compact_frame``) when
+``CORESUMMARYSTAT_DOWNCAST`` or ``downcast`` says so.
+
+Cached DataFrames are shared: callers must not modify them in place.
+A forked worker process keeps the parsed sheets of its parent but
+never reads through its open workbooks, whose file offsets are shared.
+"""
+
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from collections.abc import Mapping
+
+from coresummarystat import profiling, readers
+from coresummarystat.prepare import compact_frame, default_downcast, parse_downcast
+
+
+def default_max_bytes():
+    return int(float(os.environ.get("CORESUMMARYSTAT_CACHE_MB", 512)) * 1024 * 1024)
+
+
+def fingerprint(path):
+    """(absolute path, mtime in ns, size) identifying one version of a file."""
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+
+class SheetStore:
+    """LRU cache of parsed sheets under a memory budget."""
+
+    def __init__(self, max_bytes=None, max_books=8, downcast=None):
+        self.max_bytes = default_max_bytes() if max_bytes is None else max_bytes
+        self.max_books = max_books
+        # Tolerance of compact_frame, None for no downcasting
+        self.downcast = default_downcast() if downcast is None else parse_downcast(downcast)
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        # (fingerprint, sheet) -> (DataFrame, nbytes, columns read or None for all)
+        self._sheets = OrderedDict()
+        self._books = OrderedDict()   # fingerprint -> pd.ExcelFile
+        # Parsing is serialized: openpyxl workbooks are not thread-safe
+        self._lock = threading.RLock()
+        _STORES.add(self)
+
+    def _after_fork(self):
+        # The parent's open files share their offsets with ours, and its lock may be held by a thread gone here
+        self._books = OrderedDict()
+        self._lock = threading.RLock()
+
+    # ================== Workbooks ===================
+    def _book(self, fp):
+        book = self._books.get(fp)
+        if book is None:
+            self._forget_path(fp)
+            with profiling.stage("open", file=fp[0]):
+                book = readers.open_workbook(fp[0])
+            self._books[fp] = book
+            while len(self._books) > self.max_books:
+                _, old = self._books.popitem(last=False)
+                old.close()
+        self._books.move_to_end(fp)
+        return book
+
+    def _forget_path(self, fp):
+        # Drop everything cached for older versions of the same file
+        for key in [k for k in self._sheets if k[0][0] == fp[0] and k[0] != fp]:
+            self._drop(key)
+        for old_fp in [k for k in self._books if k[0] == fp[0] and k != fp]:
+            self._books.pop(old_fp).close()
+
+    def sheet_names(self, path):
+        """Sheet names in workbook order (one ``readers.table_sheet`` name for other files)."""
+        if readers.is_table(path):
+            return [readers.table_sheet(path)]
+        with self._lock:
+            return list(self._book(fingerprint(path)).sheet_names)
+
+    # ================== Sheets ===================
+    def _drop(self, key):
+        nbytes = self._sheets.pop(key)[1]
+        self.nbytes -= nbytes
+
+    def _put(self, key, df, columns):
+        nbytes = int(df.memory_usage(index=True, deep=True).sum())
+        if nbytes > self.max_bytes:
+            return
+        self._sheets[key] = (df, nbytes, columns)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            self._drop(next(iter(self._sheets)))
+
+    def _read(self, fp, sheet_name, columns=None, nrows=None):
+        if readers.is_table(fp[0]):
+            df = readers.read_table(fp[0], columns, nrows)
+        else:
+            df = readers.read_excel_sheet(self._book(fp), sheet_name, columns, nrows)
+        return df if self.downcast is None else compact_frame(df, self.downcast)
+
+    def get_sheet(self, path, sheet_name, columns=None):
+        """Parsed DataFrame of one sheet, from the cache when possible.
+
+        With ``columns`` only those columns (the ones present) are read
+        and returned.
+        """
+        fp = fingerprint(path)
+        key = (fp, sheet_name)
+        wanted = None if columns is None else frozenset(columns)
+        with self._lock, profiling.stage("read", file=path, sheet=sheet_name) as record:
+            cached = self._sheets.get(key)
+            if cached is not None and (cached[2] is None or (wanted is not None and wanted <= cached[2])):
+                self.hits += 1
+                self._sheets.move_to_end(key)
+                df = cached[0]
+                record["Detail"] = "cached"
+            else:
+                self.misses += 1
+                if readers.is_table(path):
+                    self._forget_path(fp)
+                if cached is not None:
+                    # Read what was cached before as well, so neither request reads again
+                    self._drop(key)
+                    wanted = None if wanted is None else wanted | cached[2]
+                df = self._read(fp, sheet_name, wanted)
+                self._put(key, df, wanted)
+                record["Detail"] = "parsed"
+            record["Rows"] = len(df)
+        if columns is None or list(df.columns) == list(columns):
+            return df
+        return df[[c for c in df.columns if c in set(columns)]]
+
+    def get_sample(self, path, sheet_name, nrows):
+        """Header and first ``nrows`` rows of a sheet, without a full parse.
+
+        Uses the cached sheet when it holds every column; samples are not cached.
+        """
+        fp = fingerprint(path)
+        with self._lock:
+            cached = self._sheets.get((fp, sheet_name))
+            if cached is not None and cached[2] is None:
+                return cached[0].head(nrows)
+            return self._read(fp, sheet_name, nrows=nrows)
+
+    def get_sheets(self, path, sheets=None):
+        """``{sheet_name: DataFrame}`` for ``sheets`` (all when None), in workbook order."""
+        names = self.sheet_names(path)
+        if sheets is not None:
+            names = [s for s in names if s in set(sheets)]
+        return {s: self.get_sheet(path, s) for s in names}
+
+    def clear(self):
+        with self._lock:
+            self._sheets.clear()
+            self.nbytes = 0
+            for book in self._books.values():
+                book.close()
+            self._books.clear()
+
+
+class LazySheets(Mapping):
+    """``{sheet_name: DataFrame}`` view that parses a sheet on first access.
+
+    Lets the GUIs keep a sheet selection around without reading anything
+    until a summary or plot actually needs the data.  With ``columns``
+    only those columns of each sheet are read.
+    """
+
+    def __init__(self, path, names=(), store=None, columns=None):
+        self.path = path
+        self.names = list(names)
+        self.store = store or SHEET_STORE
+        self.columns = None if columns is None else list(columns)
+
+    def select(self, columns):
+        """The same sheets, reading only ``columns`` of each."""
+        return LazySheets(self.path, self.names, self.store, columns)
+
+    def add(self, name):
+        if name not in self.names:
+            self.names.append(name)
+
+    def __getitem__(self, name):
+        if name not in self.names:
+            raise KeyError(name)
+        return self.store.get_sheet(self.path, name, self.columns)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def __iter__(self):
+        return iter(self.names)
+
+    def __len__(self):
+        return len(self.names)
+
+
+_STORES = weakref.WeakSet()
+
+
+def _after_fork_in_child():
+    for store in list(_STORES):
+        store._after_fork()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+# Shared by the GUIs and the pipeline within one process
+SHEET_STORE = SheetStore()
@@ -0,0 +1,177 @@
+"""Streaming summaries for CSVs and sheets larger than memory.
+
+Rows are read in chunks of ``chunk_rows`` and folded into per-column
+``Moments`` (exact mean, variance, std, skewness, kurtosis, min, max,
+range and CV), ``KLLSketch`` quantile sketches (median, quartiles, IQR
+and QD within the rank error documented in ``sketch``) and
+``HeavyHitters`` counters (an approximate Mode, exact whenever the mode
+occurs in more than ``n / (capacity + 1)`` rows).  Peak memory is one
+chunk plus the sketches, independent of the file size.
+
+Mean Absolute Deviation needs the whole column and comes back as NaN in
+this mode.
+"""
+
+import datetime
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_timedelta64_dtype
+
+from coresummarystat import profiling, readers
+from coresummarystat.engine import canonical
+from coresummarystat.mode import DEFAULT_CAPACITY, HeavyHitters
+from coresummarystat.moments import MOMENT_MEASURES, Moments
+from coresummarystat.sketch import DEFAULT_K, KLLSketch
+from coresummarystat.state import SummaryState
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+QUANTILE_MEASURES = {"Median": 0.5, "Q1": 0.25, "Q2": 0.5, "Q3": 0.75}
+STREAMING_MEASURES = MOMENT_MEASURES + list(QUANTILE_MEASURES) + ["IQR", "Quartile Deviation", "Mode"]
+
+
+def iter_chunks(path, sheet_name=None, chunk_rows=DEFAULT_CHUNK_ROWS, columns=None):
+    """Yield DataFrames of at most ``chunk_rows`` rows.
+
+    CSVs are read with ``pd.read_csv(chunksize=...)``, Parquet and Arrow
+    files batch by batch (see ``readers.iter_table_chunks``); workbooks row
+    by row from an openpyxl read-only sheet.  ``columns`` restricts what is
+    decoded.
+    """
+    if readers.is_table(path):
+        yield from readers.iter_table_chunks(path, chunk_rows, columns)
+        return
+
+    import openpyxl
+
+    wb = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = wb[sheet_name].iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keep = [i for i, c in enumerate(header) if columns is None or c in set(columns)]
+        names = [header[i] for i in keep]
+        batch = []
+        for row in rows:
+            batch.append([row[i] if i < len(row) else None for i in keep])
+            if len(batch) == chunk_rows:
+                yield pd.DataFrame(batch, columns=names)
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=names)
+    finally:
+        wb.close()
+
+
+def _is_temporal(value):
+    return isinstance(value, (datetime.date, datetime.time, datetime.timedelta, np.datetime64, np.timedelta64))
+
+
+def _numeric_columns(chunk):
+    # The columns a whole-sheet read makes numeric: numbers, or text that parses as numbers;
+    # dates and durations (which would coerce to nanoseconds) and booleans are left out
+    names = []
+    for col in chunk.columns:
+        series = chunk[col].infer_objects()
+        dtype = series.dtype
+        if is_bool_dtype(dtype) or is_datetime64_any_dtype(dtype) or is_timedelta64_dtype(dtype):
+            continue
+        if dtype == object and series.map(lambda v: isinstance(v, bool) or _is_temporal(v)).any():
+            continue
+        converted = pd.to_numeric(series, errors="coerce")
+        if converted.notna().sum() == series.notna().sum():
+            names.append(col)
+    return names
+
+
+def _chunk_block(chunk, names):
+    return np.column_stack([
+        pd.to_numeric(chunk[col], errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        for col in names
+    ])
+
+
+class StreamingSummary:
+    """Running moments, quantile sketches and mode counters for a fixed set of columns."""
+
+    def __init__(self, names, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+        self.names = list(names)
+        self.rows = 0
+        self.moments = Moments(len(self.names))
+        self.sketches = [KLLSketch(k) for _ in self.names]
+        # capacity=None skips Mode tracking
+        self.heavy_hitters = [] if capacity is None else [HeavyHitters(capacity) for _ in self.names]
+
+    def update(self, block):
+        """Fold a 2-D float block (rows x ``names``) into the summary."""
+        self.rows += len(block)
+        self.moments.update(block)
+        for j, sketch in enumerate(self.sketches):
+            sketch.update(block[:, j])
+        for j, counter in enumerate(self.heavy_hitters):
+            counter.update(block[:, j])
+        return self
+
+    def result(self, measures, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+        """``{column: {measure: value}}``; unsupported measures are NaN."""
+        res = self.moments.result([m for m in map(canonical, measures) if m in MOMENT_MEASURES], ddof, cv_scale)
+        quartiles = np.array([s.quantiles([0.25, 0.5, 0.75]) for s in self.sketches]).reshape(-1, 3)
+        res["Q1"], res["Median"], res["Q3"] = quartiles.T
+        res["Q2"] = res["Median"]
+        res["IQR"] = res["Q3"] - res["Q1"]
+        res["Quartile Deviation"] = res["IQR"] / 2
+        if self.heavy_hitters:
+            res["Mode"] = np.array([counter.mode(mode_ties) for counter in self.heavy_hitters])
+        out = {}
+        for j, col in enumerate(self.names):
+            out[col] = {m: res[canonical(m)][j] if canonical(m) in res else np.nan for m in measures}
+        return out
+
+    def states(self):
+        """``{column: state.SummaryState}`` of each column, for rollups."""
+        moments = self.moments.to_dict()
+        out = {}
+        for j, col in enumerate(self.names):
+            heavy_hitters = self.heavy_hitters[j] if self.heavy_hitters else HeavyHitters()
+            out[col] = SummaryState.from_dict({
+                "moments": {f: values[j:j + 1] for f, values in moments.items()},
+                "sketch": self.sketches[j].to_dict(),
+                "mode": heavy_hitters.to_dict(),
+            })
+        return out
+
+
+def _stream(path, sheet_name, columns, chunk_rows, k, capacity):
+    summary = None
+    with profiling.stage("stream", "chunked read and measures", 0, path, sheet_name) as record:
+        for chunk in iter_chunks(path, sheet_name, chunk_rows, columns):
+            if summary is None:
+                summary = StreamingSummary(_numeric_columns(chunk), k, capacity)
+            if summary.names and len(chunk):
+                summary.update(_chunk_block(chunk, summary.names))
+            record["Rows"] = record.get("Rows", 0) + len(chunk)
+    return summary
+
+
+def stream_summary(path, sheet_name, measures, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS,
+                   k=DEFAULT_K, ddof=1, cv_scale=1.0, capacity=DEFAULT_CAPACITY, mode_ties="smallest"):
+    """Summarize the numeric columns of a sheet chunk by chunk.
+
+    Numeric columns are decided from the first chunk; non-numeric values
+    in later chunks count as missing.  Returns ``{column: {measure: value}}``
+    like ``engine.summarize_frame``.  ``capacity`` is the number of
+    Mode counters kept per column.
+    """
+    summary = _stream(path, sheet_name, columns, chunk_rows, k, capacity if "Mode" in measures else None)
+    if summary is None:
+        return {}
+    return summary.result(measures, ddof, cv_scale, mode_ties)
+
+
+def stream_states(path, sheet_name, columns=None, chunk_rows=DEFAULT_CHUNK_ROWS, k=DEFAULT_K,
+                  capacity=DEFAULT_CAPACITY):
+    """``{column: state.SummaryState}`` of a sheet, read chunk by chunk."""
+    summary = _stream(path, sheet_name, columns, chunk_rows, k, capacity)
+    return {} if summary is None else summary.states()
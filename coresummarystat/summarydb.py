@@ -0,0 +1,257 @@
+"""Persistent summary cache in a SQLite file, for repeated runs over the same files.
+
+Everything is keyed by the BLAKE2 hash of the file contents, so a file
+that was copied or touched but not changed is still a hit, and a
+changed file is a miss however it was changed.  Hashes are remembered
+per (path, mtime, size): unchanged files are not even read again.
+
+Per file hash the database keeps:
+
+- the sheet names, so sheets can be listed without opening the workbook;
+- per sheet, which columns exist and which are numeric;
+- one row per (sheet, column, measure, options) summary result, as
+  ``memo`` does in memory;
+- correlation tables;
+- optionally (``keep_columns``) the parsed numeric columns themselves,
+  so adding a measure later does not parse the workbook again.
+
+``pipeline.summarize_files(..., cache=path)`` only reads sheets with
+missing results and assembles everything else from the database.  Use
+``prune`` to drop files not seen for a while.  Connections are per
+process: ``open_db`` forgets the parent's connections in a forked pool
+worker, which opens its own on first use.
+"""
+
+import base64
+import hashlib
+import json
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from coresummarystat.prepare import numeric_columns
+
+HASH_CHUNK = 1024 * 1024
+# Bumped when stored rows change meaning; older tables are dropped on open
+SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT);
+CREATE TABLE IF NOT EXISTS books (digest TEXT PRIMARY KEY, sheets TEXT, last_used REAL);
+CREATE TABLE IF NOT EXISTS sheets (digest TEXT, sheet TEXT, complete INTEGER, PRIMARY KEY (digest, sheet));
+CREATE TABLE IF NOT EXISTS columns (
+    digest TEXT, sheet TEXT, name TEXT, position INTEGER, kind TEXT, data BLOB, dtype TEXT,
+    PRIMARY KEY (digest, sheet, name));
+CREATE TABLE IF NOT EXISTS cells (
+    digest TEXT, sheet TEXT, name TEXT, measure TEXT, options TEXT, value,
+    PRIMARY KEY (digest, sheet, name, measure, options));
+CREATE TABLE IF NOT EXISTS tables (digest TEXT, sheet TEXT, key TEXT, value TEXT, PRIMARY KEY (digest, sheet, key));
+"""
+
+
+def default_path():
+    """``CORESUMMARYSTAT_CACHE_DB``, else ``~/.cache/coresummarystat/summaries.sqlite``."""
+    return os.environ.get("CORESUMMARYSTAT_CACHE_DB") or os.path.join(
+        os.path.expanduser("~"), ".cache", "coresummarystat", "summaries.sqlite")
+
+
+def file_digest(path):
+    """BLAKE2b hash of the contents of ``path``."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+_PICKLED = "pickle:"
+
+
+def _name(col):
+    # Column names keep their type through JSON (str, int, float) or,
+    # for anything else (timestamps, tuples, numpy scalars), a pickle
+    if col is None or type(col) in (str, int, float, bool):
+        return json.dumps(col)
+    return _PICKLED + base64.b64encode(pickle.dumps(col, protocol=4)).decode("ascii")
+
+
+def _label(name):
+    if name.startswith(_PICKLED):
+        return pickle.loads(base64.b64decode(name[len(_PICKLED):]))
+    return json.loads(name)
+
+
+def _value(v):
+    # The untyped value column keeps integers as INTEGER, so integer
+    # Min/Max/Mode come back as ints rather than floats
+    if v is None or pd.isna(v):
+        return None
+    if isinstance(v, (int, np.integer)) and not isinstance(v, (bool, np.bool_)):
+        return int(v)
+    return float(v)
+
+
+def _column_bytes(series):
+    # Plain numpy int/float columns keep their dtype; the rest (nullable,
+    # object) are stored as float64 with NaN for missing values
+    values = series.to_numpy()
+    if values.dtype.kind not in "iuf":
+        values = series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values.tobytes(), values.dtype.str
+
+
+class SummaryDB:
+    """Summary results, column layouts and optionally numeric columns per file hash."""
+
+    def __init__(self, path, keep_columns=False):
+        self.path = path
+        self.keep_columns = keep_columns
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION:
+            # Version 1 stored every value and column as floats
+            with self._conn:
+                for table in ["sheets", "columns", "cells"]:
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+                self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _write(self, sql, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    # ================== Files ===================
+    def digest(self, path):
+        """Content hash of ``path``; re-hashed only when its mtime or size changed."""
+        st = os.stat(path)
+        abspath = os.path.abspath(path)
+        row = self._query("SELECT mtime_ns, size, digest FROM files WHERE path = ?", (abspath,))
+        if row and row[0][:2] == (st.st_mtime_ns, st.st_size):
+            digest = row[0][2]
+        else:
+            digest = file_digest(path)
+            self._write("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                        [(abspath, st.st_mtime_ns, st.st_size, digest)])
+        self._write("UPDATE books SET last_used = ? WHERE digest = ?", [(time.time(), digest)])
+        return digest
+
+    def sheet_names(self, digest):
+        row = self._query("SELECT sheets FROM books WHERE digest = ?", (digest,))
+        return json.loads(row[0][0]) if row else None
+
+    def put_sheet_names(self, digest, names):
+        self._write("INSERT OR REPLACE INTO books VALUES (?, ?, ?)", [(digest, json.dumps(names), time.time())])
+
+    # ================== Column layout ===================
+    def numeric_columns(self, digest, sheet, columns=None):
+        """Numeric columns of a sheet (restricted to ``columns``, in ``columns`` order).
+
+        None when the layout of those columns is not known yet.
+        """
+        if columns is None:
+            complete = self._query("SELECT complete FROM sheets WHERE digest = ? AND sheet = ?", (digest, sheet))
+            if not complete or not complete[0][0]:
+                return None
+        rows = self._query("SELECT name, kind FROM columns WHERE digest = ? AND sheet = ? ORDER BY position",
+                           (digest, sheet))
+        kinds = {_label(name): kind for name, kind in rows}
+        if columns is None:
+            return [col for col, kind in kinds.items() if kind == "numeric"]
+        if any(col not in kinds for col in columns):
+            return None
+        return [col for col in columns if kinds[col] == "numeric"]
+
+    def put_layout(self, digest, sheet, df, columns=None):
+        """Record the columns of ``df``, read with ``columns`` (None: the whole sheet)."""
+        numeric = set(numeric_columns(df))
+        rows = [(digest, sheet, _name(col), i, "numeric" if col in numeric else "other", None, None)
+                for i, col in enumerate(df.columns)]
+        if columns is not None:
+            rows += [(digest, sheet, _name(col), -1, "absent", None, None) for col in columns if col not in df.columns]
+        # A whole-sheet read fixes the positions of columns first seen through a projection
+        self._write("INSERT INTO columns VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT DO UPDATE SET "
+                    "position = excluded.position, kind = excluded.kind", rows)
+        if columns is None:
+            self._write("INSERT OR REPLACE INTO sheets VALUES (?, ?, 1)", [(digest, sheet)])
+        if self.keep_columns and numeric:
+            self._write("UPDATE columns SET data = ?, dtype = ? WHERE digest = ? AND sheet = ? AND name = ?",
+                        [(*_column_bytes(df[col]), digest, sheet, _name(col)) for col in df.columns if col in numeric])
+
+    def load_frame(self, digest, sheet, names):
+        """DataFrame of the stored numeric columns ``names``, or None if any is not stored."""
+        if not names:
+            return None
+        rows = self._query("SELECT name, data, dtype FROM columns WHERE digest = ? AND sheet = ? AND data IS NOT NULL",
+                           (digest, sheet))
+        data = {_label(name): (blob, dtype) for name, blob, dtype in rows}
+        if any(col not in data for col in names):
+            return None
+        return pd.DataFrame({col: np.frombuffer(data[col][0], dtype=data[col][1]) for col in names})
+
+    # ================== Results ===================
+    def get_cells(self, digest, sheet, options):
+        """``{(column, measure): value}`` stored for one sheet and options."""
+        rows = self._query("SELECT name, measure, value FROM cells WHERE digest = ? AND sheet = ? AND options = ?",
+                           (digest, sheet, repr(options)))
+        return {(_label(name), measure): np.nan if value is None else value for name, measure, value in rows}
+
+    def put_cells(self, digest, sheet, options, cells):
+        """Store ``{(column, measure): value}``."""
+        self._write("INSERT OR REPLACE INTO cells VALUES (?, ?, ?, ?, ?, ?)",
+                    [(digest, sheet, _name(col), measure, repr(options), _value(v))
+                     for (col, measure), v in cells.items()])
+
+    def get_table(self, digest, sheet, key):
+        row = self._query("SELECT value FROM tables WHERE digest = ? AND sheet = ? AND key = ?",
+                          (digest, sheet, repr(key)))
+        if not row:
+            return None
+        stored = json.loads(row[0][0])
+        return pd.DataFrame(stored["data"], index=pd.Index(stored["index"], name=stored["index_name"]),
+                            columns=stored["columns"])
+
+    def put_table(self, digest, sheet, key, df):
+        # json writes floats with repr, which round-trips exactly
+        stored = dict(df.to_dict(orient="split"), index_name=df.index.name)
+        self._write("INSERT OR REPLACE INTO tables VALUES (?, ?, ?, ?)",
+                    [(digest, sheet, repr(key), json.dumps(stored))])
+
+    # ================== Maintenance ===================
+    def prune(self, max_age_days=30):
+        """Drop everything about files not seen for ``max_age_days``; returns the number of hashes dropped."""
+        cutoff = time.time() - max_age_days * 86400
+        old = [row[0] for row in self._query("SELECT digest FROM books WHERE last_used < ?", (cutoff,))]
+        for table in ["books", "sheets", "columns", "cells", "tables", "files"]:
+            self._write(f"DELETE FROM {table} WHERE digest = ?", [(d,) for d in old])
+        return len(old)
+
+    def close(self):
+        self._conn.close()
+
+
+_OPEN = {}
+
+if hasattr(os, "register_at_fork"):
+    # SQLite connections must not be used across a fork
+    os.register_at_fork(after_in_child=_OPEN.clear)
+
+
+def open_db(path=None, keep_columns=False):
+    """The ``SummaryDB`` of ``path`` (``default_path()`` when None) for this process, opened on first use."""
+    path = path or default_path()
+    key = (os.path.abspath(path), keep_columns)
+    if key not in _OPEN:
+        _OPEN[key] = SummaryDB(path, keep_columns)
+    return _OPEN[key]
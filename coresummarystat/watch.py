@@ -0,0 +1,245 @@
+"""Running summaries of files that keep growing: watch/tail mode.
+
+A ``CsvTail`` keeps a byte offset into a CSV and, on every ``poll``,
+reads only the bytes appended since the previous one, cut at the last
+complete line, and folds the new rows into a ``streaming.StreamingSummary``
+(running moments, min/max, a quantile sketch and Mode counters per
+column).  A last line without a newline is counted once the file
+stops growing.  An update therefore costs time proportional to the new rows,
+not to the size of the file.  The file is read again from the start
+when it shrinks or is replaced (a new file at the same path), e.g. after
+log rotation.
+
+Other inputs (workbooks, Parquet, Arrow) cannot be tailed: a
+``FileReload`` summarizes them again, chunk by chunk, whenever their
+size or modification time changes.
+
+A ``Watcher`` polls a set of files and folders; folders are listed on
+every poll, so files created later are picked up.  Results are as in
+``--stream`` mode: moment measures are exact, quartiles and Mode
+approximate, Mean Absolute Deviation is not computed.  The numeric
+columns of a file are decided from its first rows, and a quoted field
+spanning several lines is not supported in tailed CSVs.
+"""
+
+import copy
+import io
+import os
+
+import pandas as pd
+
+from coresummarystat import profiling, readers
+from coresummarystat.mode import DEFAULT_CAPACITY
+from coresummarystat.sketch import DEFAULT_K
+from coresummarystat.store import SHEET_STORE, fingerprint
+from coresummarystat.streaming import (DEFAULT_CHUNK_ROWS, StreamingSummary, _chunk_block, _numeric_columns,
+                                       _stream)
+
+# Bytes parsed at a time when catching up with a long file
+BLOCK_BYTES = 16 * 1024 * 1024
+
+
+class CsvTail:
+    """Running summary of a CSV that only reads what was appended since the last poll.
+
+    A last line without a newline is counted once the file stops growing
+    (same size on two polls in a row), but kept apart from the running
+    summary, so a writer that finishes the line later is read correctly.
+    With ``sheets`` the file is read only if its ``readers.table_sheet``
+    name is one of them, as ``FileReload`` does.
+    """
+
+    def __init__(self, path, columns=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY, sheets=None):
+        self.path = path
+        self.columns = None if columns is None else list(columns)
+        self.k = k
+        self.capacity = capacity
+        self.wanted = None if sheets is None else list(sheets)
+        self.reset()
+
+    @property
+    def sheets(self):
+        return [readers.table_sheet(self.path)]
+
+    @property
+    def rows(self):
+        tail = 0 if self.tail is None else len(self.tail)
+        return tail if self.summary is None else self.summary.rows + tail
+
+    def reset(self):
+        self.offset = 0
+        self.header = None
+        self.summary = None
+        self.tail = None   # rows of an unterminated last line, not in ``summary``
+        self._identity = None
+        self._size = None
+
+    def _read_header(self, fh):
+        line = fh.readline()
+        if not line.endswith(b"\n"):
+            return False
+        self.header = list(pd.read_csv(io.BytesIO(line), nrows=0, encoding="utf-8-sig").columns)
+        self.offset = fh.tell()
+        return True
+
+    def _parse(self, data):
+        usecols = None if self.columns is None else [c for c in self.header if c in set(self.columns)]
+        chunk = pd.read_csv(io.BytesIO(data), header=None, names=self.header, usecols=usecols)
+        if self.summary is None:
+            self.summary = StreamingSummary(_numeric_columns(chunk), self.k, self.capacity)
+        return chunk
+
+    def _fold(self, data):
+        chunk = self._parse(data)
+        if self.summary.names and len(chunk):
+            self.summary.update(_chunk_block(chunk, self.summary.names))
+        return len(chunk)
+
+    def poll(self):
+        """Fold complete lines appended since the last poll; returns ``{sheet: new rows}``."""
+        if self.wanted is not None and self.sheets[0] not in self.wanted:
+            return {}
+        st = os.stat(self.path)
+        identity = (st.st_dev, st.st_ino)
+        if st.st_size < self.offset or (self._identity is not None and identity != self._identity):
+            self.reset()
+        self._identity = identity
+        settled = st.st_size == self._size
+        self._size = st.st_size
+        if st.st_size == self.offset or (settled and self.tail is not None):
+            return {}
+        self.tail = None
+        new_rows = 0
+        with open(self.path, "rb") as fh, profiling.stage("stream", "tail", 0, self.path, self.sheets[0]) as record:
+            fh.seek(self.offset)
+            if self.header is None and not self._read_header(fh):
+                return {}
+            pending = b""
+            while True:
+                data = fh.read(BLOCK_BYTES)
+                end = data.rfind(b"\n") + 1
+                if end == 0:
+                    if len(data) < BLOCK_BYTES:
+                        # No complete line yet: wait for the writer to finish it
+                        break
+                    # A line longer than a block: keep reading until it ends
+                    pending += data
+                    continue
+                new_rows += self._fold(pending + data[:end])
+                self.offset += len(pending) + end
+                pending = b""
+                fh.seek(self.offset)
+                if len(data) < BLOCK_BYTES:
+                    break
+            if settled and self.offset < st.st_size:
+                fh.seek(self.offset)
+                rest = fh.read(st.st_size - self.offset)
+                if rest.strip():
+                    self.tail = self._parse(rest)
+                    new_rows += len(self.tail)
+            record["Rows"] = new_rows
+        return {self.sheets[0]: new_rows} if new_rows else {}
+
+    def results(self, measures, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+        """``{sheet: {column: {measure: value}}}`` of the rows read so far."""
+        if self.summary is None:
+            return {}
+        summary = self.summary
+        if self.tail is not None and len(self.tail) and summary.names:
+            summary = copy.deepcopy(summary).update(_chunk_block(self.tail, summary.names))
+        return {self.sheets[0]: summary.result(measures, ddof, cv_scale, mode_ties)}
+
+
+class FileReload:
+    """Summary of a workbook or columnar file, computed again whenever it changes."""
+
+    def __init__(self, path, columns=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY, sheets=None):
+        self.path = path
+        self.columns = None if columns is None else list(columns)
+        self.k = k
+        self.capacity = capacity
+        self.wanted = None if sheets is None else list(sheets)
+        self.summaries = {}
+        self._fingerprint = None
+
+    @property
+    def sheets(self):
+        return list(self.summaries)
+
+    @property
+    def rows(self):
+        return sum(summary.rows for summary in self.summaries.values())
+
+    def poll(self):
+        """Summarize every sheet again if the file changed; returns ``{sheet: rows}``."""
+        fp = fingerprint(self.path)
+        if fp == self._fingerprint:
+            return {}
+        self._fingerprint = fp
+        names = SHEET_STORE.sheet_names(self.path)
+        self.summaries = {}
+        for sheet in names:
+            if self.wanted is None or sheet in self.wanted:
+                summary = _stream(self.path, sheet, self.columns, DEFAULT_CHUNK_ROWS, self.k, self.capacity)
+                if summary is not None:
+                    self.summaries[sheet] = summary
+        return {sheet: summary.rows for sheet, summary in self.summaries.items()}
+
+    def results(self, measures, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+        return {sheet: summary.result(measures, ddof, cv_scale, mode_ties)
+                for sheet, summary in self.summaries.items()}
+
+
+class Watcher:
+    """Incremental summaries of files and of every input file in some folders."""
+
+    def __init__(self, paths, columns=None, sheets=None, k=DEFAULT_K, capacity=DEFAULT_CAPACITY):
+        self.paths = list(paths)
+        self.columns = columns or None
+        self.sheets = sheets or None
+        self.k = k
+        self.capacity = capacity
+        self.sources = {}   # file -> CsvTail or FileReload, in discovery order
+
+    def files(self):
+        """Input files currently matched by ``paths``, sorted within each folder."""
+        files = []
+        for path in self.paths:
+            if os.path.isdir(path):
+                files.extend(sorted(os.path.join(path, name) for name in os.listdir(path)
+                                    if name.lower().endswith(readers.INPUT_EXTENSIONS)))
+            elif os.path.isfile(path):
+                files.append(path)
+        return list(dict.fromkeys(files))
+
+    def poll(self):
+        """Read what changed; returns ``{(file, sheet): new rows}`` of the sheets that did."""
+        changed = {}
+        current = self.files()
+        for file in [f for f in self.sources if f not in current]:
+            # Deleted files drop out of the results
+            del self.sources[file]
+            changed[file, None] = 0
+        for file in current:
+            source = self.sources.get(file)
+            if source is None:
+                if readers.extension(file) == ".csv":
+                    source = CsvTail(file, self.columns, self.k, self.capacity, self.sheets)
+                else:
+                    source = FileReload(file, self.columns, self.k, self.capacity, self.sheets)
+                self.sources[file] = source
+            changed.update(((file, sheet), rows) for sheet, rows in source.poll().items())
+        return changed
+
+    @property
+    def rows(self):
+        """Rows read from every watched file."""
+        return sum(source.rows for source in self.sources.values())
+
+    def results(self, measures, ddof=1, cv_scale=1.0, mode_ties="smallest"):
+        """``[(file, sheet, {column: {measure: value}})]`` of every sheet, in file order."""
+        out = []
+        for file, source in self.sources.items():
+            for sheet, stats in source.results(measures, ddof, cv_scale, mode_ties).items():
+                out.append((file, sheet, stats))
+        return out
@@ -0,0 +1,87 @@
+"""Run long jobs off the Tk main thread.
+
+A job is a generator function.  Everything it yields is put on a
+thread-safe queue; the GUI drains the queue from ``root.after`` so
+widgets are only ever touched on the main thread.  Cancellation is
+checked between yielded items, and everything yielded before the cancel
+is still delivered.
+"""
+
+import queue
+import threading
+
+
+class BackgroundTask:
+    """A generator job running on a daemon thread.
+
+    Events delivered to the handler are the yielded tuples, followed by
+    ``("error", exc)`` if the job raised and always a final
+    ``("done", cancelled)``.
+    """
+
+    def __init__(self, job, *args, **kwargs):
+        self.events = queue.Queue()
+        self.finished = False
+        self._job = job
+        self._args = args
+        self._kwargs = kwargs
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """Stop after the item currently being computed."""
+        self._cancel.set()
+
+    def _run(self):
+        gen = self._job(*self._args, **self._kwargs)
+        try:
+            for item in gen:
+                self.events.put(item)
+                if self._cancel.is_set():
+                    break
+        except Exception as exc:
+            self.events.put(("error", exc))
+        finally:
+            # Closing the generator lets it shut down pools or files it holds
+            gen.close()
+            self.events.put(("done", self._cancel.is_set()))
+
+    def drain(self, limit=500):
+        """Pop up to ``limit`` pending events without blocking."""
+        items = []
+        while len(items) < limit:
+            try:
+                items.append(self.events.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def attach(self, widget, handler, interval=50):
+        """Poll the queue every ``interval`` ms with ``widget.after``.
+
+        ``handler(event)`` is called on the Tk thread for every event until
+        the "done" event has been handled.
+        """
+        def poll():
+            for event in self.drain():
+                handler(event)
+                if event[0] == "done":
+                    self.finished = True
+            if not self.finished:
+                widget.after(interval, poll)
+
+        widget.after(interval, poll)
+        return self
+
+
+def call_job(func, *args, **kwargs):
+    """BackgroundTask job for one plain function call: yields ``("result", func(*args, **kwargs))``."""
+    yield ("result", func(*args, **kwargs))
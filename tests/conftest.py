@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.fixture
+def workbooks(tmp_path):
+    """Three two-sheet workbooks of random numbers plus a text column."""
+    rng = np.random.default_rng(0)
+    paths = []
+    for f in range(3):
+        path = tmp_path / f"book{f}.xlsx"
+        with pd.ExcelWriter(path) as writer:
+            for s in range(2):
+                df = pd.DataFrame(rng.normal(size=(2000, 5)), columns=list("abcde"))
+                df["n"] = rng.integers(0, 9, size=len(df))
+                df["t"] = [f"x{i % 7}" for i in range(len(df))]
+                df.to_excel(writer, sheet_name=f"S{s}", index=False)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def frame():
+    """Floats with missing values, whole numbers full of ties and a skewed column."""
+    rng = np.random.default_rng(1)
+    n = 500
+    floats = rng.normal(10, 3, n)
+    floats[rng.random(n) < 0.1] = np.nan
+    skewed = rng.lognormal(0, 1, n)
+    skewed[::17] = np.nan
+    return pd.DataFrame({
+        "floats": floats,
+        "ties": rng.integers(0, 6, n),
+        "skewed": skewed,
+        "key": rng.choice(["a", "b", "c"], n),
+    })
+
+
+def reference(values, measure, ddof=1, cv_scale=1.0):
+    """``measure`` of a Series computed as the original apps did, with pandas and SciPy."""
+    from scipy.stats import kurtosis, skew
+
+    data = pd.Series(values).dropna()
+    quartiles = {"Q1": 0.25, "Median": 0.5, "Q2": 0.5, "Q3": 0.75}
+    if measure in quartiles:
+        return data.quantile(quartiles[measure])
+    return {
+        "Mean": data.mean,
+        "Mode": lambda: data.mode().iloc[0],
+        "Range": lambda: data.max() - data.min(),
+        "Variance": lambda: data.var(ddof=ddof),
+        "Standard Deviation": lambda: data.std(ddof=ddof),
+        "Skewness": lambda: skew(data),
+        "Kurtosis": lambda: kurtosis(data),
+        "Max": data.max,
+        "Min": data.min,
+        "Coefficient of Variation": lambda: data.std(ddof=ddof) / data.mean() * cv_scale,
+        "IQR": lambda: data.quantile(0.75) - data.quantile(0.25),
+        "Quartile Deviation": lambda: (data.quantile(0.75) - data.quantile(0.25)) / 2,
+        "Mean Absolute Deviation": lambda: (data - data.mean()).abs().mean(),
+    }[measure]()
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+from conftest import reference
+
+from coresummarystat.engine import MEASURES, summarize_frame
+
+
+@pytest.mark.parametrize("ddof, cv_scale", [(1, 1.0), (0, 100.0)])
+def test_summarize_frame_matches_pandas(frame, ddof, cv_scale):
+    summary = summarize_frame(frame, MEASURES, ddof=ddof, cv_scale=cv_scale)
+    assert list(summary) == ["floats", "ties", "skewed"]
+    for col, stats in summary.items():
+        for measure in MEASURES:
+            assert stats[measure] == pytest.approx(reference(frame[col], measure, ddof, cv_scale), rel=1e-9), \
+                (col, measure)
+
+
+def test_integer_columns_keep_integer_results(frame):
+    stats = summarize_frame(frame, ["Min", "Max", "Mode", "Mean"], columns=["ties"])["ties"]
+    assert all(isinstance(stats[m], np.integer) for m in ["Min", "Max", "Mode"])
+    assert isinstance(stats["Mean"], float)
+
+
+def test_mode_ties(frame):
+    values = frame[["ties"]].copy()
+    values["ties"] = [1, 1, 2, 2, 3] * (len(values) // 5)
+    assert summarize_frame(values, ["Mode"])["ties"]["Mode"] == 1
+    assert summarize_frame(values, ["Mode"], mode_ties="largest")["ties"]["Mode"] == 2
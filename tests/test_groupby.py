@@ -0,0 +1,21 @@
+import pytest
+from conftest import reference
+
+from coresummarystat.engine import MEASURES
+from coresummarystat.groupby import group_summary
+
+
+def test_group_summary_matches_pandas(frame):
+    table = group_summary(frame, ["key"], MEASURES)
+    assert list(table["key"].unique()) == ["a", "b", "c"]
+    assert len(table) == 3 * 3
+    for row in table.to_dict("records"):
+        group = frame.loc[frame["key"] == row["key"], row["Column"]]
+        assert row["Count"] == group.notna().sum()
+        for measure in MEASURES:
+            assert row[measure] == pytest.approx(reference(group, measure), rel=1e-9), (row["key"], row["Column"], measure)
+
+
+def test_unknown_key_is_rejected(frame):
+    with pytest.raises(ValueError):
+        group_summary(frame, ["missing"], ["Mean"])
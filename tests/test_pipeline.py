@@ -0,0 +1,33 @@
+import pandas as pd
+
+from coresummarystat import pipeline
+from coresummarystat.store import SHEET_STORE
+
+MEASURES = ["Mean", "Median", "Mode", "Min", "Max", "Standard Deviation"]
+
+
+def _summaries(files, **options):
+    return {(file, sheet): pd.DataFrame(summary)
+            for file, sheet, summary in pipeline.iter_sheet_summaries(files, MEASURES, **options)}
+
+
+def test_workers_match_serial_run(workbooks):
+    # Sheet names are listed in the parent, which keeps the workbooks open across the fork
+    SHEET_STORE.clear()
+    serial = _summaries(workbooks)
+    SHEET_STORE.clear()
+    parallel = _summaries(workbooks, workers=2)
+    assert list(parallel) == list(serial)
+    for key, table in serial.items():
+        pd.testing.assert_frame_equal(parallel[key], table)
+
+
+def test_disk_cache_with_workers(workbooks, tmp_path):
+    cache = {"path": str(tmp_path / "summaries.sqlite")}
+    SHEET_STORE.clear()
+    expected = _summaries(workbooks)
+    # The first run fills the database from the workers, the second is answered from it
+    for _ in range(2):
+        cached = _summaries(workbooks, workers=2, cache=cache)
+        for key, table in expected.items():
+            pd.testing.assert_frame_equal(cached[key], table, check_dtype=False)
@@ -0,0 +1,20 @@
+import numpy as np
+import pandas as pd
+
+from coresummarystat.engine import summarize_frame
+from coresummarystat.sketch import KLLSketch, rank_error
+
+QUARTILES = ["Q1", "Median", "Q3"]
+
+
+def test_sketch_quantiles_are_repeatable():
+    df = pd.DataFrame({"x": np.random.default_rng(2).lognormal(size=50_000)})
+    first = summarize_frame(df, QUARTILES, quantiles="sketch")
+    assert summarize_frame(df, QUARTILES, quantiles="sketch") == first
+
+
+def test_sketch_rank_error_is_bounded():
+    values = np.random.default_rng(3).normal(size=100_000)
+    sketch = KLLSketch().update(values)
+    ranks = np.searchsorted(np.sort(values), sketch.quantiles([0.1, 0.25, 0.5, 0.75, 0.9])) / len(values)
+    np.testing.assert_allclose(ranks, [0.1, 0.25, 0.5, 0.75, 0.9], atol=rank_error(sketch.k))
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+import pytest
+from conftest import reference
+
+from coresummarystat.engine import MEASURES
+from coresummarystat.rolling import SLIDING_MEASURES, parse_window, window_summary
+
+SLIDING = [m for m in MEASURES if m in SLIDING_MEASURES]
+ROLLING = {
+    "Mean": lambda r: r.mean(),
+    "Variance": lambda r: r.var(),
+    "Standard Deviation": lambda r: r.std(),
+    "Min": lambda r: r.min(),
+    "Max": lambda r: r.max(),
+    "Median": lambda r: r.median(),
+    "Q1": lambda r: r.quantile(0.25),
+    "Q3": lambda r: r.quantile(0.75),
+}
+
+
+def _column(table, col, measure):
+    return table.loc[table["Column"] == col, measure].to_numpy()
+
+
+def test_sliding_rows_match_pandas_rolling(frame):
+    window = parse_window(25, "sliding", step=5, min_periods=3)
+    table = window_summary(frame.drop(columns="key"), SLIDING, window)
+    for col in ["floats", "ties", "skewed"]:
+        values = frame[col].astype(float)
+        for measure, func in ROLLING.items():
+            expected = func(values.rolling(25, min_periods=3)).to_numpy()[24::5]
+            np.testing.assert_allclose(_column(table, col, measure), expected, rtol=1e-9, atol=1e-12,
+                                       err_msg=f"{col} {measure}")
+
+
+def test_sliding_time_windows_match_pandas_rolling(frame):
+    df = frame.drop(columns="key").assign(time=pd.date_range("2024-01-01", periods=len(frame), freq="7min"))
+    table = window_summary(df, ["Mean", "Max"], parse_window("1h", "sliding", on="time"))
+    expected = df.set_index("time")["floats"].rolling("1h")
+    np.testing.assert_allclose(_column(table, "floats", "Mean"), expected.mean().to_numpy(), rtol=1e-9)
+    np.testing.assert_allclose(_column(table, "floats", "Max"), expected.max().to_numpy())
+
+
+def test_tumbling_rows_match_summaries_of_each_block(frame):
+    df = frame.drop(columns="key")
+    table = window_summary(df, MEASURES, parse_window(100, "tumbling"))
+    for start in range(0, len(df), 100):
+        block = df.iloc[start:start + 100]
+        rows = table[table["Window Start"] == start + 1]
+        for row in rows.to_dict("records"):
+            for measure in MEASURES:
+                assert row[measure] == pytest.approx(reference(block[row["Column"]], measure), rel=1e-9), \
+                    (start, row["Column"], measure)